@@ -0,0 +1,83 @@
+"""Maintenance commands. Run with ``python -m app.cli <command> ...``."""
+import argparse
+
+from sqlmodel import Session, select
+
+from app.core.database import engine, init_db
+from app.models.search import rebuild_post_search_index
+from app.models.user import User
+from app.services.counters import reconcile_post_counters, reconcile_user_counters
+from app.services.timeline import rebuild_timeline
+
+
+def _resolve_user(session: Session, user: str) -> User:
+    if user.isdigit():
+        found = session.get(User, int(user))
+    else:
+        found = session.exec(select(User).where(User.username == user)).first()
+    if not found:
+        raise SystemExit(f"User not found: {user}")
+    return found
+
+
+def cmd_rebuild_timeline(args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        user = _resolve_user(session, args.user)
+        # rebuild_timeline commits, which expires the user
+        username = user.username
+        count = rebuild_timeline(session, user.id)
+    print(f"Rebuilt timeline for {username}: {count} entries")
+
+
+def cmd_reconcile_counters(args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        fixed = reconcile_post_counters(session, args.chunk_size)
+    print(f"Reconciled counters on {fixed} posts")
+
+
+def cmd_repair_user_stats(args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        fixed = reconcile_user_counters(session, args.chunk_size)
+    print(f"Repaired follower/following/post counts on {fixed} users")
+
+
+def cmd_rebuild_search_index(args: argparse.Namespace) -> None:
+    with engine.begin() as conn:
+        rebuild_post_search_index(conn)
+    print("Rebuilt post search index")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-timeline", help="Regenerate one user's home timeline"
+    )
+    rebuild.add_argument("user", help="Username or numeric user id")
+    rebuild.set_defaults(func=cmd_rebuild_timeline)
+
+    reconcile = commands.add_parser(
+        "reconcile-counters", help="Recompute drifted like/reply/repost counters"
+    )
+    reconcile.add_argument("--chunk-size", type=int, default=None)
+    reconcile.set_defaults(func=cmd_reconcile_counters)
+
+    repair = commands.add_parser(
+        "repair-user-stats", help="Recompute follower/following/post counts"
+    )
+    repair.add_argument("--chunk-size", type=int, default=None)
+    repair.set_defaults(func=cmd_repair_user_stats)
+
+    search = commands.add_parser(
+        "rebuild-search-index", help="Regenerate the FTS5 post search index"
+    )
+    search.set_defaults(func=cmd_rebuild_search_index)
+
+    args = parser.parse_args(argv)
+    init_db()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
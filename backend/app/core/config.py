@@ -8,10 +8,51 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     captcha_token_expire_minutes: int = 5
+    captcha_challenge_expire_minutes: int = 10
+    captcha_review_lease_seconds: int = 60  # how long a queue item is held for one reviewer
+    captcha_required: bool = True  # posts, replies and reposts spend a captcha token
     upload_dir: str = "./uploads"
     max_gif_size: int = 5 * 1024 * 1024  # 5MB
     max_video_size: int = 10 * 1024 * 1024  # 10MB
     allowed_origins: list[str] = ["http://localhost:3000"]
+    sqlite_pragma_profile: str = "balanced"  # durable, balanced or fast
+    sqlite_pragmas: dict[str, str | int] = {}  # per-pragma overrides
+    sqlite_reader_pool_size: int = 8
+    sqlite_pool_timeout_seconds: float = 30
+    timeline_backfill_batch_size: int = 500
+    timeline_celebrity_threshold: int = 10_000
+    timeline_celebrity_refresh_seconds: int = 60
+    counter_reconcile_interval_seconds: int = 3600  # 0 disables
+    counter_reconcile_chunk_size: int = 500
+    trending_half_life_hours: float = 6.0
+    trending_window_hours: int = 72
+    trending_top_k: int = 50
+    trending_max_tracked: int = 100_000
+    trending_refresh_seconds: int = 30
+    suggestions_refresh_seconds: int = 3600
+    suggestions_compact_threshold: int = 10_000
+    suggestions_cache_size: int = 10_000
+    suggestions_cache_ttl_seconds: int = 300
+    suggestions_cache_limit: int = 50
+    typeahead_refresh_seconds: int = 300
+    typeahead_scan_limit: int = 256
+    live_queue_size: int = 100
+    live_heartbeat_seconds: int = 15
+    etag_max_tracked_keys: int = 100_000
+    batch_max_ids: int = 250
+    write_batching: bool = False  # group-commit likes, follows and challenges
+    write_batch_max_ops: int = 64
+    write_batch_max_delay_ms: float = 2
+    auth_token_cache_size: int = 10_000
+    auth_user_cache_size: int = 10_000
+    auth_user_cache_ttl_seconds: float = 30
+    # Hot routes trust access-token claims, checked only against the revocation list
+    stateless_auth: bool = True
+    revocation_refresh_seconds: int = 10
+    bcrypt_rounds: int = 12  # raising it rehashes each password at next login
+    password_workers: int = 2
+    password_queue_limit: int = 16  # in-flight hashes before shedding with 503
+    password_retry_after_seconds: int = 2
 
     class Config:
         env_file = ".env"
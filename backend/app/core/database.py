@@ -1,24 +1,275 @@
 import os
+import threading
+import time
 
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.elements import TextClause
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.core.migrations import migrate
+
+# Named PRAGMA sets, picked with settings.sqlite_pragma_profile and
+# overridden key by key with settings.sqlite_pragmas. WAL lets readers run
+# alongside the single writer; busy_timeout covers writers in other
+# processes. Negative cache_size is in KiB.
+PRAGMA_PROFILES: dict[str, dict[str, str | int]] = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "cache_size": -16_000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "busy_timeout": 5000,
+        "cache_size": -256_000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def pragmas() -> dict[str, str | int]:
+    if settings.sqlite_pragma_profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown sqlite_pragma_profile: {settings.sqlite_pragma_profile}")
+    return {**PRAGMA_PROFILES[settings.sqlite_pragma_profile], **settings.sqlite_pragmas}
+
+
+def _install_pragmas(engine, readonly: bool) -> None:
+    statements = [
+        f"PRAGMA {name} = {value}"
+        for name, value in pragmas().items()
+        # journal_mode is a database setting; only the writer changes it
+        if not (readonly and name == "journal_mode")
+    ]
+    if readonly:
+        statements.append("PRAGMA query_only = 1")
+
+    @event.listens_for(engine, "connect")
+    def apply(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+# ---------------------------------------------------------------------------
+# Pools that record how long checkouts wait
+# ---------------------------------------------------------------------------
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self, pool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "mean_wait_ms": self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class _TimedPoolMixin:
+    @property
+    def stats(self) -> PoolStats:
+        # Pools are recreated on engine.dispose(); stats start over with them
+        if "_stats" not in self.__dict__:
+            self._stats = PoolStats()
+        return self._stats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Engines: one writer connection and a read-only reader pool, sync and async
+# ---------------------------------------------------------------------------
 
 connect_args = {"check_same_thread": False}
-engine = create_engine(settings.database_url, connect_args=connect_args)
 
 
-def init_db():
-    import sqlite3
+def create_engines(url: str, **pool_options):
+    """Return ``(writer, reader)`` sync engines for ``url``.
+
+    The writer pool holds exactly one connection, so concurrent writes
+    queue for it in the pool (with wait stats) instead of failing with
+    ``database is locked``. Readers are query_only. ``pool_options``
+    replaces the pool settings, e.g. ``poolclass=NullPool`` in tests.
+    """
+    writer_pool = pool_options or {
+        "poolclass": TimedQueuePool,
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.sqlite_pool_timeout_seconds,
+    }
+    reader_pool = pool_options or {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.sqlite_reader_pool_size,
+        "max_overflow": 0,
+        "pool_timeout": settings.sqlite_pool_timeout_seconds,
+    }
+    writer = create_engine(url, connect_args=connect_args, **writer_pool)
+    reader = create_engine(url, connect_args=connect_args, **reader_pool)
+    _install_pragmas(writer, readonly=False)
+    _install_pragmas(reader, readonly=True)
+    return writer, reader
+
+
+def create_async_engines(url: str, **pool_options) -> tuple[AsyncEngine, AsyncEngine]:
+    """Async (aiosqlite) counterpart of create_engines."""
+    url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    writer_pool = pool_options or {
+        "poolclass": TimedAsyncQueuePool,
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.sqlite_pool_timeout_seconds,
+    }
+    reader_pool = pool_options or {
+        "poolclass": TimedAsyncQueuePool,
+        "pool_size": settings.sqlite_reader_pool_size,
+        "max_overflow": 0,
+        "pool_timeout": settings.sqlite_pool_timeout_seconds,
+    }
+    writer = create_async_engine(url, connect_args=connect_args, **writer_pool)
+    reader = create_async_engine(url, connect_args=connect_args, **reader_pool)
+    _install_pragmas(writer.sync_engine, readonly=False)
+    _install_pragmas(reader.sync_engine, readonly=True)
+    return writer, reader
 
+
+engine, read_engine = create_engines(settings.database_url)
+async_engine, async_read_engine = create_async_engines(settings.database_url)
+
+
+def pool_stats() -> dict:
+    pools = {
+        "writer": engine.pool,
+        "reader": read_engine.pool,
+        "async_writer": async_engine.pool,
+        "async_reader": async_read_engine.pool,
+    }
+    return {
+        name: pool.stats.snapshot(pool)
+        for name, pool in pools.items()
+        if isinstance(pool, _TimedPoolMixin)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+
+def _is_write(clause) -> bool:
+    # No statement means a bare session.connection(), taken for raw DDL/DML
+    if clause is None:
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH")
+    return clause.is_dml
+
+
+class RoutingSession(Session):
+    """Session that reads through the reader pool and writes through the writer.
+
+    Once a transaction writes (a flush or a DML statement) it stays on the
+    writer until commit or rollback, so it reads its own uncommitted rows.
+    """
+
+    def __init__(self, *args, writer, reader, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+        self.reader = reader
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.wrote or self._flushing or _is_write(clause):
+            self.wrote = True
+            return self.writer
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _back_to_reader(session, transaction):
+    if transaction.parent is None:
+        session.wrote = False
+
+
+def new_session(writer=None, reader=None) -> RoutingSession:
+    return RoutingSession(writer=writer or engine, reader=reader or read_engine)
+
+
+def new_async_session(writer: AsyncEngine | None = None, reader: AsyncEngine | None = None):
+    # Objects stay loaded after commit: an expired attribute can't lazy-load
+    # outside the greenlet bridge. Sync service functions taking a Session
+    # run through ``await session.run_sync(fn, ...)``.
+    return AsyncSession(
+        sync_session_class=RoutingSession,
+        writer=(writer or async_engine).sync_engine,
+        reader=(reader or async_read_engine).sync_engine,
+        expire_on_commit=False,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+def init_db():
     db_path = settings.database_url.replace("sqlite:///", "")
     os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.close()
+    # The writer's first connection switches the database to WAL
     SQLModel.metadata.create_all(engine)
+    # create_all skips anything new on tables that already exist
+    migrate(engine)
 
 
 def get_session():
-    with Session(engine) as session:
+    with new_session() as session:
+        yield session
+
+
+async def get_async_session():
+    async with new_async_session() as session:
         yield session
@@ -1,26 +1,112 @@
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
-from app.core.security import decode_token
+from app.core.config import settings
+from app.core.database import get_async_session
 from app.models.user import User
+from app.services.auth_cache import auth_cache
+from app.services.revocation import revocations
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The caller as named by their access token.
 
+    For handlers that only need who is asking: building one takes no query.
+    """
 
-def get_current_user(
+    id: int
+    username: str
+
+
+async def get_token_claims(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session),
-) -> User:
-    payload = decode_token(credentials.credentials)
-    if not payload:
+) -> dict:
+    """The verified claims of the caller's access token."""
+    # Refresh and captcha tokens are signed with the same key; only
+    # access tokens authenticate requests
+    payload = auth_cache.payload(credentials.credentials)
+    if not payload or payload.get("type") != "access" or revocations.is_revoked(payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
-    user = session.get(User, payload.get("user_id"))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-        )
+    return payload
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_async_session),
+) -> User:
+    payload = await get_token_claims(credentials)
+    user_id = payload.get("user_id")
+    user = auth_cache.user(user_id)
+    if user is None:
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+        # Shared read-only between requests from here on; see AuthCache
+        session.expunge(user)
+        auth_cache.remember_user(user)
     return user
+
+
+async def get_optional_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+    session: AsyncSession = Depends(get_async_session),
+) -> User | None:
+    """Like get_current_user, but the caller is anonymous (None) unless
+    they send a valid token.
+
+    Public routes must keep working for a client holding an expired,
+    revoked or malformed token, so a token that fails is ignored, not a 401.
+    """
+    if credentials is None:
+        return None
+    try:
+        return await get_current_user(credentials, session)
+    except HTTPException:
+        return None
+
+
+async def get_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_async_session),
+) -> Principal:
+    """The caller for hot routes, from token claims alone.
+
+    With settings.stateless_auth on, no query is made (usernames never
+    change, so the claim can't go stale), and an account deleted since the
+    token was issued is only turned away once it is in the revocation list
+    (see app.services.revocation). Off, the caller is resolved like
+    get_current_user.
+    """
+    if not settings.stateless_auth:
+        user = await get_current_user(credentials, session)
+        return Principal(user.id, user.username)
+    payload = await get_token_claims(credentials)
+    return Principal(payload["user_id"], payload["sub"])
+
+
+def split_query_list(raw: str | None, limit: int, cast=str) -> list:
+    """Parse a comma-separated query parameter such as ``?ids=1,2,3``.
+
+    Blank items are skipped and duplicates dropped, keeping first-seen
+    order. More than ``limit`` items, or an item ``cast`` rejects, is a 400.
+    """
+    if not raw:
+        return []
+    try:
+        items = list(dict.fromkeys(cast(item.strip()) for item in raw.split(",") if item.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid list parameter")
+    if len(items) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} items per request")
+    return items
@@ -0,0 +1,186 @@
+"""Versioned schema migrations for existing databases.
+
+``create_all`` only creates missing tables, so anything added to a table
+that already exists (columns, indexes, FTS tables) ships as a migration.
+``PRAGMA user_version`` records the last migration applied; each pending
+migration runs in its own transaction together with the version bump, so
+a failure leaves the database at the previous version. Migrations must be
+idempotent: databases created before this runner start at version 0 and
+may already have some of the changes, and fresh databases get every table
+and model index from ``create_all`` before the runner replays them all.
+"""
+import logging
+from typing import Callable
+
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.models.search import (
+    create_post_search_index,
+    create_user_search_index,
+    rebuild_post_search_index,
+    rebuild_user_search_index,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _baseline(conn: Connection) -> None:
+    # What init_db did on every start before migrations were versioned:
+    # add model columns and indexes missing from older databases
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                spec = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {spec}'))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _search_indexes(conn: Connection) -> None:
+    if create_post_search_index(conn):
+        rebuild_post_search_index(conn)
+    if create_user_search_index(conn):
+        rebuild_user_search_index(conn)
+
+
+def _hot_predicate_indexes(conn: Connection) -> None:
+    # Lookups that scanned whole tables: likes of a post (the unique
+    # constraint leads with user_id), reposts of a post, posts/likes since a
+    # time (trending), celebrity authors, the review queue, a user's
+    # challenges and a challenge's reviews. Names match the models.
+    for name, table, column in (
+        ("ix_like_post_id", "like", "post_id"),
+        ("ix_like_created_at", "like", "created_at"),
+        ("ix_post_repost_of_id", "post", "repost_of_id"),
+        ("ix_post_created_at", "post", "created_at"),
+        ("ix_user_follower_count", "user", "follower_count"),
+        ("ix_captchachallenge_crowd_status", "captchachallenge", "crowd_status"),
+        ("ix_captchachallenge_user_id", "captchachallenge", "user_id"),
+        ("ix_captchareview_challenge_id", "captchareview", "challenge_id"),
+    ):
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({column})'))
+
+
+def _review_queue(conn: Connection) -> None:
+    # Lease columns, and the queue's (status, age) order, which replaces
+    # the status-only index; names match the models
+    existing = {col["name"] for col in inspect(conn).get_columns("captchachallenge")}
+    for name, spec in (("leased_by", "INTEGER"), ("lease_expires_at", "DATETIME")):
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE captchachallenge ADD COLUMN {name} {spec}"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_captchachallenge_crowd_status_created_at "
+        "ON captchachallenge (crowd_status, created_at)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_captchachallenge_crowd_status"))
+
+
+def _post_counters(conn: Connection) -> None:
+    # _baseline added the counter columns at 0 on existing posts; fill them
+    # from the rows they count (same totals as reconcile_post_counters)
+    conn.execute(text(
+        "UPDATE post SET "
+        'like_count = (SELECT COUNT(*) FROM "like" WHERE "like".post_id = post.id), '
+        "reply_count = (SELECT COUNT(*) FROM post AS reply WHERE reply.parent_id = post.id), "
+        "repost_count = (SELECT COUNT(*) FROM post AS repost WHERE repost.repost_of_id = post.id)"
+    ))
+
+
+def _user_counters(conn: Connection) -> None:
+    # Same gap for profile counters; follower_count also decides who is a
+    # celebrity, so it must be right before the first feed is served
+    conn.execute(text(
+        "UPDATE user SET "
+        "follower_count = (SELECT COUNT(*) FROM follow WHERE follow.following_id = user.id), "
+        "following_count = (SELECT COUNT(*) FROM follow WHERE follow.follower_id = user.id), "
+        "post_count = (SELECT COUNT(*) FROM post WHERE post.user_id = user.id)"
+    ))
+
+
+def _celebrity_flag(conn: Connection) -> None:
+    # Whoever is over the threshold now has had their posts pulled, not
+    # pushed; the flag keeps them pulled (see app.services.timeline)
+    existing = {col["name"] for col in inspect(conn).get_columns("user")}
+    if "celebrity" not in existing:
+        conn.execute(text("ALTER TABLE user ADD COLUMN celebrity BOOLEAN DEFAULT 0 NOT NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_user_celebrity ON user (celebrity)"))
+    conn.execute(
+        text("UPDATE user SET celebrity = 1 WHERE follower_count >= :threshold"),
+        {"threshold": settings.timeline_celebrity_threshold},
+    )
+
+
+TIMELINE_REBUILD_FOLLOWERS = 1000
+
+
+def _home_timelines(conn: Connection) -> None:
+    # Databases from before fan-out-on-write have follows and posts but no
+    # timeline rows, so every home feed read empty. Push each followed
+    # non-celebrity author's top-level posts, a range of followers at a
+    # time so no single statement materializes the whole join; OR IGNORE
+    # keeps rows fan-out already wrote.
+    low, high = conn.execute(text("SELECT MIN(follower_id), MAX(follower_id) FROM follow")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, TIMELINE_REBUILD_FOLLOWERS):
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO timelineentry (user_id, post_id, author_id, created_at) "
+                "SELECT follow.follower_id, post.id, post.user_id, post.created_at "
+                "FROM follow "
+                "JOIN user ON user.id = follow.following_id AND NOT user.celebrity "
+                "JOIN post ON post.user_id = follow.following_id AND post.parent_id IS NULL "
+                "WHERE follow.follower_id >= :start AND follow.follower_id < :end"
+            ),
+            {"start": start, "end": start + TIMELINE_REBUILD_FOLLOWERS},
+        )
+
+
+def _strip_snippet_marks(conn: Connection) -> None:
+    # Search snippets mark matches with \x02/\x03; posts written before
+    # PostCreate stripped control characters may contain them. The FTS
+    # update trigger reindexes the rows changed.
+    conn.execute(text(
+        "UPDATE post SET content = replace(replace(content, char(2), ''), char(3), '') "
+        "WHERE instr(content, char(2)) OR instr(content, char(3))"
+    ))
+
+
+# (version, description, migration); append only, never renumber
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "add missing model columns and indexes", _baseline),
+    (2, "create full-text search tables", _search_indexes),
+    (3, "index hot lookup predicates", _hot_predicate_indexes),
+    (4, "lease and order the captcha review queue", _review_queue),
+    (5, "backfill post engagement counters", _post_counters),
+    (6, "backfill user profile counters", _user_counters),
+    (7, "flag celebrity authors", _celebrity_flag),
+    (8, "build home timelines for existing follows", _home_timelines),
+    (9, "strip search snippet marks from post content", _strip_snippet_marks),
+]
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def migrate(engine) -> list[int]:
+    """Apply pending migrations in order; return the versions applied."""
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        with engine.begin() as conn:
+            # pysqlite only opens a transaction before DML; begin explicitly
+            # so the DDL and the version bump commit or roll back together
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            if schema_version(conn) >= version:
+                continue
+            logger.info("Applying migration %d: %s", version, description)
+            migration(conn)
+            conn.execute(text(f"PRAGMA user_version = {version}"))
+        applied.append(version)
+    return applied
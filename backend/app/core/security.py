@@ -1,3 +1,5 @@
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
@@ -6,16 +8,32 @@ from jose import jwt, JWTError
 from app.core.config import settings
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def hash_password(password: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+def needs_rehash(hashed: str, rounds: int | None = None) -> bool:
+    """True if ``hashed`` was made with a cost factor other than ``rounds``."""
+    # Modular crypt format: $2b$<cost>$<salt+hash>
+    try:
+        cost = int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return cost != (rounds or settings.bcrypt_rounds)
+
+
 def create_access_token(data: dict, expires_minutes: int | None = None) -> str:
     to_encode = data.copy()
+    to_encode.setdefault("type", "access")
+    # jti names the token for revocation; a fractional iat lets a user-wide
+    # revocation tell apart tokens issued in the same second
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode["iat"] = time.time()
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=expires_minutes or settings.access_token_expire_minutes
     )
@@ -25,7 +43,8 @@ def create_access_token(data: dict, expires_minutes: int | None = None) -> str:
 
 def create_refresh_token(data: dict) -> str:
     return create_access_token(
-        data, expires_minutes=settings.refresh_token_expire_days * 1440
+        {**data, "type": "refresh"},
+        expires_minutes=settings.refresh_token_expire_days * 1440,
     )
 
 
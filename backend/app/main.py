@@ -1,21 +1,59 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import async_engine, async_read_engine, engine, init_db, pool_stats
 from app.routers.auth import router as auth_router
 from app.routers.posts import router as posts_router
 from app.routers.users import router as users_router
 from app.routers.captcha import router as captcha_router
 from app.routers.media import router as media_router
+from app.routers.search import router as search_router
+from app.routers.live import router as live_router
+from app.services import passwords, replay, revocation, suggestions, trending, typeahead
+from app.services.auth_cache import auth_cache
+from app.services.batching import batcher
+from app.services.live import hub
+from app.services.counters import run_reconciler
+from app.services.timeline import merge_stats
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    # Before serving: revoked tokens and spent captcha tokens must not get a
+    # grace period at startup
+    with Session(engine) as session:
+        revocation.revocations.load(session)
+        replay.cache.load(session)
+    tasks = [
+        asyncio.create_task(trending.run_refresher(settings.trending_refresh_seconds)),
+        asyncio.create_task(
+            suggestions.run_refresher(settings.suggestions_refresh_seconds)
+        ),
+        asyncio.create_task(typeahead.run_refresher(settings.typeahead_refresh_seconds)),
+        asyncio.create_task(
+            revocation.run_refresher(settings.revocation_refresh_seconds)
+        ),
+        asyncio.create_task(replay.run_sweeper()),
+    ]
+    if settings.counter_reconcile_interval_seconds:
+        tasks.append(
+            asyncio.create_task(
+                run_reconciler(settings.counter_reconcile_interval_seconds)
+            )
+        )
     yield
+    for task in tasks:
+        task.cancel()
+    batcher.close()
+    passwords.pool.shutdown()
+    await async_engine.dispose()
+    await async_read_engine.dispose()
 
 
 app = FastAPI(title="AntiMoltbook API", lifespan=lifespan)
@@ -26,6 +64,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
@@ -34,8 +73,26 @@ app.include_router(posts_router)
 app.include_router(users_router)
 app.include_router(captcha_router)
 app.include_router(media_router)
+app.include_router(search_router)
+app.include_router(live_router)
 
 
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/api/metrics")
+def metrics():
+    return {
+        "timeline_merge": merge_stats(),
+        "follow_graph": suggestions.graph.stats(),
+        "typeahead": typeahead.index.stats(),
+        "live": hub.stats(),
+        "database": pool_stats(),
+        "write_batcher": batcher.stats(),
+        "auth_cache": auth_cache.stats(),
+        "password_pool": passwords.pool.stats(),
+        "revocations": revocation.revocations.stats(),
+        "captcha_replay": replay.cache.stats(),
+    }
@@ -1,5 +1,8 @@
-from app.models.user import User, UserCreate, UserRead, UserUpdate  # noqa: F401
-from app.models.post import Post, PostCreate, PostRead  # noqa: F401
+from app.models.user import User, UserCreate, UserRead, UserSummary, UserUpdate  # noqa: F401
+from app.models.post import Post, PostCreate, PostExpanded, PostRead, Thread, ThreadItem  # noqa: F401
 from app.models.like import Like  # noqa: F401
 from app.models.follow import Follow  # noqa: F401
-from app.models.captcha import CaptchaChallenge, CaptchaReview  # noqa: F401
+from app.models.captcha import CaptchaChallenge, CaptchaReview, CaptchaReviewItem, ConsumedCaptchaToken  # noqa: F401
+from app.models.timeline import TimelineEntry  # noqa: F401
+from app.models.revocation import Revocation  # noqa: F401
+from app.models import search  # noqa: F401
@@ -1,11 +1,16 @@
 from datetime import datetime, timezone
 
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Index
 
 
 class CaptchaChallenge(SQLModel, table=True):
+    __table_args__ = (
+        # The review queue: pending items, oldest first
+        Index("ix_captchachallenge_crowd_status_created_at", "crowd_status", "created_at"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    user_id: int | None = Field(default=None, foreign_key="user.id")
+    user_id: int | None = Field(default=None, foreign_key="user.id", index=True)
     challenge_type: str  # draw_shape, draw_freeform, type_backwards, type_pattern, speed_type
     challenge_data: str  # JSON string
     response_data: str | None = None  # JSON string
@@ -13,11 +18,32 @@ class CaptchaChallenge(SQLModel, table=True):
     crowd_status: str = "not_needed"  # not_needed, pending_review, approved, rejected
     context: str = "post"  # signup, post
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    leased_by: int | None = None  # reviewer the item is handed to, until lease_expires_at
+    lease_expires_at: datetime | None = None
+
+
+class CaptchaReviewItem(SQLModel):
+    id: int
+    challenge_type: str
+    challenge_data: str
+    response_data: str | None
+    created_at: datetime
+    lease_expires_at: datetime | None
 
 
 class CaptchaReview(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    challenge_id: int = Field(foreign_key="captchachallenge.id")
+    challenge_id: int = Field(foreign_key="captchachallenge.id", index=True)
     reviewer_id: int = Field(foreign_key="user.id")
     approved: bool
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ConsumedCaptchaToken(SQLModel, table=True):
+    """The jti of a captcha token already spent on a post; see app.services.replay."""
+
+    # Keyed by jti alone: no rowid, so each row is just the key and its expiry
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    jti: str = Field(primary_key=True)
+    expires_at: float  # the token's exp; the row is useless after it
@@ -8,7 +8,7 @@ class Follow(SQLModel, table=True):
 
     id: int | None = Field(default=None, primary_key=True)
     follower_id: int = Field(foreign_key="user.id")
-    following_id: int = Field(foreign_key="user.id")
+    following_id: int = Field(foreign_key="user.id", index=True)
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
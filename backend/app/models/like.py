@@ -8,7 +8,7 @@ class Like(SQLModel, table=True):
 
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
-    post_id: int = Field(foreign_key="post.id")
+    post_id: int = Field(foreign_key="post.id", index=True)
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc)
+        default_factory=lambda: datetime.now(timezone.utc), index=True
     )
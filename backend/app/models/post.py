@@ -1,19 +1,37 @@
+import re
 from datetime import datetime, timezone
 
-from sqlmodel import SQLModel, Field
+from pydantic import field_validator
+from sqlmodel import SQLModel, Field, Index
+
+from app.models.user import UserSummary
 
 
 class Post(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_post_parent_id_created_at_id", "parent_id", "created_at", "id"),
+        Index("ix_post_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     content: str | None = None
     media_url: str | None = None
     media_type: str | None = None  # null, "image", "gif", "video"
     parent_id: int | None = Field(default=None, foreign_key="post.id")
-    repost_of_id: int | None = Field(default=None, foreign_key="post.id")
+    repost_of_id: int | None = Field(default=None, foreign_key="post.id", index=True)
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc)
+        default_factory=lambda: datetime.now(timezone.utc), index=True
     )
+    # Denormalized engagement counters, see app.services.counters
+    like_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    reply_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    repost_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+
+# C0 controls other than tab and line breaks, and DEL. Search snippets mark
+# matches with \x02/\x03 (see app.services.search), so posts can't carry them.
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
 
 
 class PostCreate(SQLModel):
@@ -22,6 +40,11 @@ class PostCreate(SQLModel):
     media_type: str | None = None
     captcha_token: str | None = None
 
+    @field_validator("content")
+    @classmethod
+    def strip_control_characters(cls, content: str | None) -> str | None:
+        return content if content is None else _CONTROL_CHARACTERS.sub("", content)
+
 
 class PostRead(SQLModel):
     id: int
@@ -32,3 +55,28 @@ class PostRead(SQLModel):
     parent_id: int | None
     repost_of_id: int | None
     created_at: datetime
+
+
+class PostExpanded(PostRead):
+    """PostRead with the author, reposted original, counts and viewer state embedded."""
+
+    author: UserSummary | None
+    repost_of: "PostExpanded | None"
+    like_count: int
+    reply_count: int
+    repost_count: int
+    viewer_has_liked: bool
+
+
+class ThreadItem(SQLModel):
+    post: PostRead
+    depth: int  # 1 = direct reply to the thread's focus post
+    has_more_replies: bool
+    next_cursor: str | None  # pass to /posts/{post.id}/thread to continue this branch
+
+
+class Thread(SQLModel):
+    ancestors: list[PostRead]  # root first
+    post: PostRead
+    replies: list[ThreadItem]  # depth-first, oldest reply first at each level
+    next_cursor: str | None  # more direct replies to the focus post
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+
+
+class Revocation(SQLModel, table=True):
+    """A revoked token or user, loaded into app.services.revocation.
+
+    Times are epoch seconds so they compare directly with JWT ``iat``/``exp``.
+    """
+
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str  # token (subject is a jti) or user (subject is a user id)
+    subject: str
+    not_before: float  # tokens issued before this are rejected
+    expires_at: float  # no token it could match outlives this; prune after
@@ -0,0 +1,116 @@
+"""SQLite FTS5 full-text indexes.
+
+``post_fts`` indexes Post.content for search; ``user_fts`` indexes
+User.username and User.display_name with prefix tables, as the fallback
+for typeahead. Both are external-content tables: they store only the
+inverted index and read text back from the base table. Triggers keep them
+in sync with every insert, delete and update of the indexed columns.
+"""
+from sqlalchemy import event, text
+
+from app.models.post import Post
+from app.models.user import User
+
+_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+        content, content='post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post
+    WHEN new.content IS NOT NULL BEGIN
+        INSERT INTO post_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post
+    WHEN old.content IS NOT NULL BEGIN
+        INSERT INTO post_fts(post_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE OF content ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, content)
+            SELECT 'delete', old.id, old.content WHERE old.content IS NOT NULL;
+        INSERT INTO post_fts(rowid, content)
+            SELECT new.id, new.content WHERE new.content IS NOT NULL;
+    END
+    """,
+]
+
+
+_USER_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5(
+        username, display_name, content='user', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON user BEGIN
+        INSERT INTO user_fts(rowid, username, display_name)
+            VALUES (new.id, new.username, new.display_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON user BEGIN
+        INSERT INTO user_fts(user_fts, rowid, username, display_name)
+            VALUES ('delete', old.id, old.username, old.display_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF username, display_name ON user BEGIN
+        INSERT INTO user_fts(user_fts, rowid, username, display_name)
+            VALUES ('delete', old.id, old.username, old.display_name);
+        INSERT INTO user_fts(rowid, username, display_name)
+            VALUES (new.id, new.username, new.display_name);
+    END
+    """,
+]
+
+
+def _create(connection, name: str, ddl: list[str]) -> bool:
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": name},
+    ).first()
+    for statement in ddl:
+        connection.execute(text(statement))
+    return exists is None
+
+
+def create_post_search_index(connection) -> bool:
+    """Create the post FTS table and triggers if missing.
+
+    Returns True if the table was created, in which case the caller should
+    populate it with rebuild_post_search_index.
+    """
+    return _create(connection, "post_fts", _DDL)
+
+
+def rebuild_post_search_index(connection) -> None:
+    """Regenerate the whole FTS index from the post table."""
+    connection.execute(text("INSERT INTO post_fts(post_fts) VALUES ('rebuild')"))
+
+
+def create_user_search_index(connection) -> bool:
+    """Create the user FTS table and triggers if missing. Same contract as
+    create_post_search_index."""
+    return _create(connection, "user_fts", _USER_DDL)
+
+
+def rebuild_user_search_index(connection) -> None:
+    """Regenerate the whole FTS index from the user table."""
+    connection.execute(text("INSERT INTO user_fts(user_fts) VALUES ('rebuild')"))
+
+
+@event.listens_for(Post.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    create_post_search_index(connection)
+
+
+@event.listens_for(User.__table__, "after_create")
+def _create_user_search_index(target, connection, **kw):
+    create_user_search_index(connection)
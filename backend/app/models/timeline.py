@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlmodel import SQLModel, Field, Index, UniqueConstraint
+
+
+class TimelineEntry(SQLModel, table=True):
+    """A post materialized into a follower's home timeline (fan-out-on-write)."""
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id"),
+        Index("ix_timelineentry_user_id_created_at_post_id", "user_id", "created_at", "post_id"),
+        Index("ix_timelineentry_user_id_author_id", "user_id", "author_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")  # timeline owner
+    post_id: int = Field(foreign_key="post.id", index=True)
+    author_id: int = Field(foreign_key="user.id")
+    created_at: datetime  # copy of Post.created_at, the timeline sort key
@@ -20,6 +20,12 @@ class User(UserBase, table=True):
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
+    # Denormalized profile counters, see app.services.counters
+    follower_count: int = Field(default=0, index=True, sa_column_kwargs={"server_default": "0"})
+    following_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    post_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Posts are pulled into home feeds, not pushed; see app.services.timeline
+    celebrity: bool = Field(default=False, index=True, sa_column_kwargs={"server_default": "0"})
 
 
 class UserCreate(SQLModel):
@@ -39,6 +45,13 @@ class UserRead(SQLModel):
     created_at: datetime
 
 
+class UserSummary(SQLModel):
+    id: int
+    username: str
+    display_name: str
+    avatar_url: str | None
+
+
 class UserUpdate(SQLModel):
     display_name: str | None = None
     bio: str | None = None
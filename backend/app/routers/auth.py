@@ -1,49 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.core.deps import get_token_claims
 from app.core.security import (
-    hash_password,
-    verify_password,
     create_access_token,
     create_refresh_token,
     decode_token,
+    needs_rehash,
 )
 from app.models.user import User, UserCreate, UserRead
+from app.services import passwords, typeahead
+from app.services.auth_cache import auth_cache
+from app.services.passwords import PasswordPoolFull
+from app.services.revocation import revocations, revoke_token, revoke_user
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+def _taken() -> HTTPException:
+    return HTTPException(status_code=400, detail="Email or username already taken")
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, retry shortly",
+        headers={"Retry-After": str(settings.password_retry_after_seconds)},
+    )
+
+
 @router.post("/register", response_model=UserRead, status_code=201)
-def register(user_in: UserCreate, session: Session = Depends(get_session)):
-    existing = session.exec(
-        select(User).where(
-            (User.email == user_in.email) | (User.username == user_in.username)
+async def register(user_in: UserCreate, session: AsyncSession = Depends(get_async_session)):
+    existing = (
+        await session.exec(
+            select(User).where(
+                (User.email == user_in.email) | (User.username == user_in.username)
+            )
         )
     ).first()
     if existing:
-        raise HTTPException(
-            status_code=400, detail="Email or username already taken"
-        )
+        raise _taken()
+    # End the read transaction so no pooled connection waits on bcrypt
+    await session.commit()
+    try:
+        password_hash = await passwords.pool.hash(user_in.password)
+    except PasswordPoolFull:
+        raise _busy()
     user = User(
         email=user_in.email,
         username=user_in.username,
         display_name=user_in.display_name,
-        password_hash=hash_password(user_in.password),
+        password_hash=password_hash,
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent registration took the name while we were hashing
+        await session.rollback()
+        raise _taken()
+    await session.refresh(user)
+    typeahead.index.add(user.id, user.username, user.display_name)
     return user
 
 
 @router.post("/login")
-def login(credentials: dict, session: Session = Depends(get_session)):
-    user = session.exec(
-        select(User).where(User.email == credentials["email"])
+async def login(credentials: dict, session: AsyncSession = Depends(get_async_session)):
+    user = (
+        await session.exec(select(User).where(User.email == credentials["email"]))
     ).first()
-    if not user or not verify_password(credentials["password"], user.password_hash):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await session.commit()  # release the connection during bcrypt, as in register
+    try:
+        if not await passwords.pool.verify(credentials["password"], user.password_hash):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+    except PasswordPoolFull:
+        raise _busy()
+    if needs_rehash(user.password_hash):
+        # The cost factor changed; upgrade while we have the plaintext. Under
+        # load, skip it: the sign-in already succeeded and a later one rehashes
+        try:
+            user.password_hash = await passwords.pool.hash(credentials["password"])
+        except PasswordPoolFull:
+            pass
+        else:
+            session.add(user)
+            await session.commit()
+            auth_cache.invalidate_user(user.id)
     token_data = {"sub": user.username, "user_id": user.id}
     return {
         "access_token": create_access_token(token_data),
@@ -53,12 +101,38 @@ def login(credentials: dict, session: Session = Depends(get_session)):
 
 
 @router.post("/refresh")
-def refresh(body: dict):
+async def refresh(body: dict, session: AsyncSession = Depends(get_async_session)):
     payload = decode_token(body["refresh_token"])
-    if not payload:
+    # Refresh tokens from before token types have none
+    if not payload or payload.get("type", "refresh") != "refresh" or revocations.is_revoked(payload):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    # A deleted account can't mint new access tokens
+    user = await session.get(User, payload["user_id"])
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     return {
-        "access_token": create_access_token(
-            {"sub": payload["sub"], "user_id": payload["user_id"]}
-        )
+        "access_token": create_access_token({"sub": user.username, "user_id": user.id})
     }
+
+
+@router.post("/logout", status_code=204)
+async def logout(
+    body: dict = Body(default={}),
+    everywhere: bool = Query(False),
+    payload: dict = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Revoke the presented access token and, if given, the refresh token.
+
+    With ``everywhere``, every token issued to the caller so far is revoked.
+    """
+    rows = [revoke_token(payload)]
+    if refresh_payload := decode_token(body.get("refresh_token", "")):
+        if refresh_payload.get("user_id") == payload["user_id"] and "jti" in refresh_payload:
+            rows.append(revoke_token(refresh_payload))
+    if everywhere:
+        rows.append(revoke_user(payload["user_id"]))
+    session.add_all(rows)
+    await session.commit()
+    revocations.remember(*rows)
+    return None
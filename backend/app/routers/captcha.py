@@ -1,41 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select
+from datetime import datetime, timedelta, timezone
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, or_, select, update
+
+from app.core.config import settings
 from app.core.database import get_session
-from app.core.deps import get_current_user
-from app.models.captcha import CaptchaChallenge, CaptchaReview
+from app.core.deps import Principal, get_current_user, get_principal
+from app.models.captcha import (
+    CaptchaChallenge,
+    CaptchaReview,
+    CaptchaReviewItem,
+    ConsumedCaptchaToken,
+)
 from app.models.user import User
+from app.services import replay
 from app.services.captcha import (
     generate_challenge,
     validate_challenge,
     create_captcha_token,
+    create_challenge_token,
+    verify_challenge_token,
 )
+from app.services.batching import commit_write_sync
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.serialization import columns, dump_rows, json_response
 
 router = APIRouter(prefix="/api/captcha", tags=["captcha"])
 
 
 # ---------------------------------------------------------------------------
-# Get a new challenge
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _insert_challenge(
+    session: Session,
+    user_id: int,
+    challenge_type: str,
+    challenge_data: str,
+    response_data: str,
+) -> int:
+    # Group-commit-able (see app.services.batching): flushes for the id only
+    challenge = CaptchaChallenge(
+        user_id=user_id,
+        challenge_type=challenge_type,
+        challenge_data=challenge_data,
+        response_data=response_data,
+        server_passed=False,
+        crowd_status="pending_review",
+    )
+    session.add(challenge)
+    session.flush()
+    return challenge.id
+
+
+def _spend_challenge(session: Session, jti: str, expires_at: float, *review) -> None:
+    # Group-commit-able: the jti's primary key makes answering a challenge
+    # atomic across workers; a drawing for review is stored in the same
+    # transaction, from _insert_challenge's arguments
+    session.add(ConsumedCaptchaToken(jti=jti, expires_at=expires_at))
+    session.flush()
+    if review:
+        _insert_challenge(session, *review)
+
+
+# ---------------------------------------------------------------------------
+# Get a new challenge (signed, not stored: most are never answered)
 # ---------------------------------------------------------------------------
 @router.get("/challenge")
-def get_challenge(
+async def get_challenge(
     type: str | None = Query(None),
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     result = generate_challenge(challenge_type=type)
-    challenge = CaptchaChallenge(
-        user_id=current_user.id,
-        challenge_type=result["challenge_type"],
-        challenge_data=result["challenge_data"],
-    )
-    session.add(challenge)
-    session.commit()
-    session.refresh(challenge)
     return {
-        "challenge_id": challenge.id,
-        "type": challenge.challenge_type,
-        "data": challenge.challenge_data,
+        "challenge_id": create_challenge_token(
+            current_user.id, result["challenge_type"], result["challenge_data"]
+        ),
+        "type": result["challenge_type"],
+        "data": result["challenge_data"],
     }
 
 
@@ -54,44 +99,103 @@ def submit_challenge(
     if challenge_id is None or response_data is None:
         raise HTTPException(status_code=400, detail="Missing challenge_id or response")
 
-    challenge = session.get(CaptchaChallenge, challenge_id)
-    if not challenge:
+    challenge = verify_challenge_token(challenge_id) if isinstance(challenge_id, str) else None
+    if not challenge or challenge.get("user_id") != current_user.id:
         raise HTTPException(status_code=404, detail="Challenge not found")
 
     result = validate_challenge(
-        challenge.challenge_type, challenge.challenge_data, response_data
+        challenge["challenge_type"], challenge["challenge_data"], response_data
     )
-
-    challenge.response_data = response_data
-    challenge.server_passed = result == "passed"
+    if result == "failed":
+        raise HTTPException(status_code=400, detail="failed")
+    # Failed answers may be retried, but a solved challenge must not mint
+    # tokens (or queue reviews) forever. The cache turns replays away
+    # without a query; the row catches those answered in another worker.
+    if not replay.cache.consume(challenge["jti"], challenge["exp"]):
+        raise HTTPException(status_code=400, detail="Challenge already answered")
+    review = ()
     if result == "pending_review":
-        challenge.crowd_status = "pending_review"
-    session.add(challenge)
-    session.commit()
+        # Only drawings the server can't judge are stored, for the review queue
+        review = (
+            current_user.id,
+            challenge["challenge_type"],
+            challenge["challenge_data"],
+            response_data,
+        )
+    try:
+        commit_write_sync(session, _spend_challenge, challenge["jti"], challenge["exp"], *review)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="Challenge already answered")
 
     if result == "passed":
         token = create_captcha_token(current_user.id)
         return {"status": "passed", "captcha_token": token}
-    elif result == "pending_review":
-        return {"status": "pending_review"}
-    else:
-        raise HTTPException(status_code=400, detail="failed")
+    return {"status": "pending_review"}
 
 
 # ---------------------------------------------------------------------------
 # Review queue
 # ---------------------------------------------------------------------------
-@router.get("/review-queue")
+@router.get("/review-queue", response_model=list[CaptchaReviewItem])
 def review_queue(
+    response: Response,
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    statement = select(CaptchaChallenge).where(
-        CaptchaChallenge.crowd_status == "pending_review",
-        CaptchaChallenge.user_id != current_user.id,
+    """Lease the oldest pending items the caller may still vote on.
+
+    Each item is held for the caller for settings.captcha_review_lease_seconds
+    so concurrent reviewers get different items; asking again (or paging
+    with the X-Next-Cursor header) returns the caller's own leases too.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    now = datetime.now(timezone.utc)
+    queued = aliased(CaptchaChallenge)
+    voted = select(CaptchaReview.id).where(
+        CaptchaReview.challenge_id == queued.id,
+        CaptchaReview.reviewer_id == current_user.id,
+    )
+    candidates = (
+        select(queued.id)
+        .where(
+            queued.crowd_status == "pending_review",
+            queued.user_id != current_user.id,
+            or_(
+                queued.lease_expires_at.is_(None),
+                queued.lease_expires_at < now,
+                queued.leased_by == current_user.id,
+            ),
+            ~voted.exists(),
+        )
+        .order_by(queued.created_at, queued.id)
+        .limit(limit)
     )
-    challenges = session.exec(statement).all()
-    return challenges
+    if after is not None:
+        candidates = candidates.where(tuple_(queued.created_at, queued.id) > tuple_(*after))
+    # One statement picks and leases the page, so two reviewers asking at
+    # once can't be handed the same items
+    statement = (
+        update(CaptchaChallenge)
+        .where(CaptchaChallenge.id.in_(candidates.scalar_subquery()))
+        .values(
+            leased_by=current_user.id,
+            lease_expires_at=now + timedelta(seconds=settings.captcha_review_lease_seconds),
+        )
+        .returning(*columns(CaptchaChallenge, CaptchaReviewItem))
+        .execution_options(synchronize_session=False)
+    )
+    # RETURNING comes back in no particular order
+    items = sorted(session.exec(statement).all(), key=lambda row: (row.created_at, row.id))
+    session.commit()
+    if len(items) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1].created_at, items[-1].id)
+    return json_response(dump_rows(CaptchaReviewItem, items), response)
 
 
 # ---------------------------------------------------------------------------
@@ -118,6 +222,10 @@ def review_challenge(
         approved=approved,
     )
     session.add(review)
+    if challenge.leased_by == current_user.id:
+        # Voted: free the item for the next reviewer now, not at lease expiry
+        challenge.leased_by = challenge.lease_expires_at = None
+        session.add(challenge)
     session.commit()
 
     # Count total reviews for this challenge
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import get_session
+from app.core.deps import get_current_user
+from app.models.follow import Follow
+from app.models.post import Post
+from app.models.user import User
+from app.services.live import PostEvent, stream_events
+
+router = APIRouter(prefix="/api", tags=["live"])
+
+# Tell nginx-style proxies not to buffer the stream
+_STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _event_stream(accepts) -> StreamingResponse:
+    return StreamingResponse(
+        stream_events(accepts, settings.live_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers=_STREAM_HEADERS,
+    )
+
+
+def _home_authors(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> set[int]:
+    """Ids whose posts belong on the caller's home feed, as of connect time.
+
+    Like /feed, that is the authors the caller follows, not the caller.
+    """
+    authors = set(
+        session.exec(
+            select(Follow.following_id).where(Follow.follower_id == current_user.id)
+        ).all()
+    )
+    # Release the connection now; the stream itself never touches the database
+    session.close()
+    return authors
+
+
+def _existing_post(post_id: int, session: Session = Depends(get_session)) -> int:
+    exists = session.exec(select(Post.id).where(Post.id == post_id)).first()
+    session.close()
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post_id
+
+
+# ---------------------------------------------------------------------------
+# Live global feed (top-level posts and reposts, like /feed/global)
+# ---------------------------------------------------------------------------
+@router.get("/feed/global/stream")
+async def global_feed_stream():
+    return _event_stream(lambda event: event.parent_id is None)
+
+
+# ---------------------------------------------------------------------------
+# Live home feed (top-level posts from followed users, like /feed)
+# ---------------------------------------------------------------------------
+@router.get("/feed/stream")
+async def home_feed_stream(authors: set[int] = Depends(_home_authors)):
+    def accepts(event: PostEvent) -> bool:
+        return event.parent_id is None and event.user_id in authors
+
+    return _event_stream(accepts)
+
+
+# ---------------------------------------------------------------------------
+# Live replies to one post
+# ---------------------------------------------------------------------------
+@router.get("/posts/{post_id}/replies/stream")
+async def replies_stream(post_id: int = Depends(_existing_post)):
+    return _event_stream(lambda event: event.parent_id == post_id)
@@ -1,26 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select, func
+from datetime import datetime
 
-from app.core.database import get_session
-from app.core.deps import get_current_user
-from app.models.post import Post, PostCreate, PostRead
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import get_async_session
+from app.core.config import settings
+from app.core.deps import Principal, get_current_user, get_optional_user, get_principal, split_query_list
+from app.models.captcha import ConsumedCaptchaToken
+from app.models.post import Post, PostCreate, PostExpanded, PostRead, Thread
 from app.models.like import Like
-from app.models.follow import Follow
 from app.models.user import User
+from app.services import replay, trending
+from app.services.batching import commit_write
+from app.services.captcha import verify_captcha_token
+from app.services.live import hub
+from app.services.counters import bump, bump_user
+from app.services.etags import ENGAGEMENT, POSTS, PROFILES, not_modified, post_key, user_key, versions
+from app.services.hydration import hydrate_posts
+from app.services.pagination import encode_cursor, decode_cursor, paginate
+from app.services.serialization import (
+    columns,
+    dump_models,
+    dump_models_by_id,
+    dump_objects,
+    dump_rows,
+    dump_rows_by_id,
+    json_response,
+)
+from app.services.threads import load_thread
+from app.services.timeline import fan_out_post, prune_post, read_home_timeline
 
 router = APIRouter(prefix="/api", tags=["posts"])
 
 
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _set_next_cursor(response: Response, posts: list, limit: int) -> None:
+    if len(posts) == limit:
+        last = posts[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+
+# Group-commit-able writes (see app.services.batching): they run in the
+# caller's transaction and never commit themselves
+def _insert_like(session: Session, user_id: int, post_id: int) -> None:
+    session.add(Like(user_id=user_id, post_id=post_id))
+    bump(session, post_id, "like_count")
+
+
+def _delete_like(session: Session, user_id: int, post_id: int) -> bool:
+    deleted = session.exec(
+        delete(Like).where(Like.user_id == user_id, Like.post_id == post_id)
+    ).rowcount
+    if deleted:
+        bump(session, post_id, "like_count", -1)
+    return bool(deleted)
+
+
+async def _spend_captcha(session: AsyncSession, token: str | None, user_id: int) -> None:
+    """Consume a single-use captcha token as part of the caller's transaction."""
+    if not settings.captcha_required:
+        return
+    payload = verify_captcha_token(token) if token else None
+    if (
+        not payload
+        or payload.get("user_id") != user_id
+        or "jti" not in payload
+        or not replay.cache.consume(payload["jti"], payload["exp"])
+    ):
+        raise HTTPException(status_code=403, detail="Invalid or used captcha token")
+    session.add(ConsumedCaptchaToken(jti=payload["jti"], expires_at=payload["exp"]))
+    try:
+        # Claim the jti now: another worker may have spent it since our last load
+        await session.flush()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=403, detail="Invalid or used captcha token")
+
+
 # ---------------------------------------------------------------------------
 # Create post
 # ---------------------------------------------------------------------------
 @router.post("/posts", response_model=PostRead, status_code=201)
-def create_post(
+async def create_post(
     post_in: PostCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    # captcha_token validation skipped for now
+    await _spend_captcha(session, post_in.captcha_token, current_user.id)
     post = Post(
         user_id=current_user.id,
         content=post_in.content,
@@ -28,84 +108,203 @@ def create_post(
         media_type=post_in.media_type,
     )
     session.add(post)
-    session.commit()
-    session.refresh(post)
+    await session.flush()
+    await session.run_sync(fan_out_post, post)
+    await session.run_sync(bump_user, current_user.id, "post_count")
+    await session.commit()
+    versions.bump(POSTS, user_key(current_user.username))
+    await session.refresh(post)
+    hub.publish(post)
     return post
 
 
 # ---------------------------------------------------------------------------
 # Global feed (excludes replies)
 # ---------------------------------------------------------------------------
-@router.get("/feed/global", response_model=list[PostRead])
-def global_feed(
+@router.get("/feed/global", response_model=list[PostExpanded] | list[PostRead])
+async def global_feed(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    session: Session = Depends(get_session),
+    expand: bool = Query(False),
+    session: AsyncSession = Depends(get_async_session),
+    viewer: User | None = Depends(get_optional_user),
 ):
-    statement = (
-        select(Post)
-        .where(Post.parent_id == None)  # noqa: E711
-        .order_by(Post.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+    if expand:
+        etag = versions.etag(POSTS, ENGAGEMENT, PROFILES, vary=viewer.id if viewer else 0)
+    else:
+        etag = versions.etag(POSTS)
+    if cached := not_modified(request, response, etag):
+        return cached
+    # Plain pages select just the PostRead columns and encode the tuples
+    # directly; expanded pages need the ORM objects for hydration
+    query = select(Post) if expand else select(*columns(Post, PostRead))
+    statement = paginate(
+        query.where(Post.parent_id == None),  # noqa: E711
+        Post.created_at,
+        Post.id,
+        limit,
+        offset=offset,
+        before=_decode_cursor(cursor),
     )
-    posts = session.exec(statement).all()
-    return posts
+    posts = (await session.exec(statement)).all()
+    _set_next_cursor(response, posts, limit)
+    if expand:
+        expanded = await session.run_sync(hydrate_posts, posts, viewer.id if viewer else None)
+        return json_response(dump_models(PostExpanded, expanded), response)
+    return json_response(dump_rows(PostRead, posts), response)
 
 
 # ---------------------------------------------------------------------------
 # Home feed (posts from followed users)
 # ---------------------------------------------------------------------------
-@router.get("/feed", response_model=list[PostRead])
-def home_feed(
+@router.get("/feed", response_model=list[PostExpanded] | list[PostRead])
+async def home_feed(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    expand: bool = Query(False),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_principal),
 ):
-    statement = (
-        select(Post)
-        .join(Follow, Follow.following_id == Post.user_id)
-        .where(Follow.follower_id == current_user.id)
-        .where(Post.parent_id == None)  # noqa: E711
-        .order_by(Post.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+    # Following changes bump the user's own key, so it covers the feed's sources
+    keys = (POSTS, user_key(current_user.username))
+    if expand:
+        keys += (ENGAGEMENT, PROFILES)
+    etag = versions.etag(*keys, vary=current_user.id)
+    if cached := not_modified(request, response, etag):
+        return cached
+    posts = await session.run_sync(
+        read_home_timeline,
+        current_user.id,
+        limit,
+        offset=offset,
+        before=_decode_cursor(cursor),
     )
-    posts = session.exec(statement).all()
+    _set_next_cursor(response, posts, limit)
+    if expand:
+        expanded = await session.run_sync(hydrate_posts, posts, current_user.id)
+        return json_response(dump_models(PostExpanded, expanded), response)
+    return json_response(dump_objects(PostRead, posts), response)
+
+
+# ---------------------------------------------------------------------------
+# Trending posts (time-decayed engagement, served from memory)
+# ---------------------------------------------------------------------------
+@router.get("/trending", response_model=list[PostExpanded] | list[PostRead])
+async def trending_posts(
+    limit: int = Query(10, ge=1, le=50),
+    expand: bool = Query(False),
+    session: AsyncSession = Depends(get_async_session),
+    viewer: User | None = Depends(get_optional_user),
+):
+    ids = [post_id for post_id, _ in trending.index.top(limit)]
+    if not ids:
+        return []
+    found = {p.id: p for p in (await session.exec(select(Post).where(Post.id.in_(ids)))).all()}
+    posts = [found[post_id] for post_id in ids if post_id in found]
+    if expand:
+        return await session.run_sync(hydrate_posts, posts, viewer.id if viewer else None)
     return posts
 
 
+# ---------------------------------------------------------------------------
+# Get many posts by id (one IN query, keyed by id; unknown ids are omitted)
+# ---------------------------------------------------------------------------
+@router.get("/posts", response_model=dict[int, PostExpanded] | dict[int, PostRead])
+async def get_posts(
+    ids: str = Query(..., description="Comma-separated post ids"),
+    expand: bool = Query(False),
+    session: AsyncSession = Depends(get_async_session),
+    viewer: User | None = Depends(get_optional_user),
+):
+    post_ids = split_query_list(ids, settings.batch_max_ids, int)
+    if not post_ids:
+        return {}
+    if expand:
+        posts = (await session.exec(select(Post).where(Post.id.in_(post_ids)))).all()
+        expanded = await session.run_sync(hydrate_posts, posts, viewer.id if viewer else None)
+        return json_response(dump_models_by_id(PostExpanded, expanded))
+    rows = await session.exec(select(*columns(Post, PostRead)).where(Post.id.in_(post_ids)))
+    return json_response(dump_rows_by_id(PostRead, rows))
+
+
 # ---------------------------------------------------------------------------
 # Get single post
 # ---------------------------------------------------------------------------
-@router.get("/posts/{post_id}", response_model=PostRead)
-def get_post(
+@router.get("/posts/{post_id}", response_model=PostExpanded | PostRead)
+async def get_post(
+    request: Request,
+    response: Response,
     post_id: int,
-    session: Session = Depends(get_session),
+    expand: bool = Query(False),
+    session: AsyncSession = Depends(get_async_session),
+    viewer: User | None = Depends(get_optional_user),
 ):
-    post = session.get(Post, post_id)
+    if expand:
+        etag = versions.etag(
+            post_key(post_id), ENGAGEMENT, PROFILES, vary=viewer.id if viewer else 0
+        )
+    else:
+        etag = versions.etag(post_key(post_id))
+    if cached := not_modified(request, response, etag):
+        return cached
+    post = await session.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    if expand:
+        return (await session.run_sync(hydrate_posts, [post], viewer.id if viewer else None))[0]
     return post
 
 
+# ---------------------------------------------------------------------------
+# Reply thread (ancestors + bounded descendant tree)
+# ---------------------------------------------------------------------------
+@router.get("/posts/{post_id}/thread", response_model=Thread)
+async def get_thread(
+    post_id: int,
+    depth: int = Query(3, ge=1, le=10),
+    limit: int = Query(20, ge=1, le=100),
+    branch_limit: int = Query(5, ge=1, le=20),
+    cursor: str | None = Query(None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    thread = await session.run_sync(
+        load_thread, post_id, depth, limit, branch_limit, after=_decode_cursor(cursor)
+    )
+    if thread is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return thread
+
+
 # ---------------------------------------------------------------------------
 # Delete own post
 # ---------------------------------------------------------------------------
 @router.delete("/posts/{post_id}", status_code=204)
-def delete_post(
+async def delete_post(
     post_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    post = session.get(Post, post_id)
+    post = await session.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed to delete this post")
-    session.delete(post)
-    session.commit()
+    await session.run_sync(prune_post, post_id)
+    if post.parent_id is not None:
+        await session.run_sync(bump, post.parent_id, "reply_count", -1)
+    if post.repost_of_id is not None:
+        await session.run_sync(bump, post.repost_of_id, "repost_count", -1)
+    await session.run_sync(bump_user, current_user.id, "post_count", -1)
+    await session.delete(post)
+    await session.commit()
+    versions.bump(POSTS, ENGAGEMENT, post_key(post_id), user_key(current_user.username))
+    trending.index.remove(post_id)
     return None
 
 
@@ -113,26 +312,30 @@ def delete_post(
 # Like a post
 # ---------------------------------------------------------------------------
 @router.post("/posts/{post_id}/like", status_code=201)
-def like_post(
+async def like_post(
     post_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_principal),
 ):
-    post = session.get(Post, post_id)
+    post = await session.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    existing = session.exec(
-        select(Like).where(
-            Like.user_id == current_user.id, Like.post_id == post_id
+    existing = (
+        await session.exec(
+            select(Like).where(Like.user_id == current_user.id, Like.post_id == post_id)
         )
     ).first()
     if existing:
         raise HTTPException(status_code=400, detail="Already liked")
 
-    like = Like(user_id=current_user.id, post_id=post_id)
-    session.add(like)
-    session.commit()
+    try:
+        await commit_write(session, _insert_like, current_user.id, post_id)
+    except IntegrityError:
+        # A concurrent request liked it first
+        raise HTTPException(status_code=400, detail="Already liked")
+    versions.bump(ENGAGEMENT)
+    trending.index.record(post_id, trending.LIKE_WEIGHT)
     return {"detail": "Liked"}
 
 
@@ -140,20 +343,15 @@ def like_post(
 # Unlike a post
 # ---------------------------------------------------------------------------
 @router.delete("/posts/{post_id}/like", status_code=204)
-def unlike_post(
+async def unlike_post(
     post_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_principal),
 ):
-    like = session.exec(
-        select(Like).where(
-            Like.user_id == current_user.id, Like.post_id == post_id
-        )
-    ).first()
-    if not like:
+    if not await commit_write(session, _delete_like, current_user.id, post_id):
         raise HTTPException(status_code=404, detail="Like not found")
-    session.delete(like)
-    session.commit()
+    versions.bump(ENGAGEMENT)
+    trending.index.record(post_id, -trending.LIKE_WEIGHT)
     return None
 
 
@@ -161,15 +359,16 @@ def unlike_post(
 # Reply to a post
 # ---------------------------------------------------------------------------
 @router.post("/posts/{post_id}/reply", response_model=PostRead, status_code=201)
-def reply_to_post(
+async def reply_to_post(
     post_id: int,
     reply_in: PostCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    parent = session.get(Post, post_id)
+    parent = await session.get(Post, post_id)
     if not parent:
         raise HTTPException(status_code=404, detail="Post not found")
+    await _spend_captcha(session, reply_in.captcha_token, current_user.id)
 
     reply = Post(
         user_id=current_user.id,
@@ -179,8 +378,13 @@ def reply_to_post(
         parent_id=post_id,
     )
     session.add(reply)
-    session.commit()
-    session.refresh(reply)
+    await session.run_sync(bump, post_id, "reply_count")
+    await session.run_sync(bump_user, current_user.id, "post_count")
+    await session.commit()
+    versions.bump(ENGAGEMENT, user_key(current_user.username))
+    trending.index.record(post_id, trending.REPLY_WEIGHT)
+    await session.refresh(reply)
+    hub.publish(reply)
     return reply
 
 
@@ -195,21 +399,29 @@ class RepostBody(PostCreate):
 
 
 @router.post("/posts/{post_id}/repost", response_model=PostRead, status_code=201)
-def repost(
+async def repost(
     post_id: int,
     body: RepostBody = RepostBody(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    original = session.get(Post, post_id)
+    original = await session.get(Post, post_id)
     if not original:
         raise HTTPException(status_code=404, detail="Post not found")
+    await _spend_captcha(session, body.captcha_token, current_user.id)
 
     repost_post = Post(
         user_id=current_user.id,
         repost_of_id=post_id,
     )
     session.add(repost_post)
-    session.commit()
-    session.refresh(repost_post)
+    await session.flush()
+    await session.run_sync(fan_out_post, repost_post)
+    await session.run_sync(bump, post_id, "repost_count")
+    await session.run_sync(bump_user, current_user.id, "post_count")
+    await session.commit()
+    versions.bump(POSTS, ENGAGEMENT, user_key(current_user.username))
+    trending.index.record(post_id, trending.REPOST_WEIGHT)
+    await session.refresh(repost_post)
+    hub.publish(repost_post)
     return repost_post
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session, SQLModel
+
+from app.core.database import get_session
+from app.models.post import PostRead
+from app.services.pagination import decode_score_cursor, encode_score_cursor
+from app.services.search import search_posts
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+class PostSearchResult(SQLModel):
+    post: PostRead
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+
+
+# ---------------------------------------------------------------------------
+# Full-text post search (FTS5, BM25 ranked)
+# ---------------------------------------------------------------------------
+@router.get("/posts", response_model=list[PostSearchResult])
+def search_posts_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_score_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    results = search_posts(session, q, limit, after)
+    if len(results) == limit:
+        last_post, last_score, _ = results[-1]
+        response.headers["X-Next-Cursor"] = encode_score_cursor(last_score, last_post.id)
+    return [PostSearchResult(post=post, snippet=snippet) for post, _, snippet in results]
@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select, func
+from datetime import datetime
 
-from app.core.database import get_session
-from app.core.deps import get_current_user
-from app.models.user import User, UserRead, UserUpdate
-from app.models.post import Post
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import get_async_session, new_session
+from app.core.config import settings
+from app.core.deps import Principal, get_current_user, get_principal, split_query_list
+from app.models.user import User, UserRead, UserSummary, UserUpdate
 from app.models.follow import Follow
+from app.services import suggestions, typeahead
+from app.services.auth_cache import auth_cache
+from app.services.batching import commit_write
+from app.services.counters import bump_user
+from app.services.etags import PROFILES, not_modified, user_key, versions
+from app.services.serialization import (
+    columns,
+    dump_object,
+    dump_rows,
+    dump_rows_by_id,
+    json_response,
+)
+from app.services.timeline import backfill_follow, promote_celebrities, prune_follow
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -14,92 +31,202 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 # Helpers
 # ---------------------------------------------------------------------------
 
-class UserProfile(UserRead):
+class UserProfile(UserSummary):
+    """A user's public profile; unlike UserRead, it leaves out the email."""
+    bio: str | None
+    created_at: datetime
     follower_count: int = 0
     following_count: int = 0
     post_count: int = 0
 
 
-def _get_user_by_username(username: str, session: Session) -> User:
-    user = session.exec(select(User).where(User.username == username)).first()
+class UserSuggestion(UserSummary):
+    mutual_count: int
+
+
+async def _get_user_by_username(username: str, session: AsyncSession) -> User:
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-def _build_profile(user: User, session: Session) -> UserProfile:
-    follower_count = session.exec(
-        select(func.count()).select_from(Follow).where(Follow.following_id == user.id)
-    ).one()
-    following_count = session.exec(
-        select(func.count()).select_from(Follow).where(Follow.follower_id == user.id)
-    ).one()
-    post_count = session.exec(
-        select(func.count()).select_from(Post).where(Post.user_id == user.id)
-    ).one()
-    return UserProfile(
-        **UserRead.model_validate(user).model_dump(),
-        follower_count=follower_count,
-        following_count=following_count,
-        post_count=post_count,
-    )
+def _insert_follow(session: Session, follower_id: int, following_id: int) -> None:
+    # Group-commit-able (see app.services.batching): never commits itself
+    session.add(Follow(follower_id=follower_id, following_id=following_id))
+    bump_user(session, following_id, "follower_count")
+    bump_user(session, follower_id, "following_count")
+    promote_celebrities(session, following_id)
+
+
+def _backfill_follow(follower_id: int, follower_username: str, author_id: int) -> None:
+    # Background task: runs after the request's session is gone, so it
+    # opens its own
+    with new_session() as session:
+        backfill_follow(session, follower_id, author_id)
+    # The follower may have fetched /feed mid-backfill; don't let that
+    # partial page keep answering 304
+    versions.bump(user_key(follower_username))
 
 
 # ---------------------------------------------------------------------------
 # Update own profile  (must be declared before /{username} to avoid clash)
 # ---------------------------------------------------------------------------
 @router.put("/me", response_model=UserRead)
-def update_me(
+async def update_me(
     user_update: UserUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
+    # current_user may be the shared cached instance; edit a fresh copy
+    user = await session.get(User, current_user.id)
     update_data = user_update.model_dump(exclude_unset=True)
+    old_names = (user.username, user.display_name)
     for key, value in update_data.items():
-        setattr(current_user, key, value)
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
-    return current_user
+        setattr(user, key, value)
+    session.add(user)
+    await session.commit()
+    auth_cache.invalidate_user(user.id)
+    versions.bump(PROFILES, user_key(user.username))
+    await session.refresh(user)
+    if (user.username, user.display_name) != old_names:
+        typeahead.index.remove(user.id, *old_names)
+        typeahead.index.add(user.id, user.username, user.display_name, user.follower_count)
+    return user
+
+
+# ---------------------------------------------------------------------------
+# Typeahead (prefix match on username / display name, most followed first)
+# ---------------------------------------------------------------------------
+@router.get("/search", response_model=list[UserSummary])
+async def search_users(
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=typeahead.MAX_RESULTS),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if typeahead.index.built:
+        user_ids = typeahead.index.search(prefix, limit)
+    else:
+        user_ids = await session.run_sync(typeahead.search_users_fts, prefix, limit)
+    if not user_ids:
+        return []
+    users = {
+        user.id: user
+        for user in (await session.exec(select(User).where(User.id.in_(user_ids)))).all()
+    }
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+
+# ---------------------------------------------------------------------------
+# Get many profiles by id and/or username (one IN query, keyed by id)
+# ---------------------------------------------------------------------------
+@router.get("", response_model=dict[int, UserProfile])
+async def get_users(
+    ids: str | None = Query(None, description="Comma-separated user ids"),
+    usernames: str | None = Query(None, description="Comma-separated usernames"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    user_ids = split_query_list(ids, settings.batch_max_ids, int)
+    names = split_query_list(usernames, settings.batch_max_ids)
+    if not user_ids and not names:
+        return {}
+    # The limit covers both lists together; checked here so the message
+    # names the real limit rather than what was left after ``ids``
+    if len(user_ids) + len(names) > settings.batch_max_ids:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.batch_max_ids} items per request"
+        )
+    rows = await session.exec(
+        select(*columns(User, UserProfile)).where(
+            or_(User.id.in_(user_ids), User.username.in_(names))
+        )
+    )
+    return json_response(dump_rows_by_id(UserProfile, rows))
+
+
+# ---------------------------------------------------------------------------
+# Who to follow (friends of friends, from the in-memory follow graph)
+# ---------------------------------------------------------------------------
+@router.get("/suggestions", response_model=list[UserSuggestion])
+async def who_to_follow(
+    limit: int = Query(10, ge=1, le=50),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    if not suggestions.graph.built:
+        await session.run_sync(suggestions.graph.build)
+    ranked = suggestions.graph.suggest(current_user.id, limit)
+    if not ranked:
+        return []
+    users = {
+        user.id: user
+        for user in (
+            await session.exec(
+                select(User).where(User.id.in_([user_id for user_id, _ in ranked]))
+            )
+        ).all()
+    }
+    return [
+        UserSuggestion(**UserSummary.model_validate(users[user_id]).model_dump(), mutual_count=count)
+        for user_id, count in ranked
+        if user_id in users
+    ]
 
 
 # ---------------------------------------------------------------------------
 # Get user profile
 # ---------------------------------------------------------------------------
 @router.get("/{username}", response_model=UserProfile)
-def get_user_profile(
+async def get_user_profile(
+    request: Request,
+    response: Response,
     username: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    user = _get_user_by_username(username, session)
-    return _build_profile(user, session)
+    etag = versions.etag(user_key(username), PROFILES)
+    if cached := not_modified(request, response, etag):
+        return cached
+    user = await _get_user_by_username(username, session)
+    # Counts are denormalized onto User, so the profile is the row itself
+    return json_response(dump_object(UserProfile, user), response)
 
 
 # ---------------------------------------------------------------------------
 # Follow a user
 # ---------------------------------------------------------------------------
 @router.post("/{username}/follow", status_code=201)
-def follow_user(
+async def follow_user(
     username: str,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_principal),
 ):
-    target = _get_user_by_username(username, session)
+    target = await _get_user_by_username(username, session)
     if target.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot follow yourself")
 
-    existing = session.exec(
-        select(Follow).where(
-            Follow.follower_id == current_user.id,
-            Follow.following_id == target.id,
+    existing = (
+        await session.exec(
+            select(Follow).where(
+                Follow.follower_id == current_user.id,
+                Follow.following_id == target.id,
+            )
         )
     ).first()
     if existing:
         raise HTTPException(status_code=400, detail="Already following")
 
-    follow = Follow(follower_id=current_user.id, following_id=target.id)
-    session.add(follow)
-    session.commit()
+    try:
+        await commit_write(session, _insert_follow, current_user.id, target.id)
+    except IntegrityError:
+        # A concurrent request followed first
+        raise HTTPException(status_code=400, detail="Already following")
+    versions.bump(user_key(target.username), user_key(current_user.username))
+    suggestions.graph.add_edge(current_user.id, target.id)
+    # Copying the author's posts commits in batches; do it after responding
+    background_tasks.add_task(
+        _backfill_follow, current_user.id, current_user.username, target.id
+    )
     return {"detail": "Followed"}
 
 
@@ -107,24 +234,31 @@ def follow_user(
 # Unfollow a user
 # ---------------------------------------------------------------------------
 @router.delete("/{username}/follow", status_code=204)
-def unfollow_user(
+async def unfollow_user(
     username: str,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_principal),
 ):
-    target = _get_user_by_username(username, session)
+    target = await _get_user_by_username(username, session)
 
-    follow = session.exec(
-        select(Follow).where(
-            Follow.follower_id == current_user.id,
-            Follow.following_id == target.id,
+    follow = (
+        await session.exec(
+            select(Follow).where(
+                Follow.follower_id == current_user.id,
+                Follow.following_id == target.id,
+            )
         )
     ).first()
     if not follow:
         raise HTTPException(status_code=404, detail="Not following this user")
 
-    session.delete(follow)
-    session.commit()
+    await session.delete(follow)
+    await session.run_sync(prune_follow, current_user.id, target.id)
+    await session.run_sync(bump_user, target.id, "follower_count", -1)
+    await session.run_sync(bump_user, current_user.id, "following_count", -1)
+    await session.commit()
+    versions.bump(user_key(target.username), user_key(current_user.username))
+    suggestions.graph.remove_edge(current_user.id, target.id)
     return None
 
 
@@ -132,41 +266,39 @@ def unfollow_user(
 # List followers
 # ---------------------------------------------------------------------------
 @router.get("/{username}/followers", response_model=list[UserRead])
-def list_followers(
+async def list_followers(
     username: str,
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    target = _get_user_by_username(username, session)
+    target = await _get_user_by_username(username, session)
     statement = (
-        select(User)
+        select(*columns(User, UserRead))
         .join(Follow, Follow.follower_id == User.id)
         .where(Follow.following_id == target.id)
         .offset(offset)
         .limit(limit)
     )
-    users = session.exec(statement).all()
-    return users
+    return json_response(dump_rows(UserRead, await session.exec(statement)))
 
 
 # ---------------------------------------------------------------------------
 # List following
 # ---------------------------------------------------------------------------
 @router.get("/{username}/following", response_model=list[UserRead])
-def list_following(
+async def list_following(
     username: str,
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    target = _get_user_by_username(username, session)
+    target = await _get_user_by_username(username, session)
     statement = (
-        select(User)
+        select(*columns(User, UserRead))
         .join(Follow, Follow.following_id == User.id)
         .where(Follow.follower_id == target.id)
         .offset(offset)
         .limit(limit)
     )
-    users = session.exec(statement).all()
-    return users
+    return json_response(dump_rows(UserRead, await session.exec(statement)))
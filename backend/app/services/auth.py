@@ -4,6 +4,7 @@ from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
+    needs_rehash,
 )
 
 __all__ = [
@@ -12,4 +13,5 @@ __all__ = [
     "create_access_token",
     "create_refresh_token",
     "decode_token",
+    "needs_rehash",
 ]
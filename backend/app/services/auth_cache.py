@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.models.user import User
+
+
+class ExpiringLRU:
+    """A bounded LRU map whose entries each expire at their own time.
+
+    Expiry is wall-clock (``time.time()``) so token ``exp`` claims can be
+    used directly.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class AuthCache:
+    """Decoded access tokens and the users they resolve to, for get_current_user.
+
+    Token payloads are kept until their ``exp``. User rows are kept for
+    settings.auth_user_cache_ttl_seconds as detached, read-only instances
+    shared between requests: handlers that modify the caller must load their
+    own copy and call invalidate_user afterwards. Counters on a cached user
+    (follower_count etc.) may lag by up to the TTL, and invalidation is per
+    process, so other workers see profile edits when their entry expires.
+    """
+
+    def __init__(self, token_cache_size: int, user_cache_size: int):
+        self.tokens = ExpiringLRU(token_cache_size)
+        self.users = ExpiringLRU(user_cache_size)
+
+    def payload(self, token: str) -> dict | None:
+        """The verified claims of ``token``, or None if it is invalid."""
+        payload = self.tokens.get(token)
+        if payload is None:
+            payload = decode_token(token)
+            # Only valid tokens are cached: garbage must not evict real entries
+            if payload and "exp" in payload:
+                self.tokens.set(token, payload, payload["exp"])
+        return payload
+
+    def user(self, user_id: int) -> User | None:
+        return self.users.get(user_id)
+
+    def remember_user(self, user: User) -> None:
+        """Cache ``user``, which must already be detached from its session."""
+        self.users.set(user.id, user, time.time() + settings.auth_user_cache_ttl_seconds)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop a user after a profile change or account deletion."""
+        self.users.pop(user_id)
+
+    def stats(self) -> dict:
+        return {"tokens": self.tokens.stats(), "users": self.users.stats()}
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.clear()
+
+
+auth_cache = AuthCache(settings.auth_token_cache_size, settings.auth_user_cache_size)
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+# A write operation: called as ``fn(session, *args)`` inside the batch's
+# transaction. It must not commit, may be replayed after a rollback (so no
+# side effects outside the session), and should return plain values rather
+# than ORM objects; its return value resolves the caller.
+WriteOp = Callable[..., Any]
+
+
+@dataclass
+class _Pending:
+    fn: WriteOp
+    args: tuple
+    future: Future = field(default_factory=Future)
+
+
+class WriteBatcher:
+    """Group commit for small, frequent writes.
+
+    Callers enqueue operations; one background thread collects them until
+    ``max_ops`` are waiting or ``max_delay_seconds`` has passed since the
+    first, then runs the whole batch in a single transaction on the writer
+    connection. If an operation fails, the batch is replayed with each
+    operation in its own SAVEPOINT, so a constraint violation rolls back
+    (and is raised to) only the caller that caused it while the rest of the
+    batch still commits.
+    """
+
+    def __init__(self, bind, max_ops: int, max_delay_seconds: float):
+        self.bind = bind
+        self.max_ops = max_ops
+        self.max_delay_seconds = max_delay_seconds
+        self._queue: queue.SimpleQueue[_Pending | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.batches = 0
+        self.ops = 0
+        self.failed_ops = 0
+        self.largest_batch = 0
+
+    def submit(self, fn: WriteOp, *args) -> Future:
+        """Queue ``fn(session, *args)``; the Future resolves after commit."""
+        self._ensure_started()
+        pending = _Pending(fn, args)
+        self._queue.put(pending)
+        return pending.future
+
+    async def run(self, fn: WriteOp, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="write-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self, first: _Pending) -> tuple[list[_Pending], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay_seconds
+        while len(batch) < self.max_ops:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            try:
+                self._commit(batch)
+            except Exception as exc:  # keep the writer alive for the next batch
+                logger.exception("Write batch failed")
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+            if stopping:
+                return
+
+    def _apply(self, batch: list[_Pending], isolate: bool) -> list[tuple]:
+        outcomes: list[tuple[_Pending, Any, BaseException | None]] = []
+        with Session(self.bind) as session:
+            # pysqlite only issues BEGIN before DML, and a SAVEPOINT outside
+            # a transaction would commit on RELEASE; begin explicitly so the
+            # whole batch shares one transaction (and takes the lock once)
+            session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for pending in batch:
+                # Flush each op's objects before expunging them below, and
+                # inside its savepoint so a constraint error fails that op
+                if not isolate:
+                    result = pending.fn(session, *pending.args)
+                    session.flush()
+                    outcomes.append((pending, result, None))
+                else:
+                    try:
+                        with session.begin_nested():
+                            result = pending.fn(session, *pending.args)
+                            session.flush()
+                    except Exception as exc:
+                        outcomes.append((pending, None, exc))
+                    else:
+                        outcomes.append((pending, result, None))
+                # ORM-enabled UPDATEs scan the identity map to sync it;
+                # don't let every op pay for the objects of those before it
+                session.expunge_all()
+            session.commit()
+        return outcomes
+
+    def _commit(self, batch: list[_Pending]) -> None:
+        # Savepoints cost two extra statements per op, so first try the
+        # batch without them; if any op fails, roll everything back and
+        # replay it with one savepoint per op to pin the error on its caller
+        try:
+            outcomes = self._apply(batch, isolate=False)
+        except Exception:
+            outcomes = self._apply(batch, isolate=True)
+
+        failed = 0
+        for pending, result, error in outcomes:
+            if error is None:
+                pending.future.set_result(result)
+            else:
+                failed += 1
+                pending.future.set_exception(error)
+        with self._lock:
+            self.batches += 1
+            self.ops += len(batch)
+            self.failed_ops += failed
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.write_batching,
+            "batches": self.batches,
+            "ops": self.ops,
+            "failed_ops": self.failed_ops,
+            "mean_batch_size": self.ops / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+    def close(self) -> None:
+        """Commit whatever is queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def clear(self) -> None:
+        self.close()
+        self.batches = self.ops = self.failed_ops = self.largest_batch = 0
+
+
+batcher = WriteBatcher(
+    engine, settings.write_batch_max_ops, settings.write_batch_max_delay_ms / 1000
+)
+
+
+async def commit_write(session: AsyncSession, fn: WriteOp, *args):
+    """Run ``fn(sync_session, *args)`` and commit it.
+
+    With ``settings.write_batching`` on, the write goes through the group
+    committer; otherwise it runs and commits in the request's own session.
+    """
+    if settings.write_batching:
+        return await batcher.run(fn, *args)
+    result = await session.run_sync(fn, *args)
+    await session.commit()
+    return result
+
+
+def commit_write_sync(session: Session, fn: WriteOp, *args):
+    """commit_write for sync handlers; blocks the worker thread, not a loop."""
+    if settings.write_batching:
+        return batcher.submit(fn, *args).result()
+    result = fn(session, *args)
+    session.commit()
+    return result
@@ -109,3 +109,26 @@ def verify_captcha_token(token: str) -> dict | None:
     if payload.get("type") != "captcha":
         return None
     return payload
+
+
+def create_challenge_token(user_id: int, challenge_type: str, challenge_data: str) -> str:
+    """Sign a challenge for ``user_id`` so it needs no row until answered."""
+    return create_access_token(
+        data={
+            "type": "challenge",
+            "user_id": user_id,
+            "challenge_type": challenge_type,
+            "challenge_data": challenge_data,
+        },
+        expires_minutes=settings.captcha_challenge_expire_minutes,
+    )
+
+
+def verify_challenge_token(token: str) -> dict | None:
+    """Decode a signed challenge; None if forged, expired or not a challenge."""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    if payload.get("type") != "challenge":
+        return None
+    return payload
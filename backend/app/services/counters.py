@@ -0,0 +1,137 @@
+import asyncio
+import logging
+
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, func, update
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.etags import ENGAGEMENT, PROFILES, versions
+from app.services.timeline import promote_celebrities
+from app.models.follow import Follow
+from app.models.like import Like
+from app.models.post import Post
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def bump(session: Session, post_id: int, counter: str, delta: int = 1) -> None:
+    """Atomically add ``delta`` to one of a post's counters.
+
+    Runs as ``UPDATE post SET x = x + delta`` in the caller's transaction so
+    the counter commits (or rolls back) together with the triggering write.
+    """
+    column = getattr(Post, counter)
+    session.exec(
+        update(Post).where(Post.id == post_id).values({column: column + delta})
+    )
+
+
+def bump_user(session: Session, user_id: int, counter: str, delta: int = 1) -> None:
+    """Atomically add ``delta`` to one of a user's profile counters."""
+    column = getattr(User, counter)
+    session.exec(
+        update(User).where(User.id == user_id).values({column: column + delta})
+    )
+
+
+def _counts(model, **columns) -> dict:
+    """``{counter: (SELECT COUNT(*) ...)}`` correlated with ``model``'s row.
+
+    Each keyword names a counter and the (aliased) column whose rows it
+    counts, e.g. ``like_count=Like.post_id``.
+    """
+    return {
+        counter: select(func.count()).where(column == model.id).scalar_subquery()
+        for counter, column in columns.items()
+    }
+
+
+def _reconcile(session: Session, model, counts: dict, chunk_size: int) -> int:
+    # Walk the table by primary key; each chunk is one UPDATE that counts
+    # and writes in the same statement, so an increment committed between
+    # a read and a write can't be overwritten by a stale total
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = session.exec(
+            select(model.id).where(model.id > last_id).order_by(model.id).limit(chunk_size)
+        ).all()
+        if not ids:
+            break
+        drifted = or_(*(getattr(model, counter) != count for counter, count in counts.items()))
+        result = session.exec(
+            update(model)
+            .where(model.id.between(ids[0], ids[-1]), drifted)
+            .values(counts)
+        )
+        fixed += result.rowcount
+        session.commit()
+        last_id = ids[-1]
+    return fixed
+
+
+def reconcile_post_counters(session: Session, chunk_size: int | None = None) -> int:
+    """Recompute every post's counters from Like/Post rows and fix drift.
+
+    Walks posts by primary key in chunks of ``chunk_size``, committing after
+    each chunk so the write lock is only held briefly. Returns the number of
+    posts whose counters were corrected.
+    """
+    replies, reposts = aliased(Post), aliased(Post)
+    counts = _counts(
+        Post,
+        like_count=Like.post_id,
+        reply_count=replies.parent_id,
+        repost_count=reposts.repost_of_id,
+    )
+    fixed = _reconcile(
+        session, Post, counts, chunk_size or settings.counter_reconcile_chunk_size
+    )
+    if fixed:
+        versions.bump(ENGAGEMENT)
+    return fixed
+
+
+def reconcile_user_counters(session: Session, chunk_size: int | None = None) -> int:
+    """Recompute every user's follower/following/post counts and fix drift.
+
+    Same chunked walk as reconcile_post_counters. Returns the number of
+    users whose counters were corrected.
+    """
+    counts = _counts(
+        User,
+        follower_count=Follow.following_id,
+        following_count=Follow.follower_id,
+        post_count=Post.user_id,
+    )
+    fixed = _reconcile(
+        session, User, counts, chunk_size or settings.counter_reconcile_chunk_size
+    )
+    if fixed:
+        # Corrected follower counts may have crossed the celebrity threshold
+        promote_celebrities(session)
+        session.commit()
+        versions.bump(PROFILES)
+    return fixed
+
+
+async def run_reconciler(interval_seconds: float) -> None:
+    """Background task: reconcile post and user counters every ``interval_seconds``."""
+
+    def reconcile_once() -> int:
+        with Session(engine) as session:
+            return reconcile_post_counters(session) + reconcile_user_counters(session)
+
+    # First pass at startup rather than an interval later
+    while True:
+        try:
+            fixed = await asyncio.to_thread(reconcile_once)
+        except Exception:
+            logger.exception("Counter reconciliation failed")
+        else:
+            if fixed:
+                logger.warning("Reconciled drifted counters on %d rows", fixed)
+        await asyncio.sleep(interval_seconds)
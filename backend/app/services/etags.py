@@ -0,0 +1,90 @@
+import secrets
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# Version keys bumped by the write endpoints
+POSTS = "posts"  # a top-level post or repost was created or deleted
+ENGAGEMENT = "engagement"  # like/reply/repost counts changed somewhere
+PROFILES = "profiles"  # a display name/avatar changed, or user counts were repaired
+
+
+def post_key(post_id: int) -> tuple:
+    return ("post", post_id)
+
+
+def user_key(username: str) -> tuple:
+    return ("user", username)
+
+
+class VersionTracker:
+    """In-memory version markers for conditional GETs.
+
+    Every bump takes the next value of one process-wide clock, so a key's
+    version only ever moves forward. Only the most recently bumped
+    ``max_keys`` keys are remembered; an evicted or never-bumped key reads
+    as the newest evicted version, which can cause a spurious 200 but never
+    a stale 304. The random token makes tags from another worker or an
+    earlier process never match.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.token = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._clock = 0
+        self._floor = 0
+        self._versions: OrderedDict[Hashable, int] = OrderedDict()
+
+    def bump(self, *keys: Hashable) -> None:
+        with self._lock:
+            self._clock += 1
+            for key in keys:
+                self._versions[key] = self._clock
+                self._versions.move_to_end(key)
+            while len(self._versions) > self.max_keys:
+                _, self._floor = self._versions.popitem(last=False)
+
+    def version(self, key: Hashable) -> int:
+        return self._versions.get(key, self._floor)
+
+    def etag(self, *keys: Hashable, vary: object = None) -> str:
+        """A weak ETag over the current versions of ``keys``.
+
+        ``vary`` distinguishes responses to the same URL that differ by
+        caller, such as the viewer id of an expanded feed.
+        """
+        parts = [self.token, *(str(self.version(key)) for key in keys)]
+        if vary is not None:
+            parts.append(str(vary))
+        return 'W/"' + "-".join(parts) + '"'
+
+    def clear(self) -> None:
+        with self._lock:
+            self.token = secrets.token_hex(4)
+            self._clock = self._floor = 0
+            self._versions.clear()
+
+
+versions = VersionTracker(settings.etag_max_tracked_keys)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Set ``etag`` on the response; return a 304 if the client already has it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,54 @@
+from sqlmodel import Session, select
+
+from app.models.like import Like
+from app.models.post import Post, PostExpanded, PostRead
+from app.models.user import User, UserSummary
+
+
+def hydrate_posts(
+    session: Session, posts: list[Post], viewer_id: int | None = None
+) -> list[PostExpanded]:
+    """Embed authors, reposted originals, counts and viewer state into posts.
+
+    Issues a fixed number of batched ``IN (...)`` queries per page regardless
+    of page size: originals, authors and, for a signed-in viewer, their
+    likes. Counts come from the denormalized counters on Post.
+    """
+    if not posts:
+        return []
+
+    by_id = {post.id: post for post in posts}
+    missing = {p.repost_of_id for p in posts if p.repost_of_id} - by_id.keys()
+    if missing:
+        for original in session.exec(select(Post).where(Post.id.in_(missing))).all():
+            by_id[original.id] = original
+
+    ids = set(by_id)
+    user_ids = {post.user_id for post in by_id.values()}
+    authors = {
+        user.id: UserSummary.model_validate(user)
+        for user in session.exec(select(User).where(User.id.in_(user_ids))).all()
+    }
+    liked: set[int] = set()
+    if viewer_id is not None:
+        liked = set(
+            session.exec(
+                select(Like.post_id).where(
+                    Like.user_id == viewer_id, Like.post_id.in_(ids)
+                )
+            ).all()
+        )
+
+    def expand(post: Post, depth: int = 0) -> PostExpanded:
+        original = by_id.get(post.repost_of_id) if post.repost_of_id else None
+        return PostExpanded(
+            **PostRead.model_validate(post).model_dump(),
+            author=authors.get(post.user_id),
+            repost_of=expand(original, depth + 1) if original and depth == 0 else None,
+            like_count=post.like_count,
+            reply_count=post.reply_count,
+            repost_count=post.repost_count,
+            viewer_has_liked=post.id in liked,
+        )
+
+    return [expand(post) for post in posts]
@@ -0,0 +1,129 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.models.post import Post, PostRead
+
+
+@dataclass(frozen=True)
+class PostEvent:
+    """A new post, serialized once and shared by every subscriber."""
+
+    post_id: int
+    user_id: int
+    parent_id: int | None
+    data: str
+
+
+@dataclass(eq=False)
+class Subscription:
+    accepts: Callable[[PostEvent], bool]
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(settings.live_queue_size))
+    dropped: bool = False
+
+
+class BroadcastHub:
+    """In-process pub/sub for new posts.
+
+    Subscribers are plain asyncio queues on the event loop, so an idle
+    connection costs a queue and a suspended coroutine rather than a
+    thread. ``publish`` is called by the async post handlers after commit
+    and hands the event to the loop with ``call_soon_threadsafe``, so
+    delivery happens after the handler yields and callers on other threads
+    (sync handlers, scripts) are safe too. A subscriber whose bounded
+    queue is full is dropped instead of slowing down everyone else; its
+    stream ends and the client reconnects and refetches.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._subscribers: set[Subscription] = set()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, accepts: Callable[[PostEvent], bool]) -> Subscription:
+        """Register a subscriber. Must be called on the event loop."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(accepts)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, post: Post) -> None:
+        """Broadcast a committed post. Safe to call from any thread."""
+        loop = self._loop
+        if not self._subscribers or loop is None or loop.is_closed():
+            return
+        event = PostEvent(
+            post_id=post.id,
+            user_id=post.user_id,
+            parent_id=post.parent_id,
+            data=PostRead.model_validate(post).model_dump_json(),
+        )
+        self.published += 1
+        loop.call_soon_threadsafe(self._deliver, event)
+
+    def _deliver(self, event: PostEvent) -> None:
+        for subscription in list(self._subscribers):
+            if not subscription.accepts(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        subscription.dropped = True
+        self.dropped += 1
+        # Make room for the wake-up so the stream notices and ends
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    def clear(self) -> None:
+        self._subscribers.clear()
+        self._loop = None
+        self.published = self.delivered = self.dropped = 0
+
+
+hub = BroadcastHub()
+
+
+async def stream_events(
+    accepts: Callable[[PostEvent], bool], heartbeat_seconds: float
+) -> AsyncIterator[str]:
+    """Subscribe to the hub and render the events as a text/event-stream body.
+
+    Sends a comment line every ``heartbeat_seconds`` so proxies keep idle
+    connections open, and a final ``dropped`` event if the subscriber fell
+    too far behind. The subscription lives exactly as long as the stream.
+    """
+    subscription = hub.subscribe(accepts)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                yield "event: dropped\ndata: {}\n\n"
+                return
+            yield f"id: {event.post_id}\nevent: post\ndata: {event.data}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
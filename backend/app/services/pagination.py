@@ -0,0 +1,58 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor string."""
+    raw = f"{created_at.replace(tzinfo=None).isoformat()}|{post_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, post_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_score_cursor(score: float, row_id: int) -> str:
+    """Encode a (score, id) keyset position, e.g. for relevance-ranked results."""
+    raw = f"{score!r}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_score_cursor(cursor: str) -> tuple[float, int]:
+    """Decode a cursor produced by encode_score_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        score, row_id = raw.rsplit("|", 1)
+        return float(score), int(row_id)
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def paginate(
+    statement,
+    created_col,
+    id_col,
+    limit: int,
+    offset: int = 0,
+    before: tuple[datetime, int] | None = None,
+):
+    """Order newest-first on (created_col, id_col) and page by keyset or offset.
+
+    ``before`` is a decoded cursor position; when given, offset is ignored.
+    """
+    statement = statement.order_by(created_col.desc(), id_col.desc())
+    if before is not None:
+        statement = statement.where(tuple_(created_col, id_col) < tuple_(*before))
+    elif offset:
+        statement = statement.offset(offset)
+    return statement.limit(limit)
@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+
+class PasswordPoolFull(RuntimeError):
+    """More password operations are in flight than the pool will queue."""
+
+
+class PasswordPool:
+    """bcrypt on a dedicated process pool.
+
+    Each hash or check burns ~100-250ms of CPU; in a worker process it
+    neither holds the GIL nor ties up the request threadpool, so a login
+    burst only delays other logins. At most ``queue_limit`` operations may
+    be in flight (running or queued); past that, callers get
+    PasswordPoolFull immediately and should shed the request. If a worker
+    dies (e.g. OOM-killed) the executor is broken for good, so it is
+    replaced and the operation retried once.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent has DB connections and threads
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _acquire(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self.in_flight >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordPoolFull()
+            self.in_flight += 1
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _replace(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        with self._lock:
+            # Concurrent callers see the same broken executor; replace it once
+            if self._executor is broken or self._executor is None:
+                self._executor = self._new_executor()
+                self.restarts += 1
+            executor = self._executor
+        broken.shutdown(wait=False, cancel_futures=True)
+        return executor
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def _run(self, fn, *args):
+        executor = self._acquire()
+        try:
+            try:
+                return await asyncio.wrap_future(executor.submit(fn, *args))
+            except BrokenProcessPool:
+                executor = self._replace(executor)
+                return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        # Pass the cost explicitly: workers don't see settings changed at runtime
+        return await self._run(hash_password, password, settings.bcrypt_rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_limit": self.queue_limit,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+pool = PasswordPool(settings.password_workers, settings.password_queue_limit)
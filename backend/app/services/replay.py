@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+import time
+
+from sqlmodel import Session, delete, select
+
+from app.core.database import engine
+from app.models.captcha import ConsumedCaptchaToken
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+
+
+class ReplayCache:
+    """The jtis of spent single-use captcha tokens, bucketed by expiry minute.
+
+    A token can only be replayed until it expires, so each jti is filed
+    under the minute its ``exp`` falls in and a whole bucket is dropped once
+    that minute has passed: a check looks in one set, and memory holds at
+    most one token lifetime's worth of posts. The ConsumedCaptchaToken
+    table behind it keeps spent jtis across restarts and, through its
+    primary key, makes spending atomic across processes; this cache turns
+    replays away without a query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[int, set[str]] = {}
+        self.consumed = 0
+        self.replays = 0
+
+    def consume(self, jti: str, expires_at: float) -> bool:
+        """Mark ``jti`` spent; False if it already was or has expired."""
+        now = time.time()
+        if expires_at <= now:
+            return False
+        with self._lock:
+            self._drop_expired(now)
+            seen = self._buckets.setdefault(int(expires_at // BUCKET_SECONDS), set())
+            if jti in seen:
+                self.replays += 1
+                return False
+            seen.add(jti)
+            self.consumed += 1
+            return True
+
+    def _drop_expired(self, now: float) -> None:
+        # Bucket b holds expiries in [b, b + 1) minutes
+        current = int(now // BUCKET_SECONDS)
+        for bucket in [bucket for bucket in self._buckets if bucket < current]:
+            del self._buckets[bucket]
+
+    def load(self, session: Session) -> int:
+        """Replace the cache with the table's unexpired jtis."""
+        now = time.time()
+        rows = session.exec(
+            select(ConsumedCaptchaToken).where(ConsumedCaptchaToken.expires_at > now)
+        ).all()
+        buckets: dict[int, set[str]] = {}
+        for row in rows:
+            buckets.setdefault(int(row.expires_at // BUCKET_SECONDS), set()).add(row.jti)
+        with self._lock:
+            self._buckets = buckets
+        return len(rows)
+
+    def sweep(self) -> None:
+        with self._lock:
+            self._drop_expired(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "tokens": sum(len(seen) for seen in self._buckets.values()),
+                "consumed": self.consumed,
+                "replays": self.replays,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets = {}
+            self.consumed = 0
+            self.replays = 0
+
+
+cache = ReplayCache()
+
+
+def prune(session: Session) -> None:
+    """Delete spent jtis whose tokens have expired."""
+    session.exec(
+        delete(ConsumedCaptchaToken).where(ConsumedCaptchaToken.expires_at <= time.time())
+    )
+    session.commit()
+
+
+async def run_sweeper(interval_seconds: float = BUCKET_SECONDS) -> None:
+    """Background task: drop expired buckets and their rows."""
+
+    def sweep() -> None:
+        cache.sweep()
+        with Session(engine) as session:
+            prune(session)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(sweep)
+        except Exception:
+            logger.exception("Captcha replay sweep failed")
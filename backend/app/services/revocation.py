@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+import time
+
+from sqlmodel import Session, delete, select
+
+from app.core.config import settings
+from app.core.database import engine, read_engine
+from app.models.revocation import Revocation
+
+logger = logging.getLogger(__name__)
+
+
+def revoke_token(payload: dict) -> Revocation:
+    """A row revoking one token (by its jti) until it would have expired."""
+    return Revocation(
+        kind="token", subject=payload["jti"], not_before=0, expires_at=payload["exp"]
+    )
+
+
+def revoke_user(user_id: int) -> Revocation:
+    """A row rejecting every token issued to ``user_id`` before now."""
+    now = time.time()
+    return Revocation(
+        kind="user",
+        subject=str(user_id),
+        not_before=now,
+        expires_at=now + settings.refresh_token_expire_days * 86400,
+    )
+
+
+class RevocationList:
+    """Revoked tokens and users, in memory, for auth without a query.
+
+    Entries come from the Revocation table: handlers add rows from the
+    revoke_* helpers, commit, then remember() them so this process applies
+    them at once; other processes see them at their next load(), so a
+    revocation takes up to settings.revocation_refresh_seconds to reach
+    every worker. Lookups read plain dicts that load() swaps wholesale, so
+    they take no lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: dict[str, float] = {}  # jti -> exp
+        self._users: dict[int, float] = {}  # user id -> not before
+        self.loaded_at = 0.0
+        self.rejected = 0
+
+    def is_revoked(self, payload: dict) -> bool:
+        user_id = payload.get("user_id")
+        issued = payload.get("iat", 0)
+        revoked = payload.get("jti") in self._tokens or issued < self._users.get(user_id, 0)
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def remember(self, *rows: Revocation) -> None:
+        with self._lock:
+            tokens, users = dict(self._tokens), dict(self._users)
+            self._apply(rows, tokens, users)
+            self._tokens, self._users = tokens, users
+
+    def load(self, session: Session) -> int:
+        """Replace the in-memory list with the table's live rows."""
+        now = time.time()
+        rows = session.exec(select(Revocation).where(Revocation.expires_at > now)).all()
+        tokens, users = {}, {}
+        self._apply(rows, tokens, users)
+        with self._lock:
+            self._tokens, self._users = tokens, users
+            self.loaded_at = now
+        return len(rows)
+
+    @staticmethod
+    def _apply(rows, tokens: dict, users: dict) -> None:
+        for row in rows:
+            if row.kind == "token":
+                tokens[row.subject] = row.expires_at
+            else:
+                user_id = int(row.subject)
+                users[user_id] = max(users.get(user_id, 0), row.not_before)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "rejected": self.rejected,
+            "loaded_at": self.loaded_at,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens, self._users = {}, {}
+            self.loaded_at = 0.0
+            self.rejected = 0
+
+
+revocations = RevocationList()
+
+
+def prune(session: Session) -> None:
+    """Delete rows that can no longer match an unexpired token."""
+    session.exec(delete(Revocation).where(Revocation.expires_at <= time.time()))
+    session.commit()
+
+
+async def run_refresher(interval_seconds: float) -> None:
+    """Background task: reload revocations made by other workers."""
+
+    def reload() -> int:
+        with Session(engine) as session:
+            prune(session)
+        with Session(read_engine) as session:
+            return revocations.load(session)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(reload)
+        except Exception:
+            logger.exception("Revocation list reload failed")
@@ -0,0 +1,79 @@
+import html
+import re
+
+from sqlalchemy import DateTime, text
+from sqlmodel import Session
+
+from app.models.post import PostRead
+
+# \x02/\x03 survive html.escape, and PostCreate strips control characters
+# from post content, so in a snippet they can only be FTS's match marks
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+_SEARCH_SQL = """
+SELECT post.id, post.user_id, post.content, post.media_url, post.media_type,
+       post.parent_id, post.repost_of_id, post.created_at,
+       matches.score, matches.snippet
+FROM (
+    SELECT rowid AS id, bm25(post_fts) AS score,
+           snippet(post_fts, 0, :mark_start, :mark_end, '…', 16) AS snippet
+    FROM post_fts WHERE post_fts MATCH :match
+) AS matches
+JOIN post ON post.id = matches.id
+{after_clause}
+ORDER BY matches.score, matches.id
+LIMIT :limit
+"""
+
+
+def build_match_query(q: str) -> str | None:
+    """Turn free text into a safe FTS5 query: every word must match, and the
+    last one may be a prefix. Returns None if there is nothing to search."""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet: str) -> str:
+    return (
+        html.escape(snippet)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+def search_posts(
+    session: Session,
+    q: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+) -> list[tuple[PostRead, float, str]]:
+    """BM25-ranked full-text search over post content.
+
+    Returns (post, score, snippet) tuples, best match first. Lower BM25 is
+    better in SQLite, so ``after`` is a (score, id) position to continue
+    strictly after. Snippets are HTML-escaped with matches in <mark> tags.
+    """
+    match = build_match_query(q)
+    if match is None:
+        return []
+    after_clause = "WHERE (matches.score, matches.id) > (:after_score, :after_id)" if after else ""
+    statement = text(_SEARCH_SQL.format(after_clause=after_clause)).columns(
+        created_at=DateTime
+    )
+    params = {
+        "match": match,
+        "limit": limit,
+        "mark_start": _MARK_START,
+        "mark_end": _MARK_END,
+    }
+    if after:
+        params["after_score"], params["after_id"] = after
+    rows = session.exec(statement, params=params).mappings().all()
+    return [
+        (PostRead.model_validate(dict(row)), row["score"], _highlight(row["snippet"]))
+        for row in rows
+    ]
@@ -0,0 +1,95 @@
+from functools import lru_cache
+from operator import attrgetter
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+
+@lru_cache
+def _row_type(model: type) -> type:
+    # A TypedDict with the model's fields: pydantic-core serializes plain
+    # dicts against it without building (or validating) model instances
+    return TypedDict(
+        f"{model.__name__}Row",
+        {name: field.annotation for name, field in model.model_fields.items()},
+    )
+
+
+@lru_cache
+def _row_adapter(model: type, many: bool = True) -> tuple[tuple[str, ...], TypeAdapter]:
+    row = _row_type(model)
+    return tuple(model.model_fields), TypeAdapter(list[row] if many else row)
+
+
+@lru_cache
+def _keyed_row_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(dict[int, _row_type(model)])
+
+
+def _getter(names: tuple[str, ...]):
+    if len(names) == 1:
+        return lambda obj: (getattr(obj, names[0]),)
+    return attrgetter(*names)
+
+
+@lru_cache
+def _model_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+@lru_cache
+def _keyed_model_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(dict[int, model])
+
+
+def columns(table: type, model: type) -> list:
+    """The ``table`` columns needed to render ``model``, in field order."""
+    return [getattr(table, name) for name in model.model_fields]
+
+
+def dump_rows(model: type, rows) -> bytes:
+    """JSON-encode result tuples selected with ``columns(table, model)``."""
+    names, adapter = _row_adapter(model)
+    return adapter.dump_json([dict(zip(names, row)) for row in rows])
+
+
+def dump_objects(model: type, objects) -> bytes:
+    """JSON-encode ORM objects as ``model``, reading attributes in C."""
+    names, adapter = _row_adapter(model)
+    get = _getter(names)
+    return adapter.dump_json([dict(zip(names, get(obj))) for obj in objects])
+
+
+def dump_object(model: type, obj) -> bytes:
+    """JSON-encode a single ORM object as ``model``."""
+    names, adapter = _row_adapter(model, many=False)
+    return adapter.dump_json(dict(zip(names, _getter(names)(obj))))
+
+
+def dump_models(model: type, items: list) -> bytes:
+    """JSON-encode instances that are already ``model``, without revalidating."""
+    return _model_adapter(model).dump_json(items)
+
+
+def dump_rows_by_id(model: type, rows) -> bytes:
+    """Like dump_rows, but as a JSON object keyed by each row's id."""
+    names = tuple(model.model_fields)
+    items = (dict(zip(names, row)) for row in rows)
+    return _keyed_row_adapter(model).dump_json({item["id"]: item for item in items})
+
+
+def dump_models_by_id(model: type, items: list) -> bytes:
+    """Like dump_models, but as a JSON object keyed by each item's id."""
+    return _keyed_model_adapter(model).dump_json({item.id: item for item in items})
+
+
+def json_response(content: bytes, response: Response | None = None) -> Response:
+    """Wrap pre-encoded JSON, keeping headers set on the injected ``response``.
+
+    Returning a Response skips FastAPI's response_model validation and
+    jsonable_encoder pass, so callers must encode exactly what the
+    declared response_model would.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return Response(content, media_type="application/json", headers=headers)
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import read_engine
+from app.models.follow import Follow
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+class FollowGraph:
+    """Compressed sparse row snapshot of Follow for friends-of-friends lookups.
+
+    ``indices[indptr[u]:indptr[u + 1]]`` holds the sorted ids that user ``u``
+    follows, so the whole graph is two contiguous int arrays. Follow and
+    unfollow events land in small add/remove overlays that reads apply on
+    top of the snapshot; once the overlays reach
+    settings.suggestions_compact_threshold edges they are folded into a new
+    snapshot in memory, without touching the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = _EMPTY
+        self._added: dict[int, set[int]] = {}
+        self._removed: dict[int, set[int]] = {}
+        self._pending = 0
+        self.built = False
+        self._cache: OrderedDict[int, tuple[float, list[tuple[int, int]]]] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # -- snapshot -----------------------------------------------------------
+
+    @staticmethod
+    def _to_csr(followers: np.ndarray, following: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        order = np.lexsort((following, followers))
+        followers, following = followers[order], following[order]
+        size = int(max(followers.max(initial=0), following.max(initial=0))) + 1
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(followers, minlength=size), out=indptr[1:])
+        return indptr, following.astype(np.int32)
+
+    def build(self, session: Session) -> int:
+        """Load every Follow edge into a fresh snapshot. Returns the edge count."""
+        rows = session.exec(select(Follow.follower_id, Follow.following_id)).all()
+        edges = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        indptr, indices = self._to_csr(edges[:, 0], edges[:, 1])
+        with self._lock:
+            self.indptr, self.indices = indptr, indices
+            self._added, self._removed, self._pending = {}, {}, 0
+            self._cache.clear()
+            self.built = True
+        return len(indices)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def _compact(self) -> None:
+        """Fold the add/remove overlays into a new snapshot. Caller holds the lock."""
+        counts = np.diff(self.indptr)
+        followers = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+        following = self.indices.astype(np.int64)
+        if self._removed:
+            drop = np.zeros(len(following), dtype=bool)
+            for user_id, gone in self._removed.items():
+                start, end = self._bounds(user_id)
+                drop[start:end] = np.isin(following[start:end], list(gone))
+            followers, following = followers[~drop], following[~drop]
+        added = [(u, v) for u, vs in self._added.items() for v in vs]
+        if added:
+            extra = np.array(added, dtype=np.int64)
+            followers = np.concatenate([followers, extra[:, 0]])
+            following = np.concatenate([following, extra[:, 1]])
+        self.indptr, self.indices = self._to_csr(followers, following)
+        self._added, self._removed, self._pending = {}, {}, 0
+
+    # -- incremental updates ------------------------------------------------
+
+    def _record(self, follower_id: int, following_id: int, add: bool) -> None:
+        with self._lock:
+            if not self.built:
+                return
+            into, out_of = (self._added, self._removed) if add else (self._removed, self._added)
+            if following_id in out_of.get(follower_id, ()):
+                out_of[follower_id].discard(following_id)
+            else:
+                into.setdefault(follower_id, set()).add(following_id)
+            self._pending += 1
+            self._cache.pop(follower_id, None)
+            if self._pending >= settings.suggestions_compact_threshold:
+                self._compact()
+
+    def add_edge(self, follower_id: int, following_id: int) -> None:
+        self._record(follower_id, following_id, add=True)
+
+    def remove_edge(self, follower_id: int, following_id: int) -> None:
+        self._record(follower_id, following_id, add=False)
+
+    # -- queries ------------------------------------------------------------
+
+    def _bounds(self, user_id: int) -> tuple[int, int]:
+        if user_id + 1 >= len(self.indptr):
+            return 0, 0
+        return int(self.indptr[user_id]), int(self.indptr[user_id + 1])
+
+    def following(self, user_id: int) -> np.ndarray:
+        start, end = self._bounds(user_id)
+        row = self.indices[start:end]
+        if user_id in self._removed:
+            row = row[~np.isin(row, list(self._removed[user_id]))]
+        if user_id in self._added:
+            row = np.concatenate([row, np.fromiter(self._added[user_id], dtype=np.int32)])
+        return row
+
+    def _compute(self, user_id: int, limit: int) -> list[tuple[int, int]]:
+        direct = self.following(user_id)
+        if not len(direct):
+            return []
+        # Gather every snapshot row of the users we follow in one fancy-index
+        in_range = direct[direct + 1 < len(self.indptr)]
+        starts = self.indptr[in_range]
+        lengths = self.indptr[in_range + 1] - starts
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        candidates = self.indices[positions + np.arange(int(lengths.sum()))]
+        # Then patch in the (small) overlays for those users
+        plus, minus = [], []
+        for v in self._added.keys() & set(direct.tolist()):
+            plus.extend(self._added[v])
+        for v in self._removed.keys() & set(direct.tolist()):
+            minus.extend(self._removed[v])
+        if plus:
+            candidates = np.concatenate([candidates, np.array(plus, dtype=np.int32)])
+        if not len(candidates):
+            return []
+        ids, counts = np.unique(candidates, return_counts=True)
+        if minus:
+            gone, gone_counts = np.unique(np.array(minus, dtype=np.int32), return_counts=True)
+            pos = np.searchsorted(ids, gone).clip(max=len(ids) - 1)
+            hit = ids[pos] == gone
+            np.subtract.at(counts, pos[hit], gone_counts[hit])
+        keep = (counts > 0) & ~np.isin(ids, direct) & (ids != user_id)
+        ids, counts = ids[keep], counts[keep]
+        # Most mutual connections first, lower id breaks ties
+        order = np.lexsort((ids, -counts))[:limit]
+        return [(int(ids[i]), int(counts[i])) for i in order]
+
+    def suggest(self, user_id: int, limit: int) -> list[tuple[int, int]]:
+        """Return up to ``limit`` (user_id, mutual_count) pairs, best first.
+
+        ``limit`` is capped at settings.suggestions_cache_limit. Results
+        are kept in a per-user LRU cache for
+        settings.suggestions_cache_ttl_seconds; a user's own follow or
+        unfollow evicts their entry.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] > now:
+                self._cache.move_to_end(user_id)
+                self.cache_hits += 1
+                return cached[1][:limit]
+            self.cache_misses += 1
+            result = self._compute(user_id, settings.suggestions_cache_limit)
+            self._cache[user_id] = (now + settings.suggestions_cache_ttl_seconds, result)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > settings.suggestions_cache_size:
+                self._cache.popitem(last=False)
+        return result[:limit]
+
+    def stats(self) -> dict:
+        edges = len(self.indices)
+        snapshot_bytes = self.indptr.nbytes + self.indices.nbytes
+        return {
+            "edges": edges,
+            "pending_updates": self._pending,
+            "snapshot_bytes": snapshot_bytes,
+            "bytes_per_million_edges": snapshot_bytes / edges * 1_000_000 if edges else 0,
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+graph = FollowGraph()
+
+
+async def run_refresher(interval_seconds: float) -> None:
+    """Background task: rebuild the snapshot from the database on a schedule."""
+
+    def build() -> int:
+        with Session(read_engine) as session:
+            return graph.build(session)
+
+    while True:
+        try:
+            edges = await asyncio.to_thread(build)
+            logger.info("Follow graph snapshot rebuilt with %d edges", edges)
+        except Exception:
+            logger.exception("Follow graph snapshot rebuild failed")
+        await asyncio.sleep(interval_seconds)
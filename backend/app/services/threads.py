@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, bindparam, text
+from sqlmodel import Session
+
+from app.models.post import PostRead, Thread, ThreadItem
+from app.services.pagination import encode_cursor
+
+MAX_ANCESTORS = 50
+
+# Ancestors walk up parent_id from the focus post; descendants walk down
+# through the (parent_id, created_at, id) index, taking at most :limit direct
+# replies and :branch_limit replies per deeper node, to at most :max_depth.
+# The path orders descendants depth-first, and siblings by (created_at, id),
+# the order they were picked in and that cursors continue from: each step is
+# the fixed-width stored timestamp and the zero-padded id.
+_THREAD_SQL = """
+WITH RECURSIVE
+ancestors(id, depth) AS (
+    SELECT parent_id, -1 FROM post WHERE id = :post_id AND parent_id IS NOT NULL
+    UNION ALL
+    SELECT p.parent_id, a.depth - 1
+    FROM ancestors a JOIN post p ON p.id = a.id
+    WHERE p.parent_id IS NOT NULL AND a.depth > -:max_ancestors
+),
+descendants(id, depth, path) AS (
+    SELECT id, 1, created_at || printf('%012d', id) FROM (
+        SELECT id, created_at FROM post
+        WHERE parent_id = :post_id {after_clause}
+        ORDER BY created_at, id
+        LIMIT :limit
+    )
+    UNION ALL
+    SELECT c.id, d.depth + 1, d.path || '/' || c.created_at || printf('%012d', c.id)
+    FROM descendants d JOIN post c ON c.id IN (
+        SELECT id FROM post
+        WHERE parent_id = d.id
+        ORDER BY created_at, id
+        LIMIT :branch_limit
+    )
+    WHERE d.depth < :max_depth
+),
+thread(id, depth, path) AS (
+    SELECT id, depth, '' FROM ancestors
+    UNION ALL SELECT :post_id, 0, ''
+    UNION ALL SELECT id, depth, path FROM descendants
+)
+SELECT post.id, post.user_id, post.content, post.media_url, post.media_type,
+       post.parent_id, post.repost_of_id, post.created_at, post.reply_count,
+       thread.depth
+FROM thread JOIN post ON post.id = thread.id
+ORDER BY thread.depth > 0, CASE WHEN thread.depth < 0 THEN thread.depth END, thread.path
+"""
+
+
+def load_thread(
+    session: Session,
+    post_id: int,
+    max_depth: int,
+    limit: int,
+    branch_limit: int,
+    after: tuple[datetime, int] | None = None,
+) -> Thread | None:
+    """Load a post with its ancestors and a bounded descendant tree.
+
+    Runs as a single recursive CTE. ``after`` is a decoded cursor that
+    continues the focus post's direct replies. Returns None if the post does
+    not exist.
+    """
+    after_clause = "AND (created_at, id) > (:after_created_at, :after_id)" if after else ""
+    statement = text(_THREAD_SQL.format(after_clause=after_clause)).columns(
+        created_at=DateTime
+    )
+    params = {
+        "post_id": post_id,
+        "max_ancestors": MAX_ANCESTORS,
+        "max_depth": max_depth,
+        "limit": limit,
+        "branch_limit": branch_limit,
+    }
+    if after:
+        statement = statement.bindparams(bindparam("after_created_at", type_=DateTime))
+        params["after_created_at"], params["after_id"] = after
+    rows = session.exec(statement, params=params).mappings().all()
+    if not rows or not any(row["id"] == post_id for row in rows):
+        return None
+
+    children: dict[int, list] = {}
+    for row in rows:
+        if row["depth"] > 0:
+            children.setdefault(row["parent_id"], []).append(row)
+
+    def next_cursor(row) -> str | None:
+        returned = children.get(row["id"], [])
+        if returned and len(returned) < row["reply_count"]:
+            last = returned[-1]
+            return encode_cursor(last["created_at"], last["id"])
+        return None
+
+    ancestors, focus, replies = [], None, []
+    for row in rows:
+        post = PostRead.model_validate(dict(row))
+        if row["depth"] < 0:
+            ancestors.append(post)
+        elif row["depth"] == 0:
+            focus = post
+        else:
+            replies.append(
+                ThreadItem(
+                    post=post,
+                    depth=row["depth"],
+                    has_more_replies=len(children.get(row["id"], [])) < row["reply_count"],
+                    next_cursor=next_cursor(row),
+                )
+            )
+
+    direct = children.get(post_id, [])
+    thread_cursor = None
+    if len(direct) == limit:
+        thread_cursor = encode_cursor(direct[-1]["created_at"], direct[-1]["id"])
+    return Thread(ancestors=ancestors, post=focus, replies=replies, next_cursor=thread_cursor)
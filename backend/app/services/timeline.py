@@ -0,0 +1,249 @@
+import heapq
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, literal
+from sqlmodel import Session, select, delete, update
+
+from app.core.config import settings
+from app.models.follow import Follow
+from app.models.post import Post
+from app.models.timeline import TimelineEntry
+from app.models.user import User
+from app.services.pagination import paginate
+
+_COLUMNS = ["user_id", "post_id", "author_id", "created_at"]
+
+# Authors flagged User.celebrity are not fanned out on write; their posts
+# are pulled and merged in at read time. The flag is set once an author
+# reaches settings.timeline_celebrity_threshold followers and never cleared:
+# the posts they wrote while pulled were never pushed, so dropping back
+# below the threshold must not stop pulling them.
+_celebrities: frozenset[int] = frozenset()
+_celebrities_expire_at = 0.0
+
+_merge_stats = {
+    "merges": 0,
+    "sources": 0,
+    "rows_fetched": 0,
+    "merge_seconds": 0.0,
+}
+
+
+def celebrity_ids(session: Session) -> frozenset[int]:
+    """Return the ids of authors whose posts are pulled rather than pushed.
+
+    Reloaded from User.celebrity at most every
+    settings.timeline_celebrity_refresh_seconds.
+    """
+    global _celebrities, _celebrities_expire_at
+    now = time.monotonic()
+    if now >= _celebrities_expire_at:
+        rows = session.exec(
+            select(User.id).where(User.celebrity == True)  # noqa: E712
+        ).all()
+        _celebrities = frozenset(rows)
+        _celebrities_expire_at = now + settings.timeline_celebrity_refresh_seconds
+    return _celebrities
+
+
+def promote_celebrities(session: Session, user_id: int | None = None) -> int:
+    """Flag authors at or above the follower threshold as celebrities.
+
+    Checks only ``user_id`` when given, otherwise every user. Runs in the
+    caller's transaction; returns the number of authors promoted.
+    """
+    statement = update(User).where(
+        User.celebrity == False,  # noqa: E712
+        User.follower_count >= settings.timeline_celebrity_threshold,
+    )
+    if user_id is not None:
+        statement = statement.where(User.id == user_id)
+    return session.exec(statement.values(celebrity=True)).rowcount
+
+
+def invalidate_celebrities() -> None:
+    global _celebrities, _celebrities_expire_at
+    _celebrities = frozenset()
+    _celebrities_expire_at = 0.0
+
+
+def merge_stats() -> dict:
+    """Counters describing the cost of read-time celebrity merges."""
+    stats = dict(_merge_stats)
+    merges = stats["merges"] or 1
+    stats["avg_sources"] = stats["sources"] / merges
+    stats["avg_rows_fetched"] = stats["rows_fetched"] / merges
+    stats["avg_merge_ms"] = stats["merge_seconds"] * 1000 / merges
+    return stats
+
+
+def fan_out_post(session: Session, post: Post) -> None:
+    """Push a top-level post into every follower's timeline.
+
+    Runs a single INSERT ... SELECT in the caller's transaction, so the
+    timeline rows commit together with the post itself.
+    """
+    if post.parent_id is not None or post.user_id in celebrity_ids(session):
+        return
+    followers = select(
+        Follow.follower_id,
+        literal(post.id),
+        literal(post.user_id),
+        literal(post.created_at),
+    ).where(Follow.following_id == post.user_id)
+    session.exec(
+        insert(TimelineEntry).from_select(_COLUMNS, followers).prefix_with("OR IGNORE")
+    )
+
+
+def backfill_follow(
+    session: Session, follower_id: int, author_id: int, batch_size: int | None = None
+) -> int:
+    """Copy an author's existing posts into a new follower's timeline.
+
+    Works newest-first in batches of ``batch_size`` and commits after each
+    batch so a prolific author never holds the write lock for long.
+    Celebrity authors are skipped since their posts are pulled on read.
+    Returns the number of posts copied.
+    """
+    if author_id in celebrity_ids(session):
+        return 0
+    batch_size = batch_size or settings.timeline_backfill_batch_size
+    copied = 0
+    before: tuple[datetime, int] | None = None
+    while True:
+        statement = paginate(
+            select(Post.id, Post.created_at).where(
+                Post.user_id == author_id, Post.parent_id == None  # noqa: E711
+            ),
+            Post.created_at,
+            Post.id,
+            batch_size,
+            before=before,
+        )
+        rows = session.exec(statement).all()
+        if not rows:
+            break
+        session.exec(
+            insert(TimelineEntry).prefix_with("OR IGNORE"),
+            params=[
+                {
+                    "user_id": follower_id,
+                    "post_id": post_id,
+                    "author_id": author_id,
+                    "created_at": created_at,
+                }
+                for post_id, created_at in rows
+            ],
+        )
+        session.commit()
+        copied += len(rows)
+        if len(rows) < batch_size:
+            break
+        before = (rows[-1][1], rows[-1][0])
+    return copied
+
+
+def prune_follow(session: Session, follower_id: int, author_id: int) -> None:
+    """Remove an unfollowed author's posts from the follower's timeline."""
+    session.exec(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id,
+            TimelineEntry.author_id == author_id,
+        )
+    )
+
+
+def prune_post(session: Session, post_id: int) -> None:
+    """Remove a deleted post from every timeline it was pushed to."""
+    session.exec(delete(TimelineEntry).where(TimelineEntry.post_id == post_id))
+
+
+def rebuild_timeline(session: Session, user_id: int) -> int:
+    """Regenerate one user's timeline from Follow + Post. Returns the row count."""
+    session.exec(delete(TimelineEntry).where(TimelineEntry.user_id == user_id))
+    session.commit()
+    following = session.exec(
+        select(Follow.following_id).where(Follow.follower_id == user_id)
+    ).all()
+    return sum(backfill_follow(session, user_id, author_id) for author_id in following)
+
+
+def read_home_timeline(
+    session: Session,
+    user_id: int,
+    limit: int,
+    offset: int = 0,
+    before: tuple[datetime, int] | None = None,
+) -> list[Post]:
+    """Read a home timeline page, newest first.
+
+    The pushed timeline is one indexed range read. If the user follows any
+    celebrity authors, each of their post streams is read the same way and
+    k-way merged with the pushed stream. Posts pushed before an author
+    crossed the threshold can appear in both streams and are deduplicated.
+    """
+    window = limit if before is not None else offset + limit
+    pushed = paginate(
+        select(Post)
+        .join(TimelineEntry, TimelineEntry.post_id == Post.id)
+        .where(TimelineEntry.user_id == user_id),
+        TimelineEntry.created_at,
+        TimelineEntry.post_id,
+        window,
+        before=before,
+    )
+    celebrities = celebrity_ids(session)
+    pulled_authors = []
+    if celebrities:
+        pulled_authors = session.exec(
+            select(Follow.following_id).where(
+                Follow.follower_id == user_id,
+                Follow.following_id.in_(celebrities),
+            )
+        ).all()
+    if not pulled_authors:
+        if before is None:
+            pushed = pushed.offset(offset).limit(limit)
+        return session.exec(pushed).all()
+
+    started = time.perf_counter()
+    streams = [session.exec(pushed).all()]
+    for author_id in pulled_authors:
+        streams.append(
+            session.exec(
+                paginate(
+                    select(Post).where(
+                        Post.user_id == author_id,
+                        Post.parent_id == None,  # noqa: E711
+                    ),
+                    Post.created_at,
+                    Post.id,
+                    window,
+                    before=before,
+                )
+            ).all()
+        )
+    merged = heapq.merge(
+        *streams, key=lambda post: (post.created_at, post.id), reverse=True
+    )
+    page: list[Post] = []
+    seen: set[int] = set()
+    skip = offset if before is None else 0
+    for post in merged:
+        if post.id in seen:
+            continue
+        seen.add(post.id)
+        if skip:
+            skip -= 1
+            continue
+        page.append(post)
+        if len(page) == limit:
+            break
+
+    _merge_stats["merges"] += 1
+    _merge_stats["sources"] += len(streams)
+    _merge_stats["rows_fetched"] += sum(len(stream) for stream in streams)
+    _merge_stats["merge_seconds"] += time.perf_counter() - started
+    return page
@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import read_engine
+from app.models.like import Like
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+LIKE_WEIGHT = 1.0
+REPLY_WEIGHT = 2.0
+REPOST_WEIGHT = 3.0
+
+# Scores below this (after decay) are forgotten at refresh
+MIN_SCORE = 0.01
+
+
+def _timestamp(created_at: datetime) -> float:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+
+class TrendingIndex:
+    """Incrementally maintained, exponentially time-decayed post scores.
+
+    Each engagement adds ``weight * 2 ** ((t - epoch) / half_life)`` to the
+    post's accumulator, so ranking never needs to touch old events: decay is
+    the same for every post. ``refresh`` rebases the accumulators to the
+    current time, drops posts that have decayed away and snapshots the
+    top-K, which ``top`` then serves without any work.
+    """
+
+    def __init__(
+        self,
+        half_life_seconds: float,
+        top_k: int,
+        max_tracked: int,
+    ):
+        self.half_life_seconds = half_life_seconds
+        self.top_k = top_k
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._epoch = time.time()
+        self._scores: dict[int, float] = {}
+        self._top: list[tuple[int, float]] = []
+
+    def _growth(self, at: float) -> float:
+        return math.exp((at - self._epoch) * math.log(2) / self.half_life_seconds)
+
+    def record(self, post_id: int, weight: float, at: float | None = None) -> None:
+        at = time.time() if at is None else at
+        with self._lock:
+            score = self._scores.get(post_id, 0.0) + weight * self._growth(at)
+            if score <= 0:
+                self._scores.pop(post_id, None)
+            else:
+                self._scores[post_id] = score
+
+    def remove(self, post_id: int) -> None:
+        with self._lock:
+            self._scores.pop(post_id, None)
+            self._top = [entry for entry in self._top if entry[0] != post_id]
+
+    def refresh(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            decay = math.exp((self._epoch - now) * math.log(2) / self.half_life_seconds)
+            self._scores = {
+                post_id: score * decay
+                for post_id, score in self._scores.items()
+                if score * decay >= MIN_SCORE
+            }
+            self._epoch = now
+            if len(self._scores) > self.max_tracked:
+                self._scores = dict(
+                    heapq.nlargest(self.max_tracked, self._scores.items(), key=lambda e: e[1])
+                )
+            self._top = heapq.nlargest(self.top_k, self._scores.items(), key=lambda e: e[1])
+
+    def top(self, limit: int | None = None) -> list[tuple[int, float]]:
+        """The (post_id, score) snapshot from the last refresh, best first."""
+        return self._top[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch = time.time()
+            self._scores = {}
+            self._top = []
+
+    def rebuild(self, session: Session, now: float | None = None) -> int:
+        """Replay recent likes, replies and reposts from the database.
+
+        Only events inside settings.trending_window_hours are replayed; older
+        ones would have decayed below MIN_SCORE anyway. Returns the number of
+        events replayed.
+        """
+        now = time.time() if now is None else now
+        since = datetime.fromtimestamp(now, timezone.utc) - timedelta(
+            hours=settings.trending_window_hours
+        )
+        self.clear()
+        events = 0
+        sources = [
+            (select(Like.post_id, Like.created_at).where(Like.created_at >= since), LIKE_WEIGHT),
+            (
+                select(Post.parent_id, Post.created_at).where(
+                    Post.parent_id != None, Post.created_at >= since  # noqa: E711
+                ),
+                REPLY_WEIGHT,
+            ),
+            (
+                select(Post.repost_of_id, Post.created_at).where(
+                    Post.repost_of_id != None, Post.created_at >= since  # noqa: E711
+                ),
+                REPOST_WEIGHT,
+            ),
+        ]
+        for statement, weight in sources:
+            for post_id, created_at in session.exec(statement):
+                self.record(post_id, weight, _timestamp(created_at))
+                events += 1
+        self.refresh(now)
+        return events
+
+
+index = TrendingIndex(
+    half_life_seconds=settings.trending_half_life_hours * 3600,
+    top_k=settings.trending_top_k,
+    max_tracked=settings.trending_max_tracked,
+)
+
+
+async def run_refresher(interval_seconds: float) -> None:
+    """Background task: rebuild from the database, then refresh on a schedule."""
+
+    def rebuild() -> int:
+        with Session(read_engine) as session:
+            return index.rebuild(session)
+
+    try:
+        events = await asyncio.to_thread(rebuild)
+        logger.info("Trending index rebuilt from %d events", events)
+    except Exception:
+        logger.exception("Trending index rebuild failed")
+    while True:
+        await asyncio.sleep(interval_seconds)
+        index.refresh()
@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import read_engine
+from app.models.user import User
+from app.services.search import build_match_query
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS = 20
+
+# Appended to a prefix to find the end of its range in the sorted keys
+_RANGE_END = "\U0010ffff"
+
+
+def _keys_for(username: str, display_name: str) -> set[str]:
+    return {username.casefold(), display_name.casefold()}
+
+
+class UserPrefixIndex:
+    """Sorted in-memory index of usernames and display names for typeahead.
+
+    ``keys`` is a sorted list of casefolded names and ``ids`` the parallel
+    user ids, so a prefix is a contiguous range found with two bisections.
+    Narrow ranges are ranked by follower count on the fly; ranges wider
+    than ``scan_limit`` (short prefixes like "a") are ranked when the index
+    is loaded and memoized until a name under that prefix changes. Follower
+    counts are refreshed by the periodic rebuild.
+    """
+
+    def __init__(self, scan_limit: int):
+        self.scan_limit = scan_limit
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.keys: list[str] = []
+        self.ids = array("q")
+        self.followers = array("q")
+        self._ranked: dict[str, list[int]] = {}
+        self.built = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def load(self, users) -> int:
+        """Replace the index with (id, username, display_name, follower_count) rows."""
+        entries = []
+        followers = array("q")
+        for user_id, username, display_name, follower_count in users:
+            if user_id >= len(followers):
+                followers.extend([0] * (user_id + 1 - len(followers)))
+            followers[user_id] = follower_count
+            entries.extend((key, user_id) for key in _keys_for(username, display_name))
+        entries.sort()
+        with self._lock:
+            self.keys = [key for key, _ in entries]
+            self.ids = array("q", (user_id for _, user_id in entries))
+            self.followers = followers
+            self._ranked = {}
+            self.built = True
+            # Rank every wide prefix now, on the rebuild thread, not per request
+            self._top("", 0, len(self.keys))
+        return len(entries)
+
+    def build(self, session: Session) -> int:
+        """Load every user from the database. Returns the number of keys."""
+        rows = session.exec(
+            select(User.id, User.username, User.display_name, User.follower_count)
+        ).all()
+        return self.load(rows)
+
+    def _forget_ranked(self, key: str) -> None:
+        for end in range(len(key) + 1):
+            self._ranked.pop(key[:end], None)
+
+    def add(self, user_id: int, username: str, display_name: str, follower_count: int = 0) -> None:
+        with self._lock:
+            if not self.built:
+                return
+            if user_id >= len(self.followers):
+                self.followers.extend([0] * (user_id + 1 - len(self.followers)))
+            self.followers[user_id] = follower_count
+            for key in _keys_for(username, display_name):
+                pos = bisect_left(self.keys, key)
+                self.keys.insert(pos, key)
+                self.ids.insert(pos, user_id)
+                self._forget_ranked(key)
+
+    def remove(self, user_id: int, username: str, display_name: str) -> None:
+        with self._lock:
+            if not self.built:
+                return
+            for key in _keys_for(username, display_name):
+                pos = bisect_left(self.keys, key)
+                while pos < len(self.keys) and self.keys[pos] == key:
+                    if self.ids[pos] == user_id:
+                        del self.keys[pos]
+                        del self.ids[pos]
+                        break
+                    pos += 1
+                self._forget_ranked(key)
+
+    def _rank(self, lo: int, hi: int, limit: int) -> list[int]:
+        followers = self.followers
+        candidates = set(self.ids[lo:hi])
+        return heapq.nlargest(limit, candidates, key=lambda uid: (followers[uid], -uid))
+
+    def _top(self, prefix: str, lo: int, hi: int) -> list[int]:
+        """Best MAX_RESULTS ids for ``prefix``, whose keys are ``keys[lo:hi]``.
+
+        A wide range is ranked from the memoized top lists of its one
+        character longer prefixes, so a miss never scans more than
+        scan_limit keys per child. Caller holds the lock.
+        """
+        if hi - lo <= self.scan_limit:
+            return self._rank(lo, hi, MAX_RESULTS)
+        ranked = self._ranked.get(prefix)
+        if ranked is None:
+            depth = len(prefix)
+            candidates = set()
+            pos = lo
+            while pos < hi and len(self.keys[pos]) == depth:
+                candidates.add(self.ids[pos])
+                pos += 1
+            while pos < hi:
+                child = self.keys[pos][: depth + 1]
+                end = bisect_left(self.keys, child + _RANGE_END, pos, hi)
+                candidates.update(self._top(child, pos, end))
+                pos = end
+            followers = self.followers
+            ranked = self._ranked[prefix] = heapq.nlargest(
+                MAX_RESULTS, candidates, key=lambda uid: (followers[uid], -uid)
+            )
+        return ranked
+
+    def search(self, prefix: str, limit: int) -> list[int]:
+        """User ids whose username or display name starts with ``prefix``,
+        most followed first."""
+        prefix = prefix.casefold()
+        with self._lock:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + _RANGE_END, lo)
+            if hi - lo <= self.scan_limit:
+                return self._rank(lo, hi, limit)
+            return self._top(prefix, lo, hi)[:limit]
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self.keys),
+            "memoized_prefixes": len(self._ranked),
+            "built": self.built,
+        }
+
+
+index = UserPrefixIndex(scan_limit=settings.typeahead_scan_limit)
+
+
+def search_users_fts(session: Session, prefix: str, limit: int) -> list[int]:
+    """Fallback typeahead over the user_fts prefix index, most followed first."""
+    match = build_match_query(prefix)
+    if match is None:
+        return []
+    rows = session.exec(
+        text(
+            "SELECT user.id FROM user_fts JOIN user ON user.id = user_fts.rowid "
+            "WHERE user_fts MATCH :match "
+            "ORDER BY user.follower_count DESC, user.id LIMIT :limit"
+        ),
+        params={"match": match, "limit": limit},
+    ).all()
+    return [row[0] for row in rows]
+
+
+async def run_refresher(interval_seconds: float) -> None:
+    """Background task: rebuild the index (and its follower ranks) on a schedule."""
+
+    def build() -> int:
+        with Session(read_engine) as session:
+            return index.build(session)
+
+    while True:
+        try:
+            keys = await asyncio.to_thread(build)
+            logger.info("Typeahead index rebuilt with %d keys", keys)
+        except Exception:
+            logger.exception("Typeahead index rebuild failed")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,109 @@
+"""Sync vs async route handlers under concurrent load.
+
+Serves the same global-feed page from a sync ``def`` handler (threadpool +
+sync Session) and from the async /api/feed/global (event loop +
+AsyncSession), driving each with ``concurrency`` in-flight requests.
+
+Run from backend/: ``python -m benchmarks.bench_async [concurrency] [requests]``
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_async.db"
+)
+
+import httpx  # noqa: E402
+from fastapi import Depends, Query  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.database import engine, get_session, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.post import Post, PostRead  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.pagination import paginate  # noqa: E402
+from app.services.serialization import columns, dump_rows, json_response  # noqa: E402
+
+
+@app.get("/bench/sync-feed")
+def sync_feed(limit: int = Query(20), session: Session = Depends(get_session)):
+    statement = paginate(
+        select(*columns(Post, PostRead)).where(Post.parent_id == None),  # noqa: E711
+        Post.created_at,
+        Post.id,
+        limit,
+    )
+    return json_response(dump_rows(PostRead, session.exec(statement)))
+
+
+def seed(posts: int) -> None:
+    init_db()
+    with Session(engine) as session:
+        if session.exec(select(Post.id).limit(1)).first():
+            return
+        session.add(User(email="b@example.com", username="bench", display_name="B", password_hash="x"))
+        session.commit()
+        session.add_all(Post(user_id=1, content=f"post {i}") for i in range(posts))
+        session.commit()
+
+
+async def drive(
+    client: httpx.AsyncClient, url: str, concurrency: int, total: int, report: bool = True
+) -> None:
+    latencies = []
+    queue = iter(range(total))
+
+    async def worker():
+        for _ in queue:
+            started = time.perf_counter()
+            res = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            assert res.status_code == 200
+
+    # A cheap sync endpoint polled alongside: it needs a threadpool worker too
+    probes = []
+
+    async def probe(done: asyncio.Event):
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/api/health")
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    done = asyncio.Event()
+    prober = asyncio.create_task(probe(done))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    if not report:
+        return
+    latencies.sort()
+    probes.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    health = probes[len(probes) // 2] * 1000
+    print(
+        f"  {url:18} {total / elapsed:5.0f} req/s  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms"
+        f"  | /api/health p50 {health:6.1f} ms"
+    )
+
+
+async def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    seed(5000)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{concurrency} concurrent clients, {total} requests each mode:")
+        for url in ("/bench/sync-feed", "/api/feed/global"):
+            await drive(client, url, concurrency, total // 10, report=False)
+            await drive(client, url, concurrency, total)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""Group commit vs one commit per request for small writes.
+
+``concurrency`` threads each insert likes (Like row + like_count bump, the
+same write as POST /api/posts/{id}/like) until ``ops`` are done: first with
+a transaction and commit per like on the shared writer engine, then through
+the WriteBatcher. Pick the pragma profile with SQLITE_PRAGMA_PROFILE; with
+"durable" every commit is an fsync.
+
+Run from backend/: ``python -m benchmarks.bench_batching [concurrency] [ops]``
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_batching.db"
+)
+
+from sqlmodel import Session, delete, update  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import engine, init_db, pool_stats  # noqa: E402
+from app.models.like import Like  # noqa: E402
+from app.models.post import Post  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.routers.posts import _insert_like  # noqa: E402
+from app.services.batching import WriteBatcher  # noqa: E402
+
+
+def seed(users: int) -> int:
+    init_db()
+    with Session(engine) as session:
+        session.add_all(
+            User(email=f"u{i}@example.com", username=f"u{i}", display_name=f"U{i}", password_hash="x")
+            for i in range(users)
+        )
+        session.commit()
+        post = Post(user_id=1, content="liked a lot")
+        session.add(post)
+        session.commit()
+        return post.id
+
+
+def reset(post_id: int) -> None:
+    with Session(engine) as session:
+        session.exec(delete(Like))
+        session.exec(update(Post).where(Post.id == post_id).values(like_count=0))
+        session.commit()
+
+
+def per_request(user_id: int, post_id: int) -> None:
+    with Session(engine) as session:
+        _insert_like(session, user_id, post_id)
+        session.commit()
+
+
+def run(label: str, write, concurrency: int, ops: int, post_id: int) -> None:
+    latencies = []
+
+    def one(user_id: int) -> None:
+        started = time.perf_counter()
+        write(user_id, post_id)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(1, ops + 1)))
+    elapsed = time.perf_counter() - started
+    cuts = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<18} {ops / elapsed:>8.0f} writes/s   "
+        f"p50 {cuts[49] * 1000:6.2f}ms   p99 {cuts[98] * 1000:6.2f}ms   "
+        f"max {max(latencies) * 1000:7.1f}ms"
+    )
+
+
+def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    post_id = seed(ops)
+    print(f"profile={settings.sqlite_pragma_profile} concurrency={concurrency} ops={ops}")
+
+    run("per-request commit", per_request, concurrency, ops, post_id)
+    print(f"  writer pool: {pool_stats()['writer']}")
+    reset(post_id)
+
+    batcher = WriteBatcher(
+        engine, settings.write_batch_max_ops, settings.write_batch_max_delay_ms / 1000
+    )
+    run(
+        "group commit",
+        lambda user_id, post_id: batcher.submit(_insert_like, user_id, post_id).result(),
+        concurrency,
+        ops,
+        post_id,
+    )
+    batcher.close()
+    print(f"  batcher: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
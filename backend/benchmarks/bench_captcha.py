@@ -0,0 +1,116 @@
+"""Captcha challenge issuance: a stored row per fetch vs a signed challenge.
+
+Fires ``requests`` challenge fetches with ``concurrency`` in flight, first
+at a copy of the old handler (insert and commit a CaptchaChallenge row per
+fetch), then at GET /api/captcha/challenge (a signed, expiring challenge
+and no write). Reports throughput, latency and the rows each left behind.
+Pick the pragma profile with SQLITE_PRAGMA_PROFILE; with "durable" every
+stored challenge is an fsync.
+
+Run from backend/: ``python -m benchmarks.bench_captcha [concurrency] [requests]``
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_captcha.db"
+)
+
+import httpx  # noqa: E402
+from fastapi import Depends, Query  # noqa: E402
+from sqlmodel import Session, func, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import engine, get_session, init_db  # noqa: E402
+from app.core.deps import get_current_user  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.captcha import CaptchaChallenge  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.captcha import generate_challenge  # noqa: E402
+
+
+@app.get("/bench/stored-challenge")
+def stored_challenge(
+    type: str | None = Query(None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    result = generate_challenge(challenge_type=type)
+    challenge = CaptchaChallenge(
+        user_id=current_user.id,
+        challenge_type=result["challenge_type"],
+        challenge_data=result["challenge_data"],
+    )
+    session.add(challenge)
+    session.commit()
+    return {
+        "challenge_id": challenge.id,
+        "type": result["challenge_type"],
+        "data": result["challenge_data"],
+    }
+
+
+def seed() -> dict:
+    init_db()
+    with Session(engine) as session:
+        user = session.exec(select(User)).first()
+        if user is None:
+            user = User(email="b@example.com", username="bench", display_name="B", password_hash="x")
+            session.add(user)
+            session.commit()
+        token = create_access_token({"sub": user.username, "user_id": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def stored_rows() -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(CaptchaChallenge)).one()
+
+
+def ms(samples: list[float], q: int) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000
+
+
+async def drive(client: httpx.AsyncClient, url: str, headers: dict, concurrency: int, total: int) -> None:
+    latencies = []
+    queue = iter(range(total))
+    rows_before = stored_rows()
+
+    async def worker():
+        for _ in queue:
+            started = time.perf_counter()
+            res = await client.get(url, headers=headers)
+            res.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{url:<26} {total / elapsed:7.0f} challenges/s  "
+        f"p50 {ms(latencies, 50):6.1f}ms  p99 {ms(latencies, 99):6.1f}ms  "
+        f"rows written {stored_rows() - rows_before}"
+    )
+
+
+async def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    headers = seed()
+    print(f"profile={settings.sqlite_pragma_profile} concurrency={concurrency} requests={total}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm the auth cache and connection pools outside the timed runs
+        await client.get("/bench/stored-challenge", headers=headers)
+        await client.get("/api/captcha/challenge", headers=headers)
+        await drive(client, "/bench/stored-challenge", headers, concurrency, total)
+        await drive(client, "/api/captcha/challenge", headers, concurrency, total)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
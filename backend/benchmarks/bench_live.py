@@ -0,0 +1,51 @@
+"""Live feed hub: memory per idle subscriber and fan-out time per post.
+
+Run from backend/: ``python -m benchmarks.bench_live [subscribers]``
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from app.services.live import BroadcastHub, stream_events
+from app.services import live
+
+
+class _Post:
+    def __init__(self, post_id):
+        from datetime import datetime, timezone
+
+        self.id, self.user_id, self.parent_id = post_id, 1, None
+        self.content, self.media_url, self.media_type = "x" * 140, None, None
+        self.repost_of_id, self.created_at = None, datetime.now(timezone.utc)
+
+
+async def run(subscribers: int) -> None:
+    live.hub = hub = BroadcastHub()
+    tracemalloc.start()
+    streams = [stream_events(lambda event: event.parent_id is None, 3600) for _ in range(subscribers)]
+    # Start each stream so it subscribes and parks on its queue, like an idle client
+    waiters = []
+    for stream in streams:
+        await stream.__anext__()
+        waiters.append(asyncio.ensure_future(stream.__anext__()))
+    await asyncio.sleep(0)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{subscribers} idle subscribers: {current / subscribers / 1024:.1f} KiB each")
+
+    started = time.perf_counter()
+    hub.publish(_Post(1))
+    await asyncio.gather(*waiters)
+    print(f"fan-out of one post to all subscribers: {(time.perf_counter() - started) * 1000:.1f} ms")
+    for stream in streams:
+        await stream.aclose()
+
+
+def main() -> None:
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    asyncio.run(run(subscribers))
+
+
+if __name__ == "__main__":
+    main()
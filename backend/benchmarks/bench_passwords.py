@@ -0,0 +1,116 @@
+"""Login burst: bcrypt inline on the threadpool vs the password process pool.
+
+Fires ``requests`` logins with ``concurrency`` in flight, first at a copy of
+the old sync handler (bcrypt runs on a request threadpool thread), then at
+POST /api/auth/login (bcrypt in app.services.passwords). Clients told 503
+wait out Retry-After and try again. /api/health, a sync endpoint that needs
+a threadpool thread too, is polled alongside.
+
+Run from backend/: ``python -m benchmarks.bench_passwords [concurrency] [requests]``
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_passwords.db"
+)
+
+import httpx  # noqa: E402
+from fastapi import Depends, HTTPException  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import engine, get_session, init_db  # noqa: E402
+from app.core.security import hash_password, verify_password  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import passwords  # noqa: E402
+
+CREDENTIALS = {"email": "b@example.com", "password": "benchmark-password"}
+
+
+@app.post("/bench/inline-login")
+def inline_login(credentials: dict, session: Session = Depends(get_session)):
+    user = session.exec(select(User).where(User.email == credentials["email"])).first()
+    hashed = user.password_hash if user else None
+    session.commit()  # like the real handler, don't hold a connection during bcrypt
+    if not hashed or not verify_password(credentials["password"], hashed):
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+
+def seed() -> None:
+    init_db()
+    with Session(engine) as session:
+        if session.exec(select(User.id)).first():
+            return
+        session.add(User(
+            email=CREDENTIALS["email"], username="bench", display_name="B",
+            password_hash=hash_password(CREDENTIALS["password"]),
+        ))
+        session.commit()
+
+
+def ms(samples: list[float], q: int) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000
+
+
+async def drive(client: httpx.AsyncClient, url: str, concurrency: int, total: int) -> None:
+    statuses = []
+    queue = iter(range(total))
+
+    async def worker():
+        for _ in queue:
+            while True:
+                res = await client.post(url, json=CREDENTIALS)
+                statuses.append(res.status_code)
+                if res.status_code != 503:
+                    break
+                await asyncio.sleep(float(res.headers["Retry-After"]))
+
+    probes = []
+
+    async def probe(done: asyncio.Event):
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/api/health")
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    done = asyncio.Event()
+    prober = asyncio.create_task(probe(done))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    ok = statuses.count(200)
+    print(
+        f"{url:<22} {ok / elapsed:6.1f} logins/s  shed(503) {statuses.count(503):>4}  "
+        f"health p50 {ms(probes, 50):7.1f}ms  p99 {ms(probes, 99):7.1f}ms"
+    )
+
+
+async def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    seed()
+    print(
+        f"bcrypt_rounds={settings.bcrypt_rounds} workers={settings.password_workers} "
+        f"queue_limit={settings.password_queue_limit} concurrency={concurrency}"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Start the worker processes outside the timed runs
+        await passwords.pool.verify(CREDENTIALS["password"], hash_password("x", rounds=4))
+        await drive(client, "/bench/inline-login", concurrency, total)
+        await drive(client, "/api/auth/login", concurrency, total)
+    passwords.pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""Captcha review queue latency as the backlog of pending drawings grows.
+
+Grows the queue to each size in ``sizes`` (every tenth item already has
+one reviewer's vote, and as many decided challenges sit alongside), then
+has ``reviewers`` reviewers take turns fetching, first from a copy of the
+old handler (every pending row, unbounded) and then from
+GET /api/captcha/review-queue (a leased page of 20).
+
+Run from backend/: ``python -m benchmarks.bench_review_queue [reviewers] [sizes]``
+e.g. ``python -m benchmarks.bench_review_queue 20 1000,10000,100000``
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_review_queue.db"
+)
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import func, insert  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.database import engine, get_session, init_db  # noqa: E402
+from app.core.deps import get_current_user  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.captcha import CaptchaChallenge, CaptchaReview  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.serialization import columns, dump_rows, json_response  # noqa: E402
+
+STROKES = json.dumps({
+    "strokes": [[[x, x * 2] for x in range(40)] for _ in range(3)],
+    "duration_ms": 1200,
+})
+
+
+@app.get("/bench/full-queue")
+def full_queue(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    statement = select(*columns(CaptchaChallenge, CaptchaChallenge)).where(
+        CaptchaChallenge.crowd_status == "pending_review",
+        CaptchaChallenge.user_id != current_user.id,
+    )
+    return json_response(dump_rows(CaptchaChallenge, session.exec(statement)))
+
+
+def seed_users(reviewers: int) -> list[dict]:
+    init_db()
+    with Session(engine) as session:
+        session.add_all(
+            User(email=f"u{i}@example.com", username=f"u{i}", display_name=f"U{i}", password_hash="x")
+            for i in range(reviewers + 1)  # user 1 draws, the rest review
+        )
+        session.commit()
+    return [
+        {"Authorization": f"Bearer {create_access_token({'sub': f'u{i}', 'user_id': i + 1})}"}
+        for i in range(1, reviewers + 1)
+    ]
+
+
+def grow(size: int, reviewers: int) -> None:
+    with Session(engine) as session:
+        have = session.exec(
+            select(func.count()).where(CaptchaChallenge.crowd_status == "pending_review")
+        ).one()
+        start = session.exec(select(func.max(CaptchaChallenge.id))).one() or 0
+    added = size - have
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        for status in ("pending_review", "approved"):
+            conn.execute(insert(CaptchaChallenge), [
+                {"user_id": 1, "challenge_type": "draw_freeform", "challenge_data": "{}",
+                 "response_data": STROKES, "server_passed": False, "crowd_status": status,
+                 "created_at": now + timedelta(microseconds=i)}
+                for i in range(added)
+            ])
+        conn.execute(insert(CaptchaReview), [
+            {"challenge_id": start + i, "reviewer_id": (i // 10) % reviewers + 2, "approved": True}
+            for i in range(1, added + 1, 10)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+
+def ms(samples: list[float], q: int) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000
+
+
+async def drive(client: httpx.AsyncClient, url: str, reviewers: list[dict], rounds: int) -> str:
+    latencies, sizes = [], []
+    for i in range(rounds * len(reviewers)):
+        started = time.perf_counter()
+        res = await client.get(url, headers=reviewers[i % len(reviewers)])
+        latencies.append(time.perf_counter() - started)
+        sizes.append(len(res.content))
+    return (
+        f"p50 {ms(latencies, 50):8.1f}ms  p99 {ms(latencies, 99):8.1f}ms  "
+        f"{statistics.mean(sizes) / 1024:8.0f} KiB"
+    )
+
+
+async def main() -> None:
+    reviewers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sizes = [int(size) for size in (sys.argv[2] if len(sys.argv) > 2 else "1000,10000,100000").split(",")]
+    headers = seed_users(reviewers)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            grow(size, reviewers)
+            print(f"{size:>7} pending")
+            print(f"  /bench/full-queue          {await drive(client, '/bench/full-queue', headers, 1)}")
+            print(f"  /api/captcha/review-queue  {await drive(client, '/api/captcha/review-queue', headers, 5)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
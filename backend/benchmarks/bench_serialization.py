@@ -0,0 +1,78 @@
+"""List responses: CPU per page, FastAPI's response_model path vs the fast path.
+
+Run from backend/: ``python -m benchmarks.bench_serialization [page_size] [pages]``
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import app.models  # noqa: F401
+from app.models.post import Post, PostRead
+from app.models.user import User, UserRead
+from app.services.serialization import columns, dump_objects, dump_rows
+
+
+def _cpu_per_page(render, pages: int) -> float:
+    render()
+    started = time.process_time()
+    for _ in range(pages):
+        render()
+    return (time.process_time() - started) / pages * 1e6
+
+
+def main() -> None:
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    loop = asyncio.new_event_loop()
+    with Session(engine) as session:
+        for i in range(page_size):
+            session.add(User(
+                email=f"u{i}@example.com", username=f"user{i}", display_name=f"User {i}",
+                password_hash="x", bio="Just here for the posts",
+            ))
+            session.add(Post(
+                user_id=1, content=f"post number {i} " * 8,
+                created_at=now - timedelta(seconds=i),
+            ))
+        session.commit()
+
+        cases = [
+            ("posts", Post, PostRead),
+            ("users", User, UserRead),
+        ]
+        for label, table, model in cases:
+            objects = session.exec(select(table)).all()
+            rows = session.exec(select(*columns(table, model))).all()
+            field = create_model_field(name="Response", type_=list[model], mode="serialization")
+
+            def before():
+                # What FastAPI does with response_model: validate from
+                # attributes, dump to Python, then json.dumps the result
+                content = loop.run_until_complete(
+                    serialize_response(field=field, response_content=objects)
+                )
+                return JSONResponse(content).body
+
+            assert before() == dump_objects(model, objects) == dump_rows(model, rows)
+            print(f"{label}, {page_size} per page:")
+            print(f"  response_model + jsonable: {_cpu_per_page(before, pages):8.0f} us/page")
+            print(f"  dump_objects (ORM rows):   "
+                  f"{_cpu_per_page(lambda: dump_objects(model, objects), pages):8.0f} us/page")
+            print(f"  dump_rows (column tuples): "
+                  f"{_cpu_per_page(lambda: dump_rows(model, rows), pages):8.0f} us/page")
+
+
+if __name__ == "__main__":
+    main()
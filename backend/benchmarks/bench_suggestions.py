@@ -0,0 +1,47 @@
+"""Who-to-follow: CSR snapshot memory and 2-hop query latency.
+
+Run from backend/: ``python -m benchmarks.bench_suggestions [users] [edges]``
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.suggestions import FollowGraph
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    edges = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    rng = np.random.default_rng(0)
+    # Power-law in-degree: a few accounts attract most follows
+    followers = rng.integers(1, users, edges)
+    following = np.minimum(rng.zipf(1.6, edges), users - 1)
+    keep = followers != following
+    pairs = np.unique(np.stack([followers[keep], following[keep]], axis=1), axis=0)
+
+    graph = FollowGraph()
+    started = time.perf_counter()
+    graph.indptr, graph.indices = graph._to_csr(pairs[:, 0], pairs[:, 1])
+    graph.built = True
+    build_ms = (time.perf_counter() - started) * 1000
+    stats = graph.stats()
+    print(f"{users} users, {stats['edges']} edges, CSR built in {build_ms:.0f} ms")
+    print(f"snapshot: {stats['snapshot_bytes'] / 1e6:.1f} MB, "
+          f"{stats['bytes_per_million_edges'] / 1e6:.1f} MB per million edges")
+
+    sample = rng.integers(1, users, 200)
+    started = time.perf_counter()
+    for user_id in sample:
+        graph._compute(int(user_id), 50)
+    print(f"2-hop suggest (uncached): {(time.perf_counter() - started) / len(sample) * 1000:.2f} ms")
+    for user_id in sample:
+        graph.suggest(int(user_id), 10)
+    started = time.perf_counter()
+    for user_id in sample:
+        graph.suggest(int(user_id), 10)
+    print(f"2-hop suggest (cached):   {(time.perf_counter() - started) / len(sample) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Trending: incremental decayed top-K vs the naive aggregate query.
+
+Run from backend/: ``python -m benchmarks.bench_trending [posts] [likes]``
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session, create_engine, select
+
+import app.models  # noqa: F401
+from app.models.post import Post
+from app.services.trending import TrendingIndex
+
+NAIVE_SQL = text("""
+SELECT post_id, SUM(weight) AS score FROM (
+    SELECT post_id, 1.0 AS weight FROM "like" WHERE created_at >= :since
+    UNION ALL
+    SELECT parent_id, 2.0 FROM post WHERE parent_id IS NOT NULL AND created_at >= :since
+    UNION ALL
+    SELECT repost_of_id, 3.0 FROM post WHERE repost_of_id IS NOT NULL AND created_at >= :since
+)
+GROUP BY post_id ORDER BY score DESC LIMIT 10
+""")
+
+
+def seed(session: Session, posts: int, likes: int) -> None:
+    now = datetime.now(timezone.utc)
+    random.seed(0)
+
+    def ago() -> str:
+        return str((now - timedelta(seconds=random.randint(0, 72 * 3600))).replace(tzinfo=None))
+
+    session.exec(
+        text('INSERT INTO "user" (email, username, display_name, password_hash, created_at, updated_at) '
+             "VALUES ('b@example.com', 'bench', 'Bench', 'x', :now, :now)"),
+        params={"now": str(now.replace(tzinfo=None))},
+    )
+    rows = []
+    for post_id in range(1, posts + 1):
+        kind = random.random()
+        parent = random.randint(1, post_id - 1) if kind < 0.2 and post_id > 1 else None
+        repost = random.randint(1, post_id - 1) if 0.2 <= kind < 0.3 and post_id > 1 else None
+        rows.append({"id": post_id, "parent_id": parent, "repost_of_id": repost, "created_at": ago()})
+    session.exec(
+        text("INSERT INTO post (id, user_id, parent_id, repost_of_id, created_at) "
+             "VALUES (:id, 1, :parent_id, :repost_of_id, :created_at)"),
+        params=rows,
+    )
+    session.exec(
+        text('INSERT OR IGNORE INTO "like" (user_id, post_id, created_at) '
+             "VALUES (:user_id, :post_id, :created_at)"),
+        params=[
+            {"user_id": random.randint(1, 10_000), "post_id": random.randint(1, posts), "created_at": ago()}
+            for _ in range(likes)
+        ],
+    )
+    session.commit()
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    likes = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, posts, likes)
+        since = datetime.now(timezone.utc) - timedelta(hours=72)
+
+        index = TrendingIndex(half_life_seconds=6 * 3600, top_k=50, max_tracked=100_000)
+        started = time.perf_counter()
+        events = index.rebuild(session)
+        rebuild_ms = (time.perf_counter() - started) * 1000
+
+        def naive():
+            session.exec(NAIVE_SQL, params={"since": str(since.replace(tzinfo=None))}).all()
+
+        def incremental():
+            ids = [post_id for post_id, _ in index.top(10)]
+            session.exec(select(Post).where(Post.id.in_(ids))).all()
+
+        print(f"{posts} posts, {likes} likes, {events} events replayed in {rebuild_ms:.0f} ms")
+        print(f"naive aggregate query : {timed(naive, 5):8.2f} ms/request")
+        print(f"incremental top-K     : {timed(incremental, 200):8.3f} ms/request")
+        print(f"record() per event    : {timed(lambda: index.record(1, 1.0), 10_000) * 1000:8.2f} us")
+        print(f"refresh()             : {timed(index.refresh, 5):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""User typeahead: build time and per-keystroke latency of the prefix index.
+
+Run from backend/: ``python -m benchmarks.bench_typeahead [users]``
+"""
+import random
+import string
+import sys
+import time
+
+from app.core.config import settings
+from app.services.typeahead import UserPrefixIndex
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(0)
+    letters = string.ascii_lowercase
+    rows = []
+    for user_id in range(1, users + 1):
+        username = "".join(rng.choices(letters, k=rng.randint(4, 12)))
+        display_name = "".join(rng.choices(letters, k=rng.randint(3, 8))).title()
+        followers = int(rng.paretovariate(1.2)) - 1
+        rows.append((user_id, username, display_name, followers))
+
+    index = UserPrefixIndex(scan_limit=settings.typeahead_scan_limit)
+    started = time.perf_counter()
+    keys = index.load(rows)
+    print(f"{users} users, {keys} keys, built in {time.perf_counter() - started:.1f} s")
+
+    # Every keystroke of a sample of real names, as a user would type them
+    queries = []
+    for _, username, display_name, _ in rng.sample(rows, 2000):
+        name = rng.choice([username, display_name])
+        queries.extend(name[:end] for end in range(1, len(name) + 1))
+    for prefix in queries[:2000]:
+        index.search(prefix, 10)
+
+    timings = []
+    for prefix in queries:
+        started = time.perf_counter()
+        index.search(prefix, 10)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    print(f"{len(queries)} keystrokes: p50 {p50:.1f} us, p99 {p99:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,96 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import SQLModel, Session, create_engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, Session
 
 # Import all models so SQLModel.metadata knows about them
 import app.models  # noqa: F401
 from app.main import app
-from app.core.database import get_session
+from app.core.config import settings
+from app.core import database
+from app.core.migrations import migrate
+from app.core.database import (
+    create_async_engines,
+    create_engines,
+    get_async_session,
+    get_session,
+    new_async_session,
+    new_session,
+)
+from app.services import replay, suggestions, timeline, trending, typeahead
+from app.services.auth_cache import auth_cache
+from app.services.etags import versions
+from app.services.live import hub
+from app.services.revocation import revocations
+
+
+@pytest.fixture(autouse=True)
+def reset_service_state(monkeypatch):
+    # Most tests post without solving a captcha; test_captcha turns it back on
+    monkeypatch.setattr(settings, "captcha_required", False)
+    # In-memory service caches must not leak between per-test databases
+    timeline.invalidate_celebrities()
+    trending.index.clear()
+    suggestions.graph.clear()
+    typeahead.index.clear()
+    hub.clear()
+    versions.clear()
+    auth_cache.clear()
+    revocations.clear()
+    replay.cache.clear()
+    yield
+
+
+@pytest.fixture(name="engines")
+def engines_fixture(tmp_path):
+    # A file rather than :memory: so the sync and async engines share it.
+    # Each test uses its own (writer, reader) pair with the app's pragmas
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(writer)
+    migrate(writer)
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
 
 
 @pytest.fixture(name="engine")
-def engine_fixture():
-    engine = create_engine(
-        "sqlite://",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-    SQLModel.metadata.create_all(engine)
-    yield engine
-    engine.dispose()
+def engine_fixture(engines):
+    return engines[0]
+
+
+@pytest.fixture(name="async_engines")
+def async_engines_fixture(engines, tmp_path):
+    # NullPool: TestClient runs each request on a fresh event loop, so
+    # connections must not be pooled across requests
+    return create_async_engines(f"sqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+
+
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(async_engines):
+    return async_engines[0]
 
 
 @pytest.fixture(name="session")
-def session_fixture(engine):
-    with Session(engine) as session:
+def session_fixture(engines):
+    with new_session(*engines) as session:
         yield session
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(session: Session, engines, async_engines, monkeypatch):
+    # Sessions the app opens itself (background tasks) use the test database
+    monkeypatch.setattr(database, "engine", engines[0])
+    monkeypatch.setattr(database, "read_engine", engines[1])
+
     def get_session_override():
         yield session
 
+    async def get_async_session_override():
+        async with new_async_session(*async_engines) as async_session:
+            yield async_session
+
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_async_session] = get_async_session_override
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -0,0 +1,111 @@
+import time
+
+from sqlalchemy import event
+
+from app.core.security import create_access_token
+from app.services.auth_cache import AuthCache, ExpiringLRU, auth_cache
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+# Unit tests
+def test_entries_expire_and_evict_least_recently_used():
+    cache = ExpiringLRU(max_size=2)
+    now = time.time()
+    cache.set("a", 1, now + 60)
+    cache.set("b", 2, now + 60)
+    cache.set("stale", 3, now - 1)
+    assert cache.get("stale") is None
+
+    cache.set("a", 1, now + 60)
+    assert cache.get("a") == 1  # a is now most recent
+    cache.set("c", 3, now + 60)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 2
+
+
+def test_payload_is_cached_until_exp_and_garbage_is_not():
+    cache = AuthCache(token_cache_size=10, user_cache_size=10)
+    token = create_access_token({"sub": "x", "user_id": 1})
+    assert cache.payload(token)["user_id"] == 1
+    assert cache.payload(token)["user_id"] == 1
+    assert cache.tokens.stats()["hits"] == 1
+
+    assert cache.payload("not-a-token") is None
+    assert cache.tokens.stats()["entries"] == 1
+
+    expired = create_access_token({"sub": "x", "user_id": 1}, expires_minutes=-1)
+    assert cache.payload(expired) is None
+
+
+# Endpoint tests
+def test_warm_requests_skip_the_user_lookup(client, async_engines):
+    data = register_and_login(client)
+    headers = auth_headers(data)
+    selects = []
+    for async_engine in async_engines:
+        event.listen(
+            async_engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: selects.append(statement),
+        )
+
+    client.get("/api/feed/global", headers=headers)
+    cold = [s for s in selects if "FROM user" in s]
+    selects.clear()
+    client.get("/api/feed/global", headers=headers)
+    warm = [s for s in selects if "FROM user" in s]
+    assert len(cold) == 1
+    assert warm == []
+    assert auth_cache.stats()["users"]["hits"] >= 1
+
+
+def test_update_me_invalidates_the_cached_user(client):
+    data = register_and_login(client)
+    headers = auth_headers(data)
+    client.get("/api/feed/global", headers=headers)
+    user_id = data["user"]["id"]
+    assert auth_cache.user(user_id).display_name == "Testuser"
+
+    res = client.put("/api/users/me", json={"display_name": "Renamed"}, headers=headers)
+    assert res.json()["display_name"] == "Renamed"
+    assert auth_cache.user(user_id) is None
+
+    client.get("/api/feed/global", headers=headers)
+    assert auth_cache.user(user_id).display_name == "Renamed"
+
+
+def test_invalidated_deleted_user_is_rejected(client, session):
+    from app.models.user import User
+
+    headers = auth_headers(register_and_login(client))
+    assert client.get("/api/feed/global", headers=headers).status_code == 200
+    user = session.get(User, 1)
+    session.delete(user)
+    session.commit()
+    auth_cache.invalidate_user(1)
+    assert client.get("/api/users/suggestions", headers=headers).status_code == 401
+    # Public reads fall back to anonymous instead
+    assert client.get("/api/feed/global", headers=headers).status_code == 200
+
+
+def test_metrics_include_auth_cache(client):
+    stats = client.get("/api/metrics").json()["auth_cache"]
+    assert set(stats) == {"tokens", "users"}
@@ -0,0 +1,167 @@
+import json
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.like import Like
+from app.models.post import Post
+from app.models.user import User
+from app.routers.posts import _insert_like
+from app.services.batching import WriteBatcher, batcher
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def seed_users_and_post(engine, users=3) -> int:
+    with Session(engine) as session:
+        session.add_all(
+            User(email=f"u{i}@example.com", username=f"u{i}", display_name=f"U{i}", password_hash="x")
+            for i in range(users)
+        )
+        session.commit()
+        post = Post(user_id=1, content="batched")
+        session.add(post)
+        session.commit()
+        return post.id
+
+
+@pytest.fixture(name="batching")
+def batching_fixture(engine, monkeypatch):
+    monkeypatch.setattr(settings, "write_batching", True)
+    monkeypatch.setattr(batcher, "bind", engine)
+    yield batcher
+    batcher.clear()
+
+
+# Unit tests
+def test_queued_writes_commit_in_one_batch(engine):
+    post_id = seed_users_and_post(engine)
+    writes = WriteBatcher(engine, max_ops=10, max_delay_seconds=0.2)
+    futures = [writes.submit(_insert_like, user_id, post_id) for user_id in (1, 2, 3)]
+    for future in futures:
+        assert future.result(timeout=5) is None
+    writes.close()
+
+    assert writes.stats()["batches"] == 1
+    with Session(engine) as session:
+        assert session.get(Post, post_id).like_count == 3
+        assert len(session.exec(select(Like)).all()) == 3
+
+
+def test_constraint_error_only_fails_its_own_caller(engine):
+    post_id = seed_users_and_post(engine)
+    writes = WriteBatcher(engine, max_ops=10, max_delay_seconds=0.2)
+    first = writes.submit(_insert_like, 1, post_id)
+    duplicate = writes.submit(_insert_like, 1, post_id)
+    other = writes.submit(_insert_like, 2, post_id)
+    first.result(timeout=5)
+    other.result(timeout=5)
+    with pytest.raises(IntegrityError):
+        duplicate.result(timeout=5)
+    writes.close()
+
+    stats = writes.stats()
+    assert (stats["batches"], stats["ops"], stats["failed_ops"]) == (1, 3, 1)
+    with Session(engine) as session:
+        # The failed op's counter bump was rolled back with its savepoint
+        assert session.get(Post, post_id).like_count == 2
+
+
+def _add_like(session, user_id, post_id):
+    # Only adds: nothing in the op itself makes the session flush
+    session.add(Like(user_id=user_id, post_id=post_id))
+
+
+def test_add_only_ops_are_flushed(engine):
+    post_id = seed_users_and_post(engine)
+    writes = WriteBatcher(engine, max_ops=10, max_delay_seconds=0.2)
+    first = writes.submit(_add_like, 1, post_id)
+    duplicate = writes.submit(_add_like, 1, post_id)
+    other = writes.submit(_add_like, 2, post_id)
+    first.result(timeout=5)
+    other.result(timeout=5)
+    with pytest.raises(IntegrityError):
+        duplicate.result(timeout=5)
+    writes.close()
+
+    with Session(engine) as session:
+        assert sorted(like.user_id for like in session.exec(select(Like))) == [1, 2]
+
+
+def test_batches_are_capped_at_max_ops(engine):
+    post_id = seed_users_and_post(engine, users=5)
+    writes = WriteBatcher(engine, max_ops=2, max_delay_seconds=0.2)
+    futures = [writes.submit(_insert_like, user_id, post_id) for user_id in range(1, 6)]
+    for future in futures:
+        future.result(timeout=5)
+    writes.close()
+    assert writes.stats()["batches"] == 3
+    assert writes.stats()["largest_batch"] == 2
+
+
+def test_close_flushes_pending_writes(engine):
+    post_id = seed_users_and_post(engine)
+    writes = WriteBatcher(engine, max_ops=10, max_delay_seconds=10)
+    future = writes.submit(_insert_like, 1, post_id)
+    writes.close()
+    assert future.done()
+    with Session(engine) as session:
+        assert session.get(Post, post_id).like_count == 1
+
+
+# Endpoint tests
+def test_batched_like_unlike_and_follow(client, batching):
+    headers = auth_headers(register_and_login(client))
+    register_and_login(client, "other")
+    post = client.post(
+        "/api/posts", json={"content": "Batch me", "captcha_token": "test-bypass"}, headers=headers
+    ).json()
+
+    assert client.post(f"/api/posts/{post['id']}/like", headers=headers).status_code == 201
+    assert client.post(f"/api/posts/{post['id']}/like", headers=headers).status_code == 400
+    assert client.get(f"/api/posts/{post['id']}?expand=true").json()["like_count"] == 1
+    assert client.delete(f"/api/posts/{post['id']}/like", headers=headers).status_code == 204
+    assert client.delete(f"/api/posts/{post['id']}/like", headers=headers).status_code == 404
+
+    assert client.post("/api/users/other/follow", headers=headers).status_code == 201
+    assert client.get("/api/users/other").json()["follower_count"] == 1
+    assert batching.stats()["ops"] == 4
+
+
+def test_batched_pending_review_is_stored(client, batching, session):
+    from app.models.captcha import CaptchaChallenge
+
+    headers = auth_headers(register_and_login(client))
+    challenge = client.get("/api/captcha/challenge?type=draw_freeform", headers=headers).json()
+    drawing = {"strokes": [[[0, 0], [1, 1]]], "duration_ms": 100}
+    res = client.post("/api/captcha/submit", json={
+        "challenge_id": challenge["challenge_id"], "response": json.dumps(drawing),
+    }, headers=headers)
+    assert res.json() == {"status": "pending_review"}
+    stored = session.exec(select(CaptchaChallenge)).one()
+    assert stored.challenge_data == challenge["data"]
+    assert batching.stats()["ops"] == 1
+
+
+def test_metrics_include_write_batcher(client):
+    stats = client.get("/api/metrics").json()["write_batcher"]
+    assert stats["enabled"] is False
+    assert stats["batches"] == 0
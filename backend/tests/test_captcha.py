@@ -1,6 +1,21 @@
 import json
+import time
 
-from app.services.captcha import generate_challenge, validate_challenge, create_captcha_token, verify_captcha_token
+import pytest
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.captcha import CaptchaChallenge, ConsumedCaptchaToken
+from app.services import replay
+from app.services.captcha import (
+    create_captcha_token,
+    create_challenge_token,
+    generate_challenge,
+    validate_challenge,
+    verify_captcha_token,
+    verify_challenge_token,
+)
+from app.services.replay import BUCKET_SECONDS, ReplayCache
 
 
 # Unit tests for captcha service
@@ -108,6 +123,52 @@ def test_verify_bad_captcha_token():
     assert result is None
 
 
+def test_challenge_token_roundtrip():
+    token = create_challenge_token(42, "type_backwards", '{"word": "elephant"}')
+    payload = verify_challenge_token(token)
+    assert payload["user_id"] == 42
+    assert payload["challenge_type"] == "type_backwards"
+    assert payload["challenge_data"] == '{"word": "elephant"}'
+    # Neither kind of token passes for the other
+    assert verify_captcha_token(token) is None
+    assert verify_challenge_token(create_captcha_token(42)) is None
+
+
+def test_replay_cache_spends_each_jti_once():
+    cache = ReplayCache()
+    expires = time.time() + 60
+    assert cache.consume("a", expires)
+    assert not cache.consume("a", expires)
+    assert cache.consume("b", expires)
+    assert not cache.consume("c", time.time() - 1)  # already expired
+    assert cache.stats() == {"buckets": 1, "tokens": 2, "consumed": 2, "replays": 1}
+
+
+def test_replay_cache_drops_whole_buckets_once_expired(monkeypatch):
+    cache = ReplayCache()
+    now = (time.time() // BUCKET_SECONDS) * BUCKET_SECONDS
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.consume("soon", now + 10)
+    cache.consume("later", now + BUCKET_SECONDS + 10)
+    assert cache.stats()["buckets"] == 2
+
+    monkeypatch.setattr(time, "time", lambda: now + BUCKET_SECONDS)
+    cache.sweep()
+    assert cache.stats() == {"buckets": 1, "tokens": 1, "consumed": 2, "replays": 0}
+
+
+def test_replay_cache_reloads_spent_jtis(session):
+    session.add(ConsumedCaptchaToken(jti="spent", expires_at=time.time() + 60))
+    session.add(ConsumedCaptchaToken(jti="stale", expires_at=time.time() - 60))
+    session.commit()
+    cache = ReplayCache()
+    assert cache.load(session) == 1
+    assert not cache.consume("spent", time.time() + 60)
+
+    replay.prune(session)
+    assert session.exec(select(ConsumedCaptchaToken.jti)).all() == ["spent"]
+
+
 # Endpoint tests
 def register_and_login(client, username="captchauser"):
     client.post("/api/auth/register", json={
@@ -127,6 +188,20 @@ def auth_headers(data):
     return {"Authorization": f"Bearer {data['access_token']}"}
 
 
+def solve_captcha(client, headers):
+    challenge = client.get("/api/captcha/challenge?type=type_backwards", headers=headers).json()
+    word = json.loads(challenge["data"])["word"]
+    return client.post("/api/captcha/submit", json={
+        "challenge_id": challenge["challenge_id"],
+        "response": json.dumps({"text": word[::-1]}),
+    }, headers=headers).json()["captcha_token"]
+
+
+@pytest.fixture(name="captcha_required")
+def captcha_required_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "captcha_required", True)
+
+
 def test_get_challenge_endpoint(client):
     data = register_and_login(client)
     headers = auth_headers(data)
@@ -178,3 +253,155 @@ def test_review_queue_empty(client):
     response = client.get("/api/captcha/review-queue", headers=headers)
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_posting_spends_the_captcha_token(client, captcha_required):
+    headers = auth_headers(register_and_login(client))
+    token = solve_captcha(client, headers)
+    post = client.post("/api/posts", json={"content": "hi", "captcha_token": token}, headers=headers)
+    assert post.status_code == 201
+
+    for url, body in (
+        ("/api/posts", {"content": "again"}),
+        (f"/api/posts/{post.json()['id']}/reply", {"content": "re"}),
+        (f"/api/posts/{post.json()['id']}/repost", {}),
+    ):
+        assert client.post(url, json={**body, "captcha_token": token}, headers=headers).status_code == 403
+        assert client.post(url, json=body, headers=headers).status_code == 403
+    assert replay.cache.stats()["replays"] == 3
+
+
+def test_captcha_token_is_bound_to_its_user(client, captcha_required):
+    token = solve_captcha(client, auth_headers(register_and_login(client, "solver")))
+    other = auth_headers(register_and_login(client, "other"))
+    res = client.post("/api/posts", json={"content": "hi", "captcha_token": token}, headers=other)
+    assert res.status_code == 403
+
+
+def test_spent_token_stays_spent_after_a_restart(client, captcha_required):
+    headers = auth_headers(register_and_login(client))
+    token = solve_captcha(client, headers)
+    body = {"content": "hi", "captcha_token": token}
+    assert client.post("/api/posts", json=body, headers=headers).status_code == 201
+
+    replay.cache.clear()  # as after a restart, or in a worker that hasn't seen it
+    assert client.post("/api/posts", json=body, headers=headers).status_code == 403
+    assert client.get("/api/feed/global").json()[0]["content"] == "hi"
+
+
+def test_fetching_a_challenge_stores_nothing(client, session):
+    headers = auth_headers(register_and_login(client))
+    for _ in range(3):
+        assert client.get("/api/captcha/challenge", headers=headers).status_code == 200
+    assert session.exec(select(CaptchaChallenge)).all() == []
+
+
+def test_pending_review_drawing_is_stored(client, session):
+    headers = auth_headers(register_and_login(client))
+    challenge = client.get("/api/captcha/challenge?type=draw_freeform", headers=headers).json()
+    drawing = json.dumps({"strokes": [[[0, 0], [1, 1]]], "duration_ms": 100})
+    res = client.post("/api/captcha/submit", json={
+        "challenge_id": challenge["challenge_id"], "response": drawing,
+    }, headers=headers)
+    assert res.json() == {"status": "pending_review"}
+    stored = session.exec(select(CaptchaChallenge)).one()
+    assert (stored.challenge_data, stored.response_data) == (challenge["data"], drawing)
+    assert stored.crowd_status == "pending_review"
+
+
+def test_solved_challenge_cannot_be_answered_again(client):
+    headers = auth_headers(register_and_login(client))
+    challenge = client.get("/api/captcha/challenge?type=type_backwards", headers=headers).json()
+    word = json.loads(challenge["data"])["word"]
+
+    def answer(text):
+        return client.post("/api/captcha/submit", json={
+            "challenge_id": challenge["challenge_id"],
+            "response": json.dumps({"text": text}),
+        }, headers=headers)
+
+    assert answer("wrong").status_code == 400  # failures may retry
+    assert answer(word[::-1]).json()["status"] == "passed"
+    assert answer(word[::-1]).json()["detail"] == "Challenge already answered"
+
+
+def test_answered_challenge_stays_answered_in_other_workers(client, session):
+    headers = auth_headers(register_and_login(client))
+    challenge = client.get("/api/captcha/challenge?type=type_backwards", headers=headers).json()
+    answer = {
+        "challenge_id": challenge["challenge_id"],
+        "response": json.dumps({"text": json.loads(challenge["data"])["word"][::-1]}),
+    }
+    assert client.post("/api/captcha/submit", json=answer, headers=headers).json()["status"] == "passed"
+    assert len(session.exec(select(ConsumedCaptchaToken)).all()) == 1
+
+    replay.cache.clear()  # a worker that hasn't seen the answer
+    res = client.post("/api/captcha/submit", json=answer, headers=headers)
+    assert (res.status_code, res.json()["detail"]) == (400, "Challenge already answered")
+
+
+def test_challenge_is_bound_to_its_user(client):
+    challenge = client.get(
+        "/api/captcha/challenge", headers=auth_headers(register_and_login(client, "asker"))
+    ).json()
+    other = auth_headers(register_and_login(client, "other"))
+    for challenge_id in (challenge["challenge_id"], "forged", 1):
+        res = client.post("/api/captcha/submit", json={
+            "challenge_id": challenge_id, "response": json.dumps({"text": "x"}),
+        }, headers=other)
+        assert res.status_code == 404
+
+
+def queue_drawings(client, headers, count):
+    for _ in range(count):
+        challenge = client.get("/api/captcha/challenge?type=draw_freeform", headers=headers).json()
+        client.post("/api/captcha/submit", json={
+            "challenge_id": challenge["challenge_id"],
+            "response": json.dumps({"strokes": [[[0, 0], [1, 1]]], "duration_ms": 100}),
+        }, headers=headers)
+
+
+def review_queue(client, headers, **params):
+    res = client.get("/api/captcha/review-queue", params=params, headers=headers)
+    assert res.status_code == 200
+    return [item["id"] for item in res.json()], res.headers.get("X-Next-Cursor")
+
+
+def test_review_queue_pages_oldest_first(client):
+    author = auth_headers(register_and_login(client, "author"))
+    reviewer = auth_headers(register_and_login(client, "reviewer"))
+    queue_drawings(client, author, 3)
+
+    first, cursor = review_queue(client, reviewer, limit=2)
+    assert first == [1, 2]
+    rest, cursor = review_queue(client, reviewer, limit=2, cursor=cursor)
+    assert (rest, cursor) == ([3], None)
+    assert review_queue(client, author) == ([], None)  # never your own
+    assert client.get("/api/captcha/review-queue?cursor=bogus", headers=reviewer).status_code == 400
+
+
+def test_leases_spread_concurrent_reviewers(client, monkeypatch):
+    author = auth_headers(register_and_login(client, "author"))
+    first = auth_headers(register_and_login(client, "first"))
+    second = auth_headers(register_and_login(client, "second"))
+    queue_drawings(client, author, 4)
+
+    assert review_queue(client, first, limit=2)[0] == [1, 2]
+    assert review_queue(client, second, limit=2)[0] == [3, 4]
+    assert review_queue(client, first, limit=2)[0] == [1, 2]  # still leased to first
+
+    monkeypatch.setattr(settings, "captcha_review_lease_seconds", 0)
+    review_queue(client, first, limit=2)  # renewed leases that lapse at once
+    assert review_queue(client, second, limit=4)[0] == [1, 2, 3, 4]
+
+
+def test_voting_drops_the_item_and_frees_its_lease(client):
+    author = auth_headers(register_and_login(client, "author"))
+    first = auth_headers(register_and_login(client, "first"))
+    second = auth_headers(register_and_login(client, "second"))
+    queue_drawings(client, author, 2)
+
+    assert review_queue(client, first)[0] == [1, 2]
+    client.post("/api/captcha/review/1", json={"approved": True}, headers=first)
+    assert review_queue(client, first)[0] == [2]
+    assert review_queue(client, second)[0] == [1]
@@ -0,0 +1,62 @@
+import pytest
+
+from app import cli
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+@pytest.fixture(name="run")
+def run_fixture(engine, monkeypatch):
+    # Point the commands at the test database; the fixture already migrated it
+    monkeypatch.setattr(cli, "engine", engine)
+    monkeypatch.setattr(cli, "init_db", lambda: None)
+    return cli.main
+
+
+# Command tests
+def test_rebuild_timeline(client, run, capsys):
+    author = auth_headers(register_and_login(client, "author"))
+    reader = auth_headers(register_and_login(client, "reader"))
+    client.post("/api/posts", json={"content": "hi", "captcha_token": "test-bypass"}, headers=author)
+    client.post("/api/users/author/follow", headers=reader)
+
+    run(["rebuild-timeline", "reader"])
+    assert capsys.readouterr().out == "Rebuilt timeline for reader: 1 entries\n"
+    run(["rebuild-timeline", "2"])
+    assert capsys.readouterr().out == "Rebuilt timeline for reader: 1 entries\n"
+    with pytest.raises(SystemExit, match="User not found: nobody"):
+        run(["rebuild-timeline", "nobody"])
+
+
+def test_reconcile_commands(client, run, capsys):
+    register_and_login(client)
+    run(["reconcile-counters"])
+    run(["repair-user-stats", "--chunk-size", "10"])
+    assert capsys.readouterr().out == (
+        "Reconciled counters on 0 posts\n"
+        "Repaired follower/following/post counts on 0 users\n"
+    )
+
+
+def test_rebuild_search_index(client, run, capsys):
+    headers = auth_headers(register_and_login(client))
+    client.post("/api/posts", json={"content": "findable", "captcha_token": "test-bypass"}, headers=headers)
+    run(["rebuild-search-index"])
+    assert capsys.readouterr().out == "Rebuilt post search index\n"
+    assert len(client.get("/api/search/posts?q=findable").json()) == 1
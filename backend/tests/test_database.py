@@ -0,0 +1,168 @@
+import threading
+
+import pytest
+from sqlalchemy import exc, text
+from sqlmodel import select
+
+from app.core.config import settings
+from app.core.database import (
+    TimedQueuePool,
+    create_engines,
+    new_session,
+    pragmas,
+)
+from app.models.user import User
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def make_user(username="dbuser"):
+    return User(
+        email=f"{username}@example.com",
+        username=username,
+        display_name=username.title(),
+        password_hash="x",
+    )
+
+
+class BindRecorder:
+    """Collects which engine each statement in a session ran on."""
+
+    def __init__(self, session):
+        self.binds = []
+        get_bind = session.get_bind
+
+        def recording_get_bind(*args, **kwargs):
+            bind = get_bind(*args, **kwargs)
+            self.binds.append(bind)
+            return bind
+
+        session.get_bind = recording_get_bind
+
+
+# Unit tests
+def test_reader_connections_are_query_only(engines):
+    _, reader = engines
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM user")).scalar() == 0
+        with pytest.raises(exc.OperationalError, match="readonly"):
+            conn.execute(text("DELETE FROM user"))
+
+
+def test_pragma_profile_and_overrides_are_applied(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_pragma_profile", "durable")
+    monkeypatch.setattr(settings, "sqlite_pragmas", {"cache_size": -1234})
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        with writer.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 2  # FULL
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -1234
+            assert conn.execute(text("PRAGMA query_only")).scalar() == 0
+        with reader.connect() as conn:
+            assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+    finally:
+        writer.dispose()
+        reader.dispose()
+
+
+def test_unknown_pragma_profile_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_pragma_profile", "reckless")
+    with pytest.raises(ValueError):
+        pragmas()
+
+
+def test_session_routes_reads_to_reader_and_writes_to_writer(engines):
+    writer, reader = engines
+    with new_session(writer, reader) as session:
+        recorder = BindRecorder(session)
+        session.exec(select(User)).all()
+        assert recorder.binds == [reader]
+
+        # Once the transaction writes it stays on the writer, so it sees
+        # its own uncommitted row
+        session.add(make_user())
+        session.flush()
+        assert session.exec(select(User.username)).all() == ["dbuser"]
+        assert recorder.binds[-1] is writer
+
+        session.commit()
+        session.exec(select(User)).all()
+        assert recorder.binds[-1] is reader
+
+
+def test_text_statements_are_routed_by_verb(engines):
+    writer, reader = engines
+    with new_session(writer, reader) as session:
+        recorder = BindRecorder(session)
+        session.exec(text("SELECT 1"))
+        assert recorder.binds[-1] is reader
+        session.exec(text("UPDATE user SET bio = 'x'"))
+        assert recorder.binds[-1] is writer
+        session.rollback()
+
+
+def test_writer_pool_serializes_and_records_waits(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_pool_timeout_seconds", 0.05)
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'pool.db'}")
+    try:
+        assert isinstance(writer.pool, TimedQueuePool)
+        assert writer.pool.size() == 1
+        held = writer.connect()
+        with pytest.raises(exc.TimeoutError):
+            writer.connect()
+
+        waiter_done = threading.Event()
+
+        def waiter():
+            with writer.connect():
+                waiter_done.set()
+
+        monkeypatch.setattr(writer.pool, "_timeout", 5)
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        assert not waiter_done.wait(0.05)
+        held.close()
+        thread.join()
+
+        stats = writer.pool.stats.snapshot(writer.pool)
+        assert stats["checkouts"] == 3
+        assert stats["timeouts"] == 1
+        assert stats["max_wait_ms"] >= 40
+        assert stats["checked_out"] == 0
+    finally:
+        writer.dispose()
+        reader.dispose()
+
+
+# Endpoint tests
+def test_app_works_through_split_pools(client, session):
+    headers = auth_headers(register_and_login(client))
+    post = client.post(
+        "/api/posts", json={"content": "Routed", "captcha_token": "test-bypass"}, headers=headers
+    ).json()
+    assert client.post(f"/api/posts/{post['id']}/like", headers=headers).status_code == 201
+    assert client.get(f"/api/posts/{post['id']}?expand=true").json()["like_count"] == 1
+
+
+def test_metrics_include_pool_stats(client):
+    database = client.get("/api/metrics").json()["database"]
+    for name in ("writer", "reader", "async_writer", "async_reader"):
+        assert set(database[name]) >= {"size", "checkouts", "timeouts", "mean_wait_ms", "max_wait_ms"}
+    assert database["writer"]["size"] == 1
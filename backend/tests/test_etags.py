@@ -0,0 +1,110 @@
+from app.services.etags import VersionTracker
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def revalidate(client, url, etag, headers=None):
+    return client.get(url, headers={**(headers or {}), "If-None-Match": etag})
+
+
+# Unit tests
+def test_versions_only_move_forward_through_eviction():
+    tracker = VersionTracker(max_keys=2)
+    before = tracker.etag("a")
+    tracker.bump("a")
+    after = tracker.etag("a")
+    assert after != before
+
+    # Once "a" is evicted its tag may change, but never back to an old one
+    for key in "bcd":
+        tracker.bump(key)
+    assert tracker.etag("a") not in (before, after)
+    assert tracker.etag("a") == tracker.etag("never-bumped")
+
+
+def test_etag_varies_by_caller():
+    tracker = VersionTracker(max_keys=10)
+    assert tracker.etag("a", vary=1) != tracker.etag("a", vary=2)
+
+
+# Endpoint tests
+def test_global_feed_not_modified_until_new_post(client):
+    data = register_and_login(client)
+    headers = auth_headers(data)
+    client.post("/api/posts", json={"content": "one"}, headers=headers)
+
+    res = client.get("/api/feed/global")
+    etag = res.headers["ETag"]
+    assert etag.startswith('W/"')
+    not_modified = revalidate(client, "/api/feed/global", etag)
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # Likes don't change the plain feed, but do change the expanded one
+    post_id = res.json()[0]["id"]
+    expanded = client.get("/api/feed/global?expand=true").headers["ETag"]
+    client.post(f"/api/posts/{post_id}/like", headers=headers)
+    assert revalidate(client, "/api/feed/global", etag).status_code == 304
+    assert revalidate(client, "/api/feed/global?expand=true", expanded).status_code == 200
+
+    client.post("/api/posts", json={"content": "two"}, headers=headers)
+    res = revalidate(client, "/api/feed/global", etag)
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+
+
+def test_home_feed_etag_per_user_and_follow(client):
+    alice = register_and_login(client, "alice")
+    bob = register_and_login(client, "bob")
+    etag = client.get("/api/feed", headers=auth_headers(alice)).headers["ETag"]
+    assert revalidate(client, "/api/feed", etag, auth_headers(alice)).status_code == 304
+    assert revalidate(client, "/api/feed", etag, auth_headers(bob)).status_code == 200
+
+    client.post("/api/users/bob/follow", headers=auth_headers(alice))
+    assert revalidate(client, "/api/feed", etag, auth_headers(alice)).status_code == 200
+
+
+def test_get_post_not_modified_until_deleted(client):
+    data = register_and_login(client)
+    headers = auth_headers(data)
+    post_id = client.post("/api/posts", json={"content": "hi"}, headers=headers).json()["id"]
+
+    url = f"/api/posts/{post_id}"
+    etag = client.get(url).headers["ETag"]
+    assert revalidate(client, url, etag).status_code == 304
+    assert revalidate(client, url, f'"x", {etag}').status_code == 304
+
+    client.delete(url, headers=headers)
+    assert revalidate(client, url, etag).status_code == 404
+
+
+def test_profile_invalidated_by_follow_and_update(client):
+    alice = register_and_login(client, "alice")
+    register_and_login(client, "bob")
+    etag = client.get("/api/users/bob").headers["ETag"]
+    assert revalidate(client, "/api/users/bob", etag).status_code == 304
+
+    client.post("/api/users/bob/follow", headers=auth_headers(alice))
+    res = revalidate(client, "/api/users/bob", etag)
+    assert res.status_code == 200
+    assert res.json()["follower_count"] == 1
+
+    etag = res.headers["ETag"]
+    client.put("/api/users/me", json={"bio": "hi"}, headers=auth_headers(alice))
+    assert revalidate(client, "/api/users/alice", etag).status_code == 200
@@ -0,0 +1,124 @@
+import asyncio
+
+from app.services.live import BroadcastHub, hub, stream_events
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+class FakePost:
+    def __init__(self, id, user_id=1, parent_id=None):
+        from datetime import datetime, timezone
+
+        self.id = id
+        self.user_id = user_id
+        self.parent_id = parent_id
+        self.content = "hello"
+        self.media_url = None
+        self.media_type = None
+        self.repost_of_id = None
+        self.created_at = datetime.now(timezone.utc)
+
+
+# Unit tests
+def test_hub_filters_and_drops_slow_consumers(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "live_queue_size", 2)
+
+    async def scenario():
+        local = BroadcastHub()
+        top_level = local.subscribe(lambda event: event.parent_id is None)
+        replies = local.subscribe(lambda event: event.parent_id == 1)
+        for post_id in range(1, 4):
+            local.publish(FakePost(post_id))
+        local.publish(FakePost(10, parent_id=1))
+        await asyncio.sleep(0)
+
+        # Three top-level posts overflow a queue of two: dropped, then woken
+        assert top_level.dropped
+        assert top_level.queue.get_nowait() is None
+        assert replies.queue.get_nowait().post_id == 10
+        assert local.stats()["subscribers"] == 1
+        assert local.stats()["dropped"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_publish_without_subscribers_is_a_no_op():
+    local = BroadcastHub()
+    local.publish(FakePost(1))
+    assert local.stats()["published"] == 0
+
+
+# Endpoint tests
+def test_new_posts_reach_stream(client):
+    data = register_and_login(client)
+    headers = auth_headers(data)
+
+    async def scenario():
+        stream = stream_events(lambda event: event.parent_id is None, 5)
+        assert (await stream.__anext__()).startswith("retry:")
+        res = await asyncio.to_thread(
+            client.post, "/api/posts", json={"content": "live!"}, headers=headers
+        )
+        post_id = res.json()["id"]
+        # Replies are not part of the global stream
+        await asyncio.to_thread(
+            client.post, f"/api/posts/{post_id}/reply", json={"content": "re"}, headers=headers
+        )
+        await asyncio.to_thread(client.post, f"/api/posts/{post_id}/repost", headers=headers)
+
+        first = await asyncio.wait_for(stream.__anext__(), 5)
+        second = await asyncio.wait_for(stream.__anext__(), 5)
+        assert first.startswith(f"id: {post_id}\nevent: post\n")
+        assert '"content":"live!"' in first
+        assert f'"repost_of_id":{post_id}' in second
+        await stream.aclose()
+        assert hub.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_heartbeat():
+    async def scenario():
+        stream = stream_events(lambda event: True, 0.01)
+        await stream.__anext__()
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_home_stream_authors_match_home_feed(client, session):
+    from app.models.user import User
+    from app.routers.live import _home_authors
+
+    author = register_and_login(client, "author")
+    fan = register_and_login(client, "fan")
+    client.post("/api/users/author/follow", headers=auth_headers(fan))
+    # /feed leaves out the caller's own posts, so the stream does too
+    assert _home_authors(session, session.get(User, fan["user"]["id"])) == {author["user"]["id"]}
+
+
+def test_home_stream_requires_auth(client):
+    assert client.get("/api/feed/stream").status_code in (401, 403)
+
+
+def test_replies_stream_unknown_post(client):
+    assert client.get("/api/posts/999/replies/stream").status_code == 404
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine
+
+from app.core import migrations
+from app.core.migrations import MIGRATIONS, migrate, schema_version
+
+
+def index_names(engine, table: str) -> set[str]:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+@pytest.fixture(name="legacy_engine")
+def legacy_engine_fixture(tmp_path):
+    # A database from before the runner: tables exist, version 0, and the
+    # post and user tables predate the counter columns and the newer indexes
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_like_post_id"))
+        conn.execute(text("DROP INDEX ix_captchachallenge_crowd_status_created_at"))
+        conn.execute(text("ALTER TABLE captchachallenge DROP COLUMN lease_expires_at"))
+        conn.execute(text("ALTER TABLE post DROP COLUMN like_count"))
+        conn.execute(text("ALTER TABLE user DROP COLUMN post_count"))
+        conn.execute(text("DROP INDEX ix_user_celebrity"))
+        conn.execute(text("ALTER TABLE user DROP COLUMN celebrity"))
+        # Alice posts, Bob follows and likes: rows for the data migrations
+        for statement in (
+            "INSERT INTO user (id, email, username, display_name, password_hash, created_at, updated_at) "
+            "VALUES (1, 'a@example.com', 'alice', 'Alice', 'x', '2024-01-01', '2024-01-01'), "
+            "(2, 'b@example.com', 'bob', 'Bob', 'x', '2024-01-01', '2024-01-01')",
+            "INSERT INTO follow (follower_id, following_id, created_at) VALUES (2, 1, '2024-01-01')",
+            "INSERT INTO post (id, user_id, content, created_at) VALUES (1, 1, 'h' || char(2) || 'i', '2024-01-01')",
+            'INSERT INTO "like" (user_id, post_id, created_at) VALUES (2, 1, \'2024-01-01\')',
+        ):
+            conn.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+# Unit tests
+def test_migrate_brings_legacy_database_up_to_date(legacy_engine):
+    assert migrate(legacy_engine) == [version for version, _, _ in MIGRATIONS]
+
+    assert {"ix_like_post_id", "ix_like_created_at"} <= index_names(legacy_engine, "like")
+    challenge_indexes = index_names(legacy_engine, "captchachallenge")
+    assert "ix_captchachallenge_crowd_status_created_at" in challenge_indexes
+    assert "ix_captchachallenge_crowd_status" not in challenge_indexes
+    columns = {column["name"] for column in inspect(legacy_engine).get_columns("post")}
+    assert "like_count" in columns
+    assert "ix_user_celebrity" in index_names(legacy_engine, "user")
+    with legacy_engine.connect() as conn:
+        # Counter columns are filled from existing rows, not left at 0
+        assert conn.execute(text("SELECT like_count, content FROM post")).one() == (1, "hi")
+        assert conn.execute(text("SELECT post_count FROM user WHERE id = 1")).scalar() == 1
+        # Bob's home timeline is built from the follow
+        timeline = conn.execute(text("SELECT user_id, post_id FROM timelineentry")).all()
+        assert timeline == [(2, 1)]
+    with legacy_engine.connect() as conn:
+        assert schema_version(conn) == MIGRATIONS[-1][0]
+
+
+def test_migrate_is_a_no_op_when_current(legacy_engine):
+    migrate(legacy_engine)
+    assert migrate(legacy_engine) == []
+
+
+def test_failed_migration_rolls_back_and_keeps_version(legacy_engine, monkeypatch):
+    migrate(legacy_engine)
+    current = MIGRATIONS[-1][0]
+
+    def broken(conn):
+        conn.execute(text("CREATE INDEX ix_post_content ON post (content)"))
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [*MIGRATIONS, (current + 1, "broken", broken)])
+    with pytest.raises(RuntimeError):
+        migrate(legacy_engine)
+
+    assert "ix_post_content" not in index_names(legacy_engine, "post")
+    with legacy_engine.connect() as conn:
+        assert schema_version(conn) == current
+
+
+def test_migration_versions_are_sequential():
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
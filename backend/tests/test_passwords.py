@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import hash_password, needs_rehash, verify_password
+from app.services import passwords
+from app.services.passwords import PasswordPool, PasswordPoolFull
+
+
+def register(client, username="testuser", password="password123"):
+    return client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": password,
+    })
+
+
+def login(client, username="testuser", password="password123"):
+    return client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": password,
+    })
+
+
+@pytest.fixture(name="cheap_rounds")
+def cheap_rounds_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+
+
+# Unit tests
+def test_needs_rehash_compares_cost_factor():
+    hashed = hash_password("secret", rounds=4)
+    assert not needs_rehash(hashed, rounds=4)
+    assert needs_rehash(hashed, rounds=5)
+    assert needs_rehash("not-a-bcrypt-hash", rounds=4)
+
+
+def test_pool_hashes_and_verifies_in_worker_processes(cheap_rounds):
+    async def roundtrip():
+        hashed = await passwords.pool.hash("secret")
+        return hashed, await passwords.pool.verify("secret", hashed), await passwords.pool.verify("nope", hashed)
+
+    hashed, good, bad = asyncio.run(roundtrip())
+    assert hashed.startswith("$2b$04$")
+    assert verify_password("secret", hashed)
+    assert (good, bad) == (True, False)
+    assert passwords.pool.stats()["in_flight"] == 0
+
+
+def test_pool_rejects_work_past_the_queue_limit():
+    full = PasswordPool(workers=1, queue_limit=0)
+    with pytest.raises(PasswordPoolFull):
+        asyncio.run(full.verify("secret", "$2b$04$invalid"))
+    assert full.stats()["rejected"] == 1
+    full.shutdown()
+
+
+def test_pool_replaces_a_broken_executor(cheap_rounds):
+    local = PasswordPool(workers=1, queue_limit=4)
+
+    async def verify_after_worker_dies():
+        hashed = await local.hash("secret")
+        for process in list(local._executor._processes.values()):
+            process.kill()  # e.g. the OOM killer
+        return await local.verify("secret", hashed)
+
+    assert asyncio.run(verify_after_worker_dies()) is True
+    assert local.stats()["restarts"] == 1
+    assert local.stats()["in_flight"] == 0
+    local.shutdown()
+
+
+# Endpoint tests
+def test_full_pool_sheds_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(passwords, "pool", PasswordPool(workers=1, queue_limit=0))
+    res = register(client)
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == str(settings.password_retry_after_seconds)
+
+
+def test_login_rehashes_when_cost_factor_changes(client, session, monkeypatch):
+    from app.models.user import User
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    register(client)
+    assert session.get(User, 1).password_hash.startswith("$2b$04$")
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    assert login(client).status_code == 200
+    session.expire_all()
+    upgraded = session.get(User, 1).password_hash
+    assert upgraded.startswith("$2b$05$")
+    assert verify_password("password123", upgraded)
+
+    assert login(client, password="wrong").status_code == 401
+    assert login(client).status_code == 200
+
+
+def test_login_skips_rehash_when_pool_is_full(client, session, monkeypatch):
+    from app.models.user import User
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    register(client)
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+
+    async def full(password):
+        raise PasswordPoolFull()
+
+    monkeypatch.setattr(passwords.pool, "hash", full)
+    assert login(client).status_code == 200
+    session.expire_all()
+    assert session.get(User, 1).password_hash.startswith("$2b$04$")
+
+
+def test_concurrent_registration_of_same_name_is_a_400(client, session, monkeypatch):
+    from app.models.user import User
+
+    real_hash = passwords.pool.hash
+
+    async def hash_while_another_registers(password):
+        # The other request passes the same pre-check and commits first
+        session.add(User(
+            email="other@example.com", username="testuser", display_name="Other", password_hash="x",
+        ))
+        session.commit()
+        return await real_hash(password)
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    monkeypatch.setattr(passwords.pool, "hash", hash_while_another_registers)
+    res = register(client)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Email or username already taken"
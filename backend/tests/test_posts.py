@@ -123,3 +123,324 @@ def test_home_feed_shows_followed_users(client):
     posts = response.json()
     assert len(posts) == 1
     assert posts[0]["content"] == "From poster"
+
+
+def test_global_feed_cursor_pagination(client):
+    data = register_and_login(client)
+    headers = auth_headers(data)
+    for i in range(5):
+        client.post("/api/posts", json={"content": f"Post {i}", "captcha_token": "test-bypass"}, headers=headers)
+    first = client.get("/api/feed/global?limit=2")
+    assert [p["content"] for p in first.json()] == ["Post 4", "Post 3"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    # A post created mid-scroll must not shift the next page
+    client.post("/api/posts", json={"content": "Newest", "captcha_token": "test-bypass"}, headers=headers)
+    second = client.get(f"/api/feed/global?limit=2&cursor={cursor}")
+    assert [p["content"] for p in second.json()] == ["Post 2", "Post 1"]
+
+    last = client.get(f"/api/feed/global?limit=2&cursor={second.headers['X-Next-Cursor']}")
+    assert [p["content"] for p in last.json()] == ["Post 0"]
+    assert "X-Next-Cursor" not in last.headers
+
+
+def test_global_feed_invalid_cursor(client):
+    response = client.get("/api/feed/global?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_home_feed_fan_out_and_unfollow(client):
+    data1 = register_and_login(client, "author")
+    data2 = register_and_login(client, "reader")
+    headers1 = auth_headers(data1)
+    headers2 = auth_headers(data2)
+    client.post("/api/users/author/follow", headers=headers2)
+    post = client.post("/api/posts", json={"content": "Fresh", "captcha_token": "test-bypass"}, headers=headers1).json()
+    client.post(f"/api/posts/{post['id']}/reply", json={"content": "Not in feed", "captcha_token": "test-bypass"}, headers=headers1)
+    client.post(f"/api/posts/{post['id']}/repost", json={"captcha_token": "test-bypass"}, headers=headers1)
+    feed = client.get("/api/feed", headers=headers2).json()
+    assert [p["repost_of_id"] for p in feed] == [post["id"], None]
+
+    client.delete("/api/users/author/follow", headers=headers2)
+    assert client.get("/api/feed", headers=headers2).json() == []
+
+
+def test_home_feed_drops_deleted_post(client):
+    data1 = register_and_login(client, "author")
+    data2 = register_and_login(client, "reader")
+    headers1 = auth_headers(data1)
+    headers2 = auth_headers(data2)
+    client.post("/api/users/author/follow", headers=headers2)
+    post = client.post("/api/posts", json={"content": "Oops", "captcha_token": "test-bypass"}, headers=headers1).json()
+    client.delete(f"/api/posts/{post['id']}", headers=headers1)
+    assert client.get("/api/feed", headers=headers2).json() == []
+
+
+def test_rebuild_timeline(client, session):
+    from app.services.timeline import backfill_follow, prune_follow, rebuild_timeline
+
+    data1 = register_and_login(client, "author")
+    data2 = register_and_login(client, "reader")
+    headers1 = auth_headers(data1)
+    for i in range(3):
+        client.post("/api/posts", json={"content": f"Post {i}", "captcha_token": "test-bypass"}, headers=headers1)
+    client.post("/api/users/author/follow", headers=auth_headers(data2))
+    reader_id, author_id = data2["user"]["id"], data1["user"]["id"]
+    assert rebuild_timeline(session, reader_id) == 3
+    prune_follow(session, reader_id, author_id)
+    assert backfill_follow(session, reader_id, author_id, batch_size=2) == 3
+
+
+def test_home_feed_merges_celebrity_posts(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "timeline_celebrity_threshold", 2)
+    monkeypatch.setattr(settings, "timeline_celebrity_refresh_seconds", 0)
+    celeb = auth_headers(register_and_login(client, "celeb"))
+    regular = auth_headers(register_and_login(client, "regular"))
+    fan = auth_headers(register_and_login(client, "fan"))
+    other = auth_headers(register_and_login(client, "other"))
+    client.post("/api/users/celeb/follow", headers=fan)
+    client.post("/api/users/celeb/follow", headers=other)
+    client.post("/api/users/regular/follow", headers=fan)
+    for i in range(2):
+        client.post("/api/posts", json={"content": f"celeb {i}", "captcha_token": "test-bypass"}, headers=celeb)
+        client.post("/api/posts", json={"content": f"regular {i}", "captcha_token": "test-bypass"}, headers=regular)
+
+    feed = client.get("/api/feed?limit=3", headers=fan)
+    assert [p["content"] for p in feed.json()] == ["regular 1", "celeb 1", "regular 0"]
+    rest = client.get(f"/api/feed?limit=3&cursor={feed.headers['X-Next-Cursor']}", headers=fan)
+    assert [p["content"] for p in rest.json()] == ["celeb 0"]
+    offset_page = client.get("/api/feed?offset=1&limit=2", headers=fan)
+    assert [p["content"] for p in offset_page.json()] == ["celeb 1", "regular 0"]
+
+    assert client.get("/api/metrics").json()["timeline_merge"]["merges"] >= 3
+
+
+def test_home_feed_keeps_posts_across_celebrity_threshold(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "timeline_celebrity_threshold", 2)
+    monkeypatch.setattr(settings, "timeline_celebrity_refresh_seconds", 0)
+    author = auth_headers(register_and_login(client, "author"))
+    fan = auth_headers(register_and_login(client, "fan"))
+    other = auth_headers(register_and_login(client, "other"))
+    client.post("/api/users/author/follow", headers=fan)
+    client.post("/api/posts", json={"content": "pushed", "captcha_token": "test-bypass"}, headers=author)
+
+    # Up: the second follower makes author a celebrity, so this one is pulled
+    client.post("/api/users/author/follow", headers=other)
+    client.post("/api/posts", json={"content": "pulled", "captcha_token": "test-bypass"}, headers=author)
+    assert [p["content"] for p in client.get("/api/feed", headers=fan).json()] == ["pulled", "pushed"]
+
+    # Down: dropping below the threshold must not lose the pulled post
+    client.delete("/api/users/author/follow", headers=other)
+    client.post("/api/posts", json={"content": "after", "captcha_token": "test-bypass"}, headers=author)
+    assert [p["content"] for p in client.get("/api/feed", headers=fan).json()] == ["after", "pulled", "pushed"]
+
+
+def test_public_reads_ignore_a_bad_token(client):
+    from app.core.security import create_refresh_token
+
+    headers = auth_headers(register_and_login(client))
+    post_id = client.post(
+        "/api/posts", json={"content": "Public", "captcha_token": "test-bypass"}, headers=headers
+    ).json()["id"]
+    refresh = create_refresh_token({"sub": "testuser", "user_id": 1})
+    for token in ("garbage", refresh):
+        stale = {"Authorization": f"Bearer {token}"}
+        for url in (
+            "/api/feed/global",
+            "/api/feed/global?expand=true",
+            "/api/trending",
+            f"/api/posts/{post_id}",
+            f"/api/posts?ids={post_id}",
+        ):
+            assert client.get(url, headers=stale).status_code == 200, url
+        # Served as anonymous
+        assert client.get("/api/feed/global?expand=true", headers=stale).json()[0]["viewer_has_liked"] is False
+    assert client.get("/api/feed", headers={"Authorization": "Bearer garbage"}).status_code == 401
+
+
+def test_global_feed_expand(client):
+    author = auth_headers(register_and_login(client, "author"))
+    viewer = auth_headers(register_and_login(client, "viewer"))
+    post = client.post("/api/posts", json={"content": "Original", "captcha_token": "test-bypass"}, headers=author).json()
+    client.post(f"/api/posts/{post['id']}/like", headers=viewer)
+    client.post(f"/api/posts/{post['id']}/reply", json={"content": "Reply", "captcha_token": "test-bypass"}, headers=viewer)
+    client.post(f"/api/posts/{post['id']}/repost", json={"captcha_token": "test-bypass"}, headers=viewer)
+
+    plain = client.get("/api/feed/global").json()
+    assert "author" not in plain[0]
+
+    repost, original = client.get("/api/feed/global?expand=true", headers=viewer).json()
+    assert repost["author"]["username"] == "viewer"
+    assert repost["repost_of"]["id"] == post["id"]
+    assert repost["repost_of"]["author"]["username"] == "author"
+    assert original["like_count"] == 1
+    assert original["reply_count"] == 1
+    assert original["repost_count"] == 1
+    assert original["viewer_has_liked"] is True
+    assert client.get("/api/feed/global?expand=true").json()[1]["viewer_has_liked"] is False
+
+    single = client.get(f"/api/posts/{post['id']}?expand=true").json()
+    assert single["author"]["display_name"] == "Author"
+    assert single["repost_of"] is None
+
+
+def test_expand_uses_fixed_number_of_queries(client, async_engines):
+    from sqlalchemy import event
+
+    headers = auth_headers(register_and_login(client))
+    statements = []
+    for async_engine in async_engines:
+        event.listen(
+            async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+        )
+
+    def count_queries(limit):
+        statements.clear()
+        client.get(f"/api/feed/global?expand=true&limit={limit}", headers=headers)
+        return len(statements)
+
+    for i in range(6):
+        post = client.post("/api/posts", json={"content": f"Post {i}", "captcha_token": "test-bypass"}, headers=headers).json()
+        client.post(f"/api/posts/{post['id']}/repost", json={"captcha_token": "test-bypass"}, headers=headers)
+    assert count_queries(2) == count_queries(12) > 0
+
+
+def test_engagement_counters(client, session):
+    from app.models.post import Post
+
+    headers = auth_headers(register_and_login(client))
+    post = client.post("/api/posts", json={"content": "Counted", "captcha_token": "test-bypass"}, headers=headers).json()
+    client.post(f"/api/posts/{post['id']}/like", headers=headers)
+    reply = client.post(f"/api/posts/{post['id']}/reply", json={"content": "Reply", "captcha_token": "test-bypass"}, headers=headers).json()
+    repost = client.post(f"/api/posts/{post['id']}/repost", json={"captcha_token": "test-bypass"}, headers=headers).json()
+    stored = session.get(Post, post["id"])
+    assert (stored.like_count, stored.reply_count, stored.repost_count) == (1, 1, 1)
+
+    client.delete(f"/api/posts/{post['id']}/like", headers=headers)
+    client.delete(f"/api/posts/{reply['id']}", headers=headers)
+    client.delete(f"/api/posts/{repost['id']}", headers=headers)
+    session.refresh(stored)
+    assert (stored.like_count, stored.reply_count, stored.repost_count) == (0, 0, 0)
+
+
+def test_reconcile_post_counters(client, session):
+    from app.models.post import Post
+    from app.services.counters import reconcile_post_counters
+
+    headers = auth_headers(register_and_login(client))
+    for i in range(3):
+        post = client.post("/api/posts", json={"content": f"Post {i}", "captcha_token": "test-bypass"}, headers=headers).json()
+        client.post(f"/api/posts/{post['id']}/like", headers=headers)
+    drifted = session.get(Post, post["id"])
+    drifted.like_count = 7
+    drifted.reply_count = 2
+    session.add(drifted)
+    session.commit()
+
+    assert reconcile_post_counters(session, chunk_size=2) == 1
+    session.refresh(drifted)
+    assert (drifted.like_count, drifted.reply_count) == (1, 0)
+    assert reconcile_post_counters(session) == 0
+
+
+def test_reply_thread(client):
+    headers = auth_headers(register_and_login(client))
+
+    def reply(parent_id, content):
+        return client.post(f"/api/posts/{parent_id}/reply", json={"content": content, "captcha_token": "test-bypass"}, headers=headers).json()
+
+    root = client.post("/api/posts", json={"content": "root", "captcha_token": "test-bypass"}, headers=headers).json()
+    a = reply(root["id"], "a")
+    a1 = reply(a["id"], "a1")
+    reply(a["id"], "a2")
+    reply(a1["id"], "a1x")
+    reply(root["id"], "b")
+    reply(root["id"], "c")
+
+    thread = client.get(f"/api/posts/{a1['id']}/thread").json()
+    assert [p["content"] for p in thread["ancestors"]] == ["root", "a"]
+    assert thread["post"]["content"] == "a1"
+    assert [r["post"]["content"] for r in thread["replies"]] == ["a1x"]
+
+    thread = client.get(f"/api/posts/{root['id']}/thread?depth=2&limit=2&branch_limit=1").json()
+    assert thread["ancestors"] == []
+    items = [(r["post"]["content"], r["depth"], r["has_more_replies"]) for r in thread["replies"]]
+    assert items == [("a", 1, True), ("a1", 2, True), ("b", 1, False)]
+    branch = client.get(f"/api/posts/{a['id']}/thread?depth=1&cursor={thread['replies'][0]['next_cursor']}").json()
+    assert [r["post"]["content"] for r in branch["replies"]] == ["a2"]
+
+    rest = client.get(f"/api/posts/{root['id']}/thread?depth=1&limit=2&cursor={thread['next_cursor']}").json()
+    assert [r["post"]["content"] for r in rest["replies"]] == ["c"]
+    assert rest["next_cursor"] is None
+
+    assert client.get("/api/posts/9999/thread").status_code == 404
+
+
+def test_reply_thread_pages_by_time_when_ids_disagree(client, session):
+    from datetime import datetime, timedelta
+
+    from app.models.post import Post
+
+    headers = auth_headers(register_and_login(client))
+
+    def reply(parent_id, content):
+        return client.post(f"/api/posts/{parent_id}/reply", json={"content": content, "captcha_token": "test-bypass"}, headers=headers).json()
+
+    root = client.post("/api/posts", json={"content": "root", "captcha_token": "test-bypass"}, headers=headers).json()
+    a = reply(root["id"], "a")
+    replies = [reply(parent["id"], name) for parent in (root, a) for name in ("x", "y", "z")]
+    # Later ids with earlier timestamps (clock skew, imports): z, y, x
+    start = datetime(2024, 1, 1)
+    for offset, created in enumerate(reversed(replies)):
+        stored = session.get(Post, created["id"])
+        stored.created_at = start + timedelta(seconds=offset % 3)
+        session.add(stored)
+    session.commit()
+
+    seen, cursor = [], None
+    while True:
+        url = f"/api/posts/{root['id']}/thread?depth=1&limit=2" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).json()
+        seen += [r["post"]["content"] for r in page["replies"]]
+        if not (cursor := page["next_cursor"]):
+            break
+    assert seen == ["z", "y", "x", "a"]
+
+    thread = client.get(f"/api/posts/{root['id']}/thread?depth=2&branch_limit=1").json()
+    branch_head = next(r for r in thread["replies"] if r["post"]["content"] == "a")
+    child = [r["post"]["content"] for r in thread["replies"] if r["depth"] == 2]
+    assert child == ["z"]
+    rest = client.get(f"/api/posts/{a['id']}/thread?depth=1&cursor={branch_head['next_cursor']}").json()
+    assert [r["post"]["content"] for r in rest["replies"]] == ["y", "x"]
+
+
+def test_get_posts_by_ids(client):
+    headers = auth_headers(register_and_login(client))
+    ids = [
+        client.post("/api/posts", json={"content": f"Post {i}", "captcha_token": "test-bypass"}, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    client.post(f"/api/posts/{ids[0]}/like", headers=headers)
+
+    res = client.get(f"/api/posts?ids={ids[0]},{ids[2]},999,{ids[0]}")
+    assert res.status_code == 200
+    data = res.json()
+    assert set(data) == {str(ids[0]), str(ids[2])}
+    assert data[str(ids[2])]["content"] == "Post 2"
+
+    res = client.get(f"/api/posts?ids={ids[0]}&expand=true", headers=headers)
+    post = res.json()[str(ids[0])]
+    assert post["author"]["username"] == "testuser"
+    assert post["like_count"] == 1
+    assert post["viewer_has_liked"] is True
+
+
+def test_get_posts_by_ids_validation(client):
+    assert client.get("/api/posts?ids=1,abc").status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 300))
+    assert client.get(f"/api/posts?ids={too_many}").status_code == 400
+    assert client.get("/api/posts?ids=").json() == {}
@@ -0,0 +1,188 @@
+"""EXPLAIN QUERY PLAN over every statement the routers issue.
+
+Seeds a few thousand rows, runs ANALYZE so the planner sees production-like
+statistics, drives every endpoint through the client while recording each
+statement sent to SQLite, then explains them all. Any full ``SCAN`` of one
+of the big tables fails the suite, naming the statement.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.models.captcha import CaptchaChallenge, CaptchaReview
+from app.models.follow import Follow
+from app.models.like import Like
+from app.models.post import Post
+from app.models.user import User
+from app.services import suggestions, typeahead
+
+LARGE_TABLES = {"user", "post", "like", "follow", "timelineentry", "captchachallenge", "captchareview"}
+
+# Statements that read a whole table on purpose, matched by a substring
+ALLOWED_SCANS = {
+    # suggestions.graph and typeahead.index load everything into memory
+    "SELECT follow.follower_id, follow.following_id \nFROM follow": "follow graph load",
+    "SELECT user.id, user.username, user.display_name, user.follower_count \nFROM user": "typeahead load",
+}
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: AS (\w+))?")
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def seed(engine, users=300, posts=3000) -> None:
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"seed{i}@example.com", "username": f"seed{i}",
+             "display_name": f"Seed {i}", "password_hash": "x"}
+            for i in range(users)
+        ])
+        conn.execute(insert(Post), [
+            {"user_id": i % users + 1, "content": f"seeded post {i}",
+             "created_at": now - timedelta(minutes=i),
+             "parent_id": i - 1 if i % 5 == 4 else None,
+             "repost_of_id": i - 2 if i % 7 == 6 else None}
+            for i in range(1, posts + 1)
+        ])
+        conn.execute(insert(Like), [
+            {"user_id": i % users + 1, "post_id": (i * 7) % posts + 1,
+             "created_at": now - timedelta(minutes=i)}
+            for i in range(posts)
+        ])
+        conn.execute(insert(Follow), [
+            {"follower_id": i + 1, "following_id": (i + k * 37) % users + 1}
+            for i in range(users)
+            for k in range(1, 6)
+        ])
+        conn.execute(insert(CaptchaChallenge), [
+            {"user_id": i % users + 1, "challenge_type": "type_backwards",
+             "challenge_data": "{}",
+             "crowd_status": "pending_review" if i % 10 == 0 else "not_needed"}
+            for i in range(posts)
+        ])
+        conn.execute(insert(CaptchaReview), [
+            {"challenge_id": i * 10 + 1, "reviewer_id": i % users + 1, "approved": True}
+            for i in range(posts // 10)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+
+def full_scans(conn, statement: str, parameters) -> list[str]:
+    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        match = _SCAN.match(detail)
+        if match and match.group(1) in LARGE_TABLES and "USING" not in detail:
+            scans.append(detail)
+    return scans
+
+
+@pytest.fixture(name="recorded")
+def recorded_fixture(engines, async_engines):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in (
+            "SELECT", "WITH", "UPDATE", "DELETE", "INSERT"
+        ):
+            statements.append((statement, parameters))
+
+    targets = [*engines, *(async_engine.sync_engine for async_engine in async_engines)]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", record)
+    yield statements
+    for target in targets:
+        event.remove(target, "before_cursor_execute", record)
+
+
+def drive_every_endpoint(client) -> None:
+    me = auth_headers(register_and_login(client))
+    register_and_login(client, "other")
+    bypass = {"captcha_token": "test-bypass"}
+
+    post = client.post("/api/posts", json={"content": "planned", **bypass}, headers=me).json()
+    reply = client.post(f"/api/posts/{post['id']}/reply", json={"content": "re", **bypass}, headers=me).json()
+    client.post(f"/api/posts/{post['id']}/repost", json=bypass, headers=me)
+    client.post(f"/api/posts/{post['id']}/like", headers=me)
+    client.post("/api/posts/10/like", headers=me)
+    client.delete("/api/posts/10/like", headers=me)
+    client.post("/api/users/seed1/follow", headers=me)
+    client.post("/api/users/other/follow", headers=me)
+    client.delete("/api/users/other/follow", headers=me)
+
+    for url in (
+        "/api/feed/global", "/api/feed/global?expand=true", "/api/feed", "/api/feed?expand=true",
+        "/api/trending", "/api/trending?expand=true",
+        f"/api/posts?ids={post['id']},5,6", f"/api/posts?ids={post['id']},5&expand=true",
+        f"/api/posts/{post['id']}", f"/api/posts/{post['id']}?expand=true",
+        f"/api/posts/{reply['id']}/thread", "/api/posts/5/thread",
+        "/api/users/search?prefix=see", "/api/users?ids=1,2&usernames=seed3",
+        "/api/users/suggestions", "/api/users/seed1", "/api/users/seed1/followers",
+        "/api/users/seed1/following", "/api/search/posts?q=seeded",
+        "/api/captcha/review-queue",
+    ):
+        assert client.get(url, headers=me).status_code == 200, url
+    client.put("/api/users/me", json={"display_name": "Planner"}, headers=me)
+
+    challenge = client.get("/api/captcha/challenge", headers=me).json()
+    client.post(
+        "/api/captcha/submit",
+        json={"challenge_id": challenge["challenge_id"], "response": "{\"text\": \"x\"}"},
+        headers=me,
+    )
+    client.post("/api/captcha/review/1", json={"approved": True}, headers=me)
+    client.delete(f"/api/posts/{reply['id']}", headers=me)
+    client.post("/api/auth/refresh", json={"refresh_token": "bogus"})
+
+
+# Endpoint tests
+def test_router_queries_never_scan_large_tables(client, session, engine, recorded):
+    seed(engine)
+    # Loaded lazily by their endpoints; load now so the walk covers the reads
+    suggestions.graph.build(session)
+    typeahead.index.build(session)
+    recorded.clear()
+
+    drive_every_endpoint(client)
+    # ...and the typeahead's FTS fallback, used until the index is built
+    typeahead.index.clear()
+    client.get("/api/users/search?prefix=see")
+    assert len(recorded) > 50
+
+    offenders = {}
+    with engine.connect() as conn:
+        for statement, parameters in recorded:
+            if any(allowed in statement for allowed in ALLOWED_SCANS):
+                continue
+            scans = full_scans(conn, statement, parameters)
+            if scans:
+                offenders[statement] = scans
+    assert not offenders, "\n\n".join(
+        f"{'; '.join(scans)}\n{statement}" for statement, scans in offenders.items()
+    )
+
+
+def test_plan_check_flags_a_scan(engine):
+    with engine.connect() as conn:
+        assert full_scans(conn, "SELECT * FROM post WHERE content = ?", ("x",)) == ["SCAN post"]
+        assert full_scans(conn, "SELECT * FROM post WHERE repost_of_id = ?", (1,)) == []
@@ -0,0 +1,148 @@
+import time
+
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token
+from app.models.revocation import Revocation
+from app.services.auth_cache import auth_cache
+from app.services.revocation import (
+    RevocationList,
+    prune,
+    revoke_token,
+    revoke_user,
+)
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def claims(token_type="access", user_id=1, issued=None):
+    payload = {"type": token_type, "user_id": user_id, "jti": f"{token_type}-{user_id}"}
+    payload["iat"] = time.time() if issued is None else issued
+    payload["exp"] = payload["iat"] + 60
+    return payload
+
+
+# Unit tests
+def test_token_and_user_revocations():
+    revoked = RevocationList()
+    earlier = claims("refresh", issued=time.time() - 1)
+    assert not revoked.is_revoked(earlier)
+
+    revoked.remember(revoke_user(1))
+    assert revoked.is_revoked(earlier)
+    assert not revoked.is_revoked(claims())  # issued after
+    assert not revoked.is_revoked(claims(user_id=2, issued=0))
+
+    other = claims(user_id=3)
+    revoked.remember(revoke_token(other))
+    assert revoked.is_revoked(other)
+    assert revoked.stats()["rejected"] == 2
+
+
+def test_load_and_prune_skip_expired_rows(session):
+    live, stale = claims(user_id=1), claims(user_id=2, issued=time.time() - 120)
+    session.add_all([revoke_token(live), revoke_token(stale)])
+    session.commit()
+
+    revoked = RevocationList()
+    assert revoked.load(session) == 1
+    assert revoked.is_revoked(live)
+    prune(session)
+    assert [row.subject for row in session.exec(select(Revocation))] == [live["jti"]]
+
+
+# Endpoint tests
+def test_hot_routes_skip_the_user_lookup(client, async_engines):
+    alice = auth_headers(register_and_login(client, "alice"))
+    register_and_login(client, "bob")
+    post_id = client.post(
+        "/api/posts", json={"content": "hi", "captcha_token": "test-bypass"}, headers=alice
+    ).json()["id"]
+    auth_cache.clear()  # creating the post cached alice
+    statements = []
+    for async_engine in async_engines:
+        event.listen(
+            async_engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+    assert client.post(f"/api/posts/{post_id}/like", headers=alice).status_code == 201
+    assert client.delete(f"/api/posts/{post_id}/like", headers=alice).status_code == 204
+    assert client.post("/api/users/bob/follow", headers=alice).status_code == 201
+    assert client.get("/api/feed", headers=alice).status_code == 200
+    # The follow target is looked up by username; the caller never is
+    assert [s for s in statements if "FROM user" in s and "user.id =" in s] == []
+
+
+def test_logout_revokes_access_and_refresh_tokens(client):
+    data = register_and_login(client)
+    res = client.post(
+        "/api/auth/logout", json={"refresh_token": data["refresh_token"]}, headers=auth_headers(data)
+    )
+    assert res.status_code == 204
+    assert client.get("/api/feed", headers=auth_headers(data)).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]}).status_code == 401
+
+
+def test_logout_everywhere_revokes_other_sessions(client):
+    first = register_and_login(client)
+    second = client.post("/api/auth/login", json={
+        "email": "testuser@example.com", "password": "password123",
+    }).json()
+    client.post("/api/auth/logout?everywhere=true", headers=auth_headers(first))
+
+    assert client.get("/api/feed", headers=auth_headers(second)).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
+    assert client.get("/api/metrics").json()["revocations"]["users"] == 1
+
+
+def test_only_access_tokens_authenticate(client):
+    data = register_and_login(client)
+    user = {"sub": "testuser", "user_id": data["user"]["id"]}
+    for token in (
+        create_refresh_token(user),
+        create_access_token({**user, "type": "captcha"}),
+    ):
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/feed", headers=headers).status_code == 401
+        assert client.put("/api/users/me", json={}, headers=headers).status_code == 401
+
+
+def test_refresh_issues_a_working_access_token(client):
+    data = register_and_login(client)
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert refreshed.status_code == 200
+    assert client.get("/api/feed", headers=auth_headers(refreshed.json())).status_code == 200
+    # A refresh token can't be used as an access token, nor the reverse
+    assert client.post("/api/auth/refresh", json={"refresh_token": data["access_token"]}).status_code == 401
+
+
+def test_stateful_mode_rejects_deleted_users(client, session, monkeypatch):
+    from app.models.user import User
+
+    headers = auth_headers(register_and_login(client))
+    session.delete(session.get(User, 1))
+    session.commit()
+    assert client.get("/api/feed", headers=headers).status_code == 200
+
+    monkeypatch.setattr(settings, "stateless_auth", False)
+    assert client.get("/api/feed", headers=headers).status_code == 401
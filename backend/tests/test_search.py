@@ -0,0 +1,86 @@
+from sqlalchemy import text
+
+from app.services.search import build_match_query
+
+
+def register_and_login(client, username="searcher"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def create_post(client, headers, content):
+    return client.post("/api/posts", json={"content": content, "captcha_token": "test-bypass"}, headers=headers).json()
+
+
+# Unit tests
+def test_build_match_query_quotes_terms():
+    assert build_match_query('cats AND "dogs') == '"cats" "AND" "dogs"*'
+    assert build_match_query("  !!  ") is None
+
+
+# Endpoint tests
+def test_search_posts_ranked_with_snippets(client):
+    headers = auth_headers(register_and_login(client))
+    create_post(client, headers, "I drew a cat today")
+    create_post(client, headers, "cat cat cat, the best cat drawing")
+    create_post(client, headers, "Nothing to see <here>")
+
+    response = client.get("/api/search/posts?q=cat")
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["post"]["content"] for r in results] == [
+        "cat cat cat, the best cat drawing",
+        "I drew a cat today",
+    ]
+    assert "<mark>cat</mark>" in results[1]["snippet"]
+
+    assert client.get("/api/search/posts?q=dra").json()[0]["snippet"].count("<mark>") == 1
+    assert client.get("/api/search/posts?q=here").json()[0]["snippet"] == "Nothing to see &lt;<mark>here</mark>&gt;"
+
+
+def test_search_snippet_marks_cannot_come_from_posts(client):
+    headers = auth_headers(register_and_login(client))
+    post = create_post(client, headers, "\x02fake\x03 mark on a real cat\x00")
+    assert post["content"] == "fake mark on a real cat"
+
+    snippet = client.get("/api/search/posts?q=cat").json()[0]["snippet"]
+    assert snippet == "fake mark on a real <mark>cat</mark>"
+
+
+def test_search_posts_keyset_pagination(client):
+    headers = auth_headers(register_and_login(client))
+    for i in range(5):
+        create_post(client, headers, f"moon number {i}")
+    first = client.get("/api/search/posts?q=moon&limit=3")
+    second = client.get(f"/api/search/posts?q=moon&limit=3&cursor={first.headers['X-Next-Cursor']}")
+    ids = [r["post"]["id"] for r in first.json() + second.json()]
+    assert sorted(ids) == sorted(set(ids)) and len(ids) == 5
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_search_index_follows_deletes(client, session):
+    from app.models.search import rebuild_post_search_index
+
+    headers = auth_headers(register_and_login(client))
+    post = create_post(client, headers, "ephemeral words")
+    client.delete(f"/api/posts/{post['id']}", headers=headers)
+    assert client.get("/api/search/posts?q=ephemeral").json() == []
+
+    create_post(client, headers, "lasting words")
+    rebuild_post_search_index(session.connection())
+    assert len(client.get("/api/search/posts?q=words").json()) == 1
+    count = session.exec(text("SELECT count(*) FROM post_fts WHERE post_fts MATCH 'lasting'")).one()
+    assert count == (1,)
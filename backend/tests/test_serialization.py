@@ -0,0 +1,56 @@
+import json
+
+from sqlmodel import select
+
+from app.models.post import Post, PostRead
+from app.models.user import User, UserRead
+from app.services.serialization import columns, dump_object, dump_objects, dump_rows
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+# Unit tests
+def test_fast_path_matches_response_model(client, session):
+    data = register_and_login(client)
+    client.post("/api/posts", json={"content": "héllo <b>"}, headers=auth_headers(data))
+
+    posts = session.exec(select(Post)).all()
+    rows = session.exec(select(*columns(Post, PostRead))).all()
+    expected = "[" + ",".join(PostRead.model_validate(p).model_dump_json() for p in posts) + "]"
+    assert dump_objects(PostRead, posts).decode() == expected
+    assert dump_rows(PostRead, rows).decode() == expected
+
+    user = session.exec(select(User)).one()
+    assert dump_object(UserRead, user).decode() == UserRead.model_validate(user).model_dump_json()
+
+
+# Endpoint tests
+def test_fast_path_keeps_headers_and_shape(client):
+    data = register_and_login(client)
+    for i in range(3):
+        client.post("/api/posts", json={"content": f"p{i}"}, headers=auth_headers(data))
+
+    res = client.get("/api/feed/global?limit=2")
+    assert res.headers["content-type"] == "application/json"
+    assert "X-Next-Cursor" in res.headers and "ETag" in res.headers
+    assert set(res.json()[0]) == set(PostRead.model_fields)
+
+    res = client.get("/api/users/testuser")
+    assert "ETag" in res.headers
+    assert json.loads(res.content)["post_count"] == 3
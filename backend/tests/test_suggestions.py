@@ -0,0 +1,78 @@
+from app.services.suggestions import FollowGraph
+
+
+def register_and_login(client, username="testuser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def build_graph(session, edges):
+    from app.models.follow import Follow
+
+    for follower_id, following_id in edges:
+        session.add(Follow(follower_id=follower_id, following_id=following_id))
+    session.commit()
+    graph = FollowGraph()
+    graph.build(session)
+    return graph
+
+
+# Unit tests
+def test_friends_of_friends_ranked_by_mutuals(session):
+    graph = build_graph(session, [(1, 2), (1, 3), (2, 4), (3, 4), (3, 5), (2, 1), (4, 1)])
+    assert graph.suggest(1, 10) == [(4, 2), (5, 1)]
+
+
+def test_incremental_updates_match_rebuild(session, monkeypatch):
+    from app.core.config import settings
+
+    graph = build_graph(session, [(1, 2), (2, 3), (2, 4), (5, 6)])
+    graph.add_edge(1, 5)
+    graph.remove_edge(2, 4)
+    graph.add_edge(9, 1)
+    assert graph.suggest(1, 10) == [(3, 1), (6, 1)]
+
+    # Compaction folds the overlays into the snapshot without changing answers
+    monkeypatch.setattr(settings, "suggestions_compact_threshold", 1)
+    graph.add_edge(7, 8)
+    assert graph.stats()["pending_updates"] == 0
+    assert graph.suggest(1, 10) == [(3, 1), (6, 1)]
+    assert list(graph.following(9)) == [1]
+
+
+def test_suggestions_are_cached(session):
+    graph = build_graph(session, [(1, 2), (2, 3)])
+    graph.suggest(1, 5)
+    graph.suggest(1, 5)
+    stats = graph.stats()
+    assert (stats["cache_hits"], stats["cache_misses"]) == (1, 1)
+    assert stats["bytes_per_million_edges"] > 0
+
+
+# Endpoint tests
+def test_suggestions_endpoint(client):
+    me = auth_headers(register_and_login(client, "me"))
+    friend = auth_headers(register_and_login(client, "friend"))
+    register_and_login(client, "stranger")
+    client.post("/api/users/friend/follow", headers=me)
+    client.post("/api/users/stranger/follow", headers=friend)
+
+    response = client.get("/api/users/suggestions", headers=me)
+    assert response.status_code == 200
+    assert [(u["username"], u["mutual_count"]) for u in response.json()] == [("stranger", 1)]
+
+    client.post("/api/users/stranger/follow", headers=me)
+    assert client.get("/api/users/suggestions", headers=me).json() == []
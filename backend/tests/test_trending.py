@@ -0,0 +1,74 @@
+import time
+
+from app.services import trending
+from app.services.trending import TrendingIndex
+
+
+def register_and_login(client, username="trenduser"):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+# Unit tests
+def test_recent_engagement_outranks_old():
+    index = TrendingIndex(half_life_seconds=3600, top_k=10, max_tracked=100)
+    now = time.time()
+    for _ in range(3):
+        index.record(1, 1.0, at=now - 3 * 3600)  # 3 likes, three half-lives ago
+    index.record(2, 1.0, at=now)
+    index.refresh(now)
+    (first, first_score), (second, second_score) = index.top()
+    assert (first, second) == (2, 1)
+    assert abs(first_score - 1.0) < 1e-9
+    assert abs(second_score - 3 / 8) < 1e-9
+
+
+def test_refresh_bounds_tracked_posts():
+    index = TrendingIndex(half_life_seconds=3600, top_k=2, max_tracked=3)
+    for post_id in range(10):
+        index.record(post_id, float(post_id))
+    index.refresh()
+    assert [post_id for post_id, _ in index.top()] == [9, 8]
+    assert len(index._scores) == 3
+
+
+def test_remove_drops_from_snapshot():
+    index = TrendingIndex(half_life_seconds=3600, top_k=10, max_tracked=100)
+    index.record(1, 1.0)
+    index.refresh()
+    index.remove(1)
+    assert index.top() == []
+
+
+# Endpoint tests
+def test_trending_endpoint(client, session):
+    headers = auth_headers(register_and_login(client))
+    quiet = client.post("/api/posts", json={"content": "Quiet", "captcha_token": "test-bypass"}, headers=headers).json()
+    hot = client.post("/api/posts", json={"content": "Hot", "captcha_token": "test-bypass"}, headers=headers).json()
+    client.post(f"/api/posts/{quiet['id']}/like", headers=headers)
+    client.post(f"/api/posts/{hot['id']}/like", headers=headers)
+    client.post(f"/api/posts/{hot['id']}/repost", json={"captcha_token": "test-bypass"}, headers=headers)
+
+    assert client.get("/api/trending").json() == []  # not refreshed yet
+    trending.index.refresh()
+    assert [p["content"] for p in client.get("/api/trending").json()] == ["Hot", "Quiet"]
+
+    # A restart rebuilds the same ranking from the database
+    trending.index.clear()
+    assert trending.index.rebuild(session) == 3
+    expanded = client.get("/api/trending?expand=true").json()
+    assert [p["like_count"] for p in expanded] == [1, 1]
+    assert expanded[0]["repost_count"] == 1
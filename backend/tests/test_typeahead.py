@@ -0,0 +1,105 @@
+from app.services.typeahead import UserPrefixIndex
+
+
+def register_and_login(client, username="testuser", display_name=None):
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "display_name": display_name or username.title(),
+        "password": "password123",
+    })
+    res = client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "password123",
+    })
+    return res.json()
+
+
+def auth_headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+# Unit tests
+def test_prefix_matches_ranked_by_followers():
+    index = UserPrefixIndex(scan_limit=100)
+    index.load([
+        (1, "alice", "Alice", 5),
+        (2, "alan", "Al", 50),
+        (3, "bob", "Alfred Bob", 10),
+        (4, "carol", "Carol", 99),
+    ])
+    assert index.search("al", 10) == [2, 3, 1]
+    assert index.search("AL", 2) == [2, 3]
+    assert index.search("alfred b", 10) == [3]
+    assert index.search("z", 10) == []
+
+
+def test_wide_prefix_memoized_and_invalidated():
+    index = UserPrefixIndex(scan_limit=2)
+    index.load([(i, f"user{i}", f"User {i}", i) for i in range(1, 6)])
+    assert index.stats()["memoized_prefixes"] > 0
+    assert index.search("user", 3) == [5, 4, 3]
+    assert index.search("user ", 10) == [5, 4, 3, 2, 1]
+
+    index.add(9, "username", "Username", 100)
+    assert "user" not in index._ranked
+    assert index.search("user", 2) == [9, 5]
+
+    index.remove(9, "username", "Username")
+    assert index.search("user", 2) == [5, 4]
+
+
+def test_updates_ignored_until_built():
+    index = UserPrefixIndex(scan_limit=10)
+    index.add(1, "alice", "Alice")
+    assert index.stats()["keys"] == 0
+
+
+# Endpoint tests
+def test_search_endpoint_uses_fts_fallback(client):
+    register_and_login(client, "alice")
+    register_and_login(client, "alex", display_name="Big Al")
+    register_and_login(client, "bob")
+
+    res = client.get("/api/users/search", params={"prefix": "al"})
+    assert res.status_code == 200
+    assert sorted(u["username"] for u in res.json()) == ["alex", "alice"]
+
+    res = client.get("/api/users/search", params={"prefix": "big"})
+    assert [u["username"] for u in res.json()] == ["alex"]
+
+
+def test_search_endpoint_uses_memory_index(client, session):
+    from app.services import typeahead
+
+    bob = register_and_login(client, "bob")
+    register_and_login(client, "alice")
+    register_and_login(client, "alex")
+    typeahead.index.build(session)
+
+    # Registration after the build is picked up incrementally
+    register_and_login(client, "albert")
+    client.post("/api/users/alex/follow", headers=auth_headers(bob))
+    typeahead.index.build(session)
+
+    res = client.get("/api/users/search", params={"prefix": "al"})
+    usernames = [u["username"] for u in res.json()]
+    assert usernames[0] == "alex"
+    assert sorted(usernames) == ["albert", "alex", "alice"]
+
+
+def test_display_name_change_updates_index(client, session):
+    from app.services import typeahead
+
+    data = register_and_login(client, "alice")
+    typeahead.index.build(session)
+    client.put("/api/users/me", json={"display_name": "Zed"}, headers=auth_headers(data))
+
+    res = client.get("/api/users/search", params={"prefix": "ze"})
+    assert [u["username"] for u in res.json()] == ["alice"]
+    res = client.get("/api/users/search", params={"prefix": "alice"})
+    assert [u["username"] for u in res.json()] == ["alice"]
+
+
+def test_search_requires_prefix(client):
+    assert client.get("/api/users/search").status_code == 422
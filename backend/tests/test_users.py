@@ -1,3 +1,6 @@
+from sqlmodel import select
+
+
 def register_and_login(client, username="testuser"):
     client.post("/api/auth/register", json={
         "email": f"{username}@example.com",
@@ -77,3 +80,85 @@ def test_cannot_follow_self(client):
     headers = auth_headers(data)
     response = client.post("/api/users/narcissist/follow", headers=headers)
     assert response.status_code == 400
+
+
+def test_profile_counts(client):
+    poster = auth_headers(register_and_login(client, "poster"))
+    fan = auth_headers(register_and_login(client, "fan"))
+    client.post("/api/users/poster/follow", headers=fan)
+    post = client.post("/api/posts", json={"content": "Hi", "captcha_token": "test-bypass"}, headers=poster).json()
+    client.post(f"/api/posts/{post['id']}/reply", json={"content": "Me again", "captcha_token": "test-bypass"}, headers=poster)
+
+    profile = client.get("/api/users/poster").json()
+    assert (profile["follower_count"], profile["following_count"], profile["post_count"]) == (1, 0, 2)
+    assert client.get("/api/users/fan").json()["following_count"] == 1
+
+    client.delete("/api/users/poster/follow", headers=fan)
+    client.delete(f"/api/posts/{post['id']}", headers=poster)
+    profile = client.get("/api/users/poster").json()
+    assert (profile["follower_count"], profile["post_count"]) == (0, 1)
+
+
+def test_reconcile_user_counters(client, session):
+    from app.models.user import User
+    from app.services.counters import reconcile_user_counters
+
+    register_and_login(client, "target")
+    fan = auth_headers(register_and_login(client, "fan"))
+    client.post("/api/users/target/follow", headers=fan)
+    target = session.exec(select(User).where(User.username == "target")).one()
+    target.follower_count = 5
+    target.post_count = 3
+    session.add(target)
+    session.commit()
+
+    assert reconcile_user_counters(session, chunk_size=1) == 1
+    session.refresh(target)
+    assert (target.follower_count, target.post_count) == (1, 0)
+
+
+def test_follow_backfill_invalidates_a_partial_home_feed(client):
+    from app.routers.users import _backfill_follow
+
+    author = register_and_login(client, "author")
+    fan = register_and_login(client, "fan")
+    client.post("/api/posts", json={"content": "old", "captcha_token": "test-bypass"}, headers=auth_headers(author))
+    client.post("/api/users/author/follow", headers=auth_headers(fan))
+    # As if /feed was fetched before the background backfill finished
+    etag = client.get("/api/feed", headers=auth_headers(fan)).headers["ETag"]
+
+    _backfill_follow(fan["user"]["id"], "fan", author["user"]["id"])
+    res = client.get("/api/feed", headers={**auth_headers(fan), "If-None-Match": etag})
+    assert res.status_code == 200
+    assert [post["content"] for post in res.json()] == ["old"]
+
+
+def test_get_users_by_ids_and_usernames(client):
+    alice = register_and_login(client, "alice")
+    register_and_login(client, "bob")
+    register_and_login(client, "carol")
+    client.post("/api/users/bob/follow", headers=auth_headers(alice))
+
+    res = client.get("/api/users?ids=1&usernames=bob,nobody")
+    assert res.status_code == 200
+    data = res.json()
+    assert {user["username"] for user in data.values()} == {"alice", "bob"}
+    bob = next(user for user in data.values() if user["username"] == "bob")
+    assert data[str(bob["id"])]["follower_count"] == 1
+    # Anyone can call this, so profiles are public: no email
+    assert all("email" not in user for user in data.values())
+    assert "email" not in client.get("/api/users/bob").json()
+
+    assert client.get("/api/users").json() == {}
+    assert client.get("/api/users?ids=x").status_code == 400
+    assert client.get("/api/users?ids=&usernames=,").json() == {}
+
+
+def test_get_users_limit_covers_ids_and_usernames(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "batch_max_ids", 2)
+    register_and_login(client, "alice")
+    assert len(client.get("/api/users?ids=1,2").json()) == 1
+    res = client.get("/api/users?ids=1,2&usernames=alice")
+    assert (res.status_code, res.json()["detail"]) == (400, "At most 2 items per request")